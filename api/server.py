@@ -0,0 +1,292 @@
+"""
+AeroMind HTTP / WebSocket API
+
+Runs the agent loop of main_fallback.py headless behind an asyncio server.
+Every session flies its own drone (utils.context.DroneContext), so one worker
+serves many operators; commands within a session run one at a time.
+
+    POST   /sessions                          -> {"session_id": ...}
+    POST   /sessions/{id}/command             {"command": "takeoff to 20 meters"}
+    POST   /sessions/{id}/tools/{tool}        {"height": 20}
+    GET    /sessions/{id}/telemetry
+    WS     /sessions/{id}/telemetry           streams telemetry on every change
+    DELETE /sessions/{id}
+    GET    /tools, /stats, /health
+
+    python -m api.server --port 8000
+
+Sessions live in the worker's memory: with --workers > 1, put a proxy with
+sticky sessions in front. Set FLIGHT_LOG_DIR to record each session's flight
+history to <dir>/<session_id>.fdr (utils.flight_recorder).
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from typing import Dict
+
+from fastapi import Body, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+
+from llm.response_cache import ResponseCache
+from llm.router import ProviderRouter
+from llm.token_accounting import get_token_ledger
+from tools.command_parser import parse_command
+from tools.plan_executor import PlanError, execute_plan, is_plan, parse_plan
+from tools.registry import ToolCallError, get_tool_registry
+from utils.context import DroneContext, use_context
+from utils.logger import get_logger
+
+logger = get_logger("AeroMindAPI")
+
+MAX_SESSIONS = int(os.getenv("API_MAX_SESSIONS", "1000"))
+SESSION_TTL = float(os.getenv("API_SESSION_TTL", "3600"))  # idle seconds before a session is dropped
+TELEMETRY_INTERVAL = float(os.getenv("API_TELEMETRY_INTERVAL", "0.1"))  # WebSocket poll period
+FLIGHT_LOG_DIR = os.getenv("FLIGHT_LOG_DIR") or None
+
+
+class Session:
+    """One operator's drone and command lock"""
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        recorder = None
+        if FLIGHT_LOG_DIR:
+            from utils.flight_recorder import FlightRecorder
+            os.makedirs(FLIGHT_LOG_DIR, exist_ok=True)
+            recorder = FlightRecorder(os.path.join(FLIGHT_LOG_DIR, f"{session_id}.fdr"))
+        self.ctx = DroneContext(recorder=recorder)
+        self.lock = asyncio.Lock()
+        self.created = time.time()
+        self.last_used = time.monotonic()
+        self.commands = 0
+
+    def telemetry(self) -> dict:
+        snapshot = self.ctx.physics.telemetry
+        telemetry = self.ctx.physics.get_telemetry()
+        telemetry["seq"] = snapshot.seq
+        telemetry["path_position"] = list(self.ctx.visualizer.get_current_position())
+        return telemetry
+
+
+class SessionManager:
+    """In-memory sessions with idle expiry"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions: Dict[str, Session] = {}
+        self.expired = 0
+
+    def create(self) -> Session:
+        self.expire()
+        if len(self.sessions) >= self.max_sessions:
+            raise HTTPException(503, "Too many sessions")
+        session = Session(uuid.uuid4().hex)
+        self.sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPException(404, f"Unknown session {session_id}")
+        session.last_used = time.monotonic()
+        return session
+
+    def delete(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            raise HTTPException(404, f"Unknown session {session_id}")
+        session.ctx.close()
+
+    def expire(self):
+        cutoff = time.monotonic() - self.ttl
+        for session_id in [s.id for s in self.sessions.values()
+                           if s.last_used < cutoff and not s.lock.locked()]:
+            self.sessions.pop(session_id).ctx.close()
+            self.expired += 1
+
+
+class Agent:
+    """Command pipeline shared by all sessions: local parse -> cache -> LLM router -> tools"""
+
+    def __init__(self, providers=None, mode: str = "hedge", hedge_delay: float = 2.0,
+                 cache: bool = True, local_parse: bool = True):
+        from config.agent_config import SYSTEM_PROMPT, TOOL_CALLING_PROMPT
+        if providers is None:
+            # Gemini with Ollama fallback, configured as in main_fallback.py
+            from main_fallback import HEDGE_DELAY, ROUTING_MODE, gemini_provider, ollama_provider
+            providers = [("gemini", gemini_provider), ("ollama", ollama_provider)]
+            mode, hedge_delay = ROUTING_MODE, HEDGE_DELAY
+        self.registry = get_tool_registry()
+        self.router = ProviderRouter(providers, mode=mode, hedge_delay=hedge_delay,
+                                     validate=lambda tool_call: parse_plan(tool_call, self.registry))
+        self.cache = (ResponseCache(TOOL_CALLING_PROMPT + SYSTEM_PROMPT, self.registry.functions)
+                      if cache else None)
+        self.local_parse = local_parse
+
+    async def resolve(self, command: str) -> dict:
+        """Tool call (or plan) for a command and where it came from"""
+        start = time.perf_counter()
+        tool_call = parse_command(command) if self.local_parse else None
+        if tool_call:
+            return {"tool_call": tool_call, "provider": "local", "text": "", "llm_latency": 0.0}
+        tool_call = self.cache.get(command) if self.cache else None
+        if tool_call:
+            return {"tool_call": tool_call, "provider": "cache", "text": "", "llm_latency": 0.0}
+        try:
+            routed = await self.router.route(command)
+        except RuntimeError as e:
+            raise HTTPException(502, f"LLM routing failed: {e}")
+        return {"tool_call": routed.tool_call, "provider": routed.provider,
+                "text": routed.remaining if routed.tool_call else routed.text,
+                "llm_latency": time.perf_counter() - start}
+
+    def execute(self, session: Session, resolved: dict, command: str) -> dict:
+        """Run the resolved tool call or plan on the session's drone"""
+        tool_call = resolved["tool_call"]
+        response = {"provider": resolved["provider"], "tool_call": tool_call, "text": resolved["text"]}
+        if not tool_call:
+            return response
+        ok = False
+        with use_context(session.ctx):
+            if is_plan(tool_call):
+                try:
+                    report = execute_plan(tool_call, self.registry)
+                except PlanError as e:
+                    raise HTTPException(422, f"Invalid plan: {e}")
+                ok = report.ok
+                response["result"] = report.summary()
+                response["ok"] = ok
+            else:
+                try:
+                    response["result"] = self.registry.dispatch(tool_call)
+                except ToolCallError as e:
+                    raise HTTPException(422, f"Invalid tool call: {e}")
+                except Exception as e:
+                    raise HTTPException(500, f"Error running tool {tool_call['tool']}: {e}")
+                ok = True
+        if ok and self.cache and resolved["provider"] not in ("local", "cache"):
+            self.cache.put(command, tool_call)
+        return response
+
+    def dispatch(self, session: Session, tool_call: dict):
+        with use_context(session.ctx):
+            return self.registry.dispatch(tool_call)
+
+    def stats(self) -> dict:
+        return {
+            "router": self.router.stats(),
+            "cache": self.cache.stats() if self.cache else None,
+            "tokens": get_token_ledger().summary(),
+        }
+
+
+def create_app(providers=None, cache: bool = True, local_parse: bool = True, **router_options) -> FastAPI:
+    """Build the API.
+
+    providers: [(name, async fn(command))] for the router, default Gemini + Ollama.
+    router_options: mode / hedge_delay for custom providers.
+    """
+    app = FastAPI(title="AeroMind API")
+    agent = Agent(providers, cache=cache, local_parse=local_parse, **router_options)
+    sessions = SessionManager()
+    app.state.agent = agent
+    app.state.sessions = sessions
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "sessions": len(sessions.sessions)}
+
+    @app.get("/tools")
+    async def list_tools():
+        return agent.registry.schemas()
+
+    @app.get("/stats")
+    async def stats():
+        from llm.rate_limiter import get_scheduler
+        result = agent.stats()
+        result["quota"] = get_scheduler().stats()
+        result["sessions"] = {"active": len(sessions.sessions), "expired": sessions.expired}
+        return result
+
+    @app.post("/sessions")
+    async def create_session():
+        return {"session_id": sessions.create().id}
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        sessions.delete(session_id)
+        return {"deleted": session_id}
+
+    @app.post("/sessions/{session_id}/command")
+    async def run_command(session_id: str, body: dict = Body(...)):
+        command = body.get("command")
+        if not isinstance(command, str) or not command.strip():
+            raise HTTPException(422, "'command' must be a non-empty string")
+        session = sessions.get(session_id)
+        start = time.perf_counter()
+        async with session.lock:
+            resolved = await agent.resolve(command.strip())
+            # Tools are synchronous (path planning can take a while): keep them off the event loop
+            response = await asyncio.to_thread(agent.execute, session, resolved, command.strip())
+        session.commands += 1
+        response["latency"] = time.perf_counter() - start
+        response["llm_latency"] = resolved["llm_latency"]
+        return response
+
+    @app.post("/sessions/{session_id}/tools/{tool}")
+    async def call_tool(session_id: str, tool: str, args: dict = Body(default={})):
+        session = sessions.get(session_id)
+        async with session.lock:
+            try:
+                result = await asyncio.to_thread(agent.dispatch, session, {"tool": tool, "args": args})
+            except ToolCallError as e:
+                raise HTTPException(422, str(e))
+            except Exception as e:
+                raise HTTPException(500, f"Error running tool {tool}: {e}")
+        return {"tool": tool, "result": result}
+
+    @app.get("/sessions/{session_id}/telemetry")
+    async def get_telemetry(session_id: str):
+        return sessions.get(session_id).telemetry()
+
+    @app.websocket("/sessions/{session_id}/telemetry")
+    async def stream_telemetry(websocket: WebSocket, session_id: str):
+        session = sessions.sessions.get(session_id)
+        if session is None:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        last_seq = None
+        last_position = None
+        try:
+            while True:
+                # Snapshots are immutable, so polling them is lock-free
+                snapshot = session.ctx.physics.telemetry
+                position = session.ctx.visualizer.get_current_position()
+                if snapshot.seq != last_seq or position != last_position:
+                    last_seq, last_position = snapshot.seq, list(position)
+                    await websocket.send_json(session.telemetry())
+                session.last_used = time.monotonic()
+                await asyncio.sleep(TELEMETRY_INTERVAL)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AeroMind HTTP/WebSocket API server")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("api.server:create_app", factory=True, host=args.host, port=args.port,
+                workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
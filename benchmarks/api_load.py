@@ -0,0 +1,195 @@
+"""
+Load test for the HTTP API (api/server.py)
+
+Starts the server in a subprocess with a stand-in LLM provider (fixed
+latency plus jitter, answers with the tool call the local parser would
+produce). Then N concurrent operators each open a session and send a
+mission's worth of commands over HTTP. Reports request latency percentiles
+and throughput.
+
+    python -m benchmarks.api_load --users 50 --requests 40 --llm-latency 0.05
+    python -m benchmarks.api_load --local  # routine commands skip the LLM
+
+Local parsing and the response cache are off by default, so every command
+pays the stand-in LLM round trip.
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from tools.command_parser import parse_command
+
+MISSION = [
+    "take off to 20 meters",
+    "move forward 30 meters",
+    "move right 10",
+    "check battery",
+    "full telemetry",
+    "move up 5",
+    "return to home",
+    "land",
+]
+
+
+def standin_provider(latency: float, jitter: float):
+    """Async provider that sleeps like an LLM and answers in the JSON tool format"""
+    async def provider(command: str) -> str:
+        await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+        tool_call = parse_command(command) or {"tool": "get_current_location", "args": {}}
+        return json.dumps(tool_call)
+    return provider
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def _operator(base_url: str, requests: int, samples: dict, errors: list):
+    # One client (connection) per operator: a single shared httpx pool slows
+    # down sharply with many connections and would dominate the measurement
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        resp = await client.post("/sessions")
+        session_id = resp.json()["session_id"]
+        for i in range(requests):
+            command = MISSION[i % len(MISSION)]
+            start = time.perf_counter()
+            try:
+                resp = await client.post(f"/sessions/{session_id}/command", json={"command": command})
+                if resp.status_code != 200:
+                    errors.append(f"{resp.status_code}: {resp.text[:100]}")
+                    continue
+            except httpx.HTTPError as e:
+                errors.append(str(e))
+                continue
+            samples["client"].append(time.perf_counter() - start)
+            samples["server"].append(resp.json()["latency"])
+        await client.delete(f"/sessions/{session_id}")
+
+
+async def _load(base_url: str, users: int, requests: int):
+    samples = {"client": [], "server": []}
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_operator(base_url, requests, samples, errors) for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        stats = (await client.get("/stats")).json()
+    return samples, errors, elapsed, stats
+
+
+def _summary_ms(samples) -> dict:
+    if not samples:
+        return {"mean": None, "p50": None, "p95": None, "p99": None}
+    return {
+        "mean": statistics.fmean(samples) * 1000,
+        "p50": percentile(samples, 50) * 1000,
+        "p95": percentile(samples, 95) * 1000,
+        "p99": percentile(samples, 99) * 1000,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port: int, llm_latency: float, jitter: float, local: bool):
+    """Run the API with the stand-in provider (the load test's server process)"""
+    import uvicorn
+    from api.server import create_app
+    app = create_app(providers=[("standin", standin_provider(llm_latency, jitter))],
+                     mode="sequential", cache=local, local_parse=local)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("API server did not start")
+
+
+def run(users: int, requests: int, llm_latency: float, jitter: float, local: bool) -> dict:
+    # Separate process, so the client doesn't share the server's GIL
+    port = _free_port()
+    cmd = [sys.executable, "-m", "benchmarks.api_load", "--serve", str(port),
+           "--llm-latency", str(llm_latency), "--jitter", str(jitter)]
+    if local:
+        cmd.append("--local")
+    server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url, server)
+        samples, errors, elapsed, stats = asyncio.run(_load(base_url, users, requests))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    total = len(samples["client"]) + len(errors)
+    return {
+        "users": users,
+        "requests": total,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "duration_s": elapsed,
+        "rps": total / elapsed if elapsed else 0.0,
+        "llm_latency_ms": llm_latency * 1000,
+        "local_parse": local,
+        # As seen by the operators, and as measured inside the server (excludes HTTP and queueing)
+        "latency_ms": _summary_ms(samples["client"]),
+        "server_latency_ms": _summary_ms(samples["server"]),
+        "server": {"router": stats["router"]["wins"], "cache": stats["cache"]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AeroMind API")
+    parser.add_argument("--users", type=int, default=50, help="concurrent sessions")
+    parser.add_argument("--requests", type=int, default=40, help="commands per session")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stand-in LLM latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="stand-in LLM latency stddev (s)")
+    parser.add_argument("--local", action="store_true", help="enable local parsing and the response cache")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.llm_latency, args.jitter, args.local)
+        return
+
+    report = run(args.users, args.requests, args.llm_latency, args.jitter, args.local)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Users: {report['users']}  Requests: {report['requests']}  Errors: {report['errors']}")
+    print(f"Throughput: {report['rps']:.1f} req/s over {report['duration_s']:.2f}s "
+          f"(stand-in LLM {report['llm_latency_ms']:.0f} ms)")
+    for label, key in (("Latency", "latency_ms"), ("Server", "server_latency_ms")):
+        lat = report[key]
+        if lat["p50"] is not None:
+            print(f"{label + ':':9}mean {lat['mean']:.1f} ms  p50 {lat['p50']:.1f} ms  "
+                  f"p95 {lat['p95']:.1f} ms  p99 {lat['p99']:.1f} ms")
+    for error in report["error_samples"]:
+        print(f"  error: {error}")
+
+
+if __name__ == "__main__":
+    main()
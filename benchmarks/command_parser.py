@@ -0,0 +1,130 @@
+"""
+Benchmark the local command parser (tools/command_parser.py)
+
+Checks every routine command below parses to the expected tool (None = must
+go to the LLM), that every exported tool is reachable, and reports parse
+latency percentiles.
+
+    python -m benchmarks.command_parser --repeat 2000
+"""
+import argparse
+import json
+import statistics
+import time
+
+import tools
+from tools.command_parser import CommandParser
+
+CORPUS = [
+    ("takeoff to 15 meters", "takeoff"),
+    ("take off 20", "takeoff"),
+    ("move to coordinates 10, 20, 30", "move_to_location"),
+    ("fly to (5, -5, 12)", "move_to_location"),
+    ("go forward 50 meters", "move_forward"),
+    ("move backward 5", "move_backward"),
+    ("move right 100 meters", "move_right"),
+    ("left 7.5", "move_left"),
+    ("move up 3", "move_up"),
+    ("descend 10m", "move_down"),
+    ("return to home", "return_to_home"),
+    ("go back to initial point", "return_to_home"),
+    ("where am I?", "get_current_location"),
+    ("land the drone", "land"),
+    ("fly to gps 17.385 78.4867 50", "move_to_gps"),
+    ("current gps", "get_current_gps"),
+    ("plan path to 100 100 20", "plan_path_to"),
+    ("add obstacle at 50 50 10 radius 15", "add_obstacle"),
+    ("add no-fly zone 0 10 0 10 0 50", "add_no_fly_zone"),
+    ("check battery", "get_battery_status"),
+    ("get flight stats", "get_flight_statistics"),
+    ("full telemetry", "get_full_telemetry"),
+    ("recharge battery to 80%", "recharge_battery"),
+    ("set wind speed to 5 meters per second", "set_wind"),
+    ("land", "land"),
+    ("detect obstacles", "detect_obstacles_opencv"),
+    ("load a 0.8 kg parcel", "load_payload"),
+    ("drop payload at warehouse A", "drop_payload"),
+    ("deliver to location 50, 30, 10", "deliver_to_location"),
+    ("return to base and land", "return_to_base_and_land"),
+    ("check payload status", "check_payload_status"),
+    ("list delivery locations", "list_delivery_locations"),
+    ("verify otp 1234", "verify_delivery_otp"),
+    ("update delivery status to delivered", "update_delivery_status"),
+    # Free-form or ambiguous: must fall through to the LLM
+    ("fly a square pattern around the warehouse", None),
+    ("move to 10 20", None),
+    ("land at the park", None),
+    ("what's the weather like up there?", None),
+]
+
+
+def run(repeat: int) -> dict:
+    tool_table = {name: getattr(tools, name) for name in tools.__all__}
+
+    start = time.perf_counter()
+    parser = CommandParser(tool_table)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    mismatches = []
+    for command, expected in CORPUS:
+        result = parser.parse(command)
+        got = result["tool"] if result else None
+        if got != expected:
+            mismatches.append({"command": command, "expected": expected, "got": got})
+
+    covered = {expected for _, expected in CORPUS if expected}
+    samples = []
+    for _ in range(repeat):
+        for command, _ in CORPUS:
+            t0 = time.perf_counter_ns()
+            parser.parse(command)
+            samples.append(time.perf_counter_ns() - t0)
+    samples.sort()
+
+    def pct(q):
+        return samples[min(len(samples) - 1, int(q / 100 * len(samples)))] / 1000
+
+    return {
+        "commands": len(CORPUS),
+        "parses": len(samples),
+        "build_ms": round(build_ms, 3),
+        "correct": len(CORPUS) - len(mismatches),
+        "mismatches": mismatches,
+        "tools_without_grammar": parser.missing,
+        "tools_not_in_corpus": sorted(set(tool_table) - covered),
+        "latency_us": {
+            "mean": round(statistics.fmean(samples) / 1000, 2),
+            "p50": round(pct(50), 2),
+            "p99": round(pct(99), 2),
+            "max": round(samples[-1] / 1000, 2),
+        },
+        "parses_per_sec": round(len(samples) / (sum(samples) / 1e9)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=1000, help="passes over the corpus")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    results = run(args.repeat)
+    lat = results["latency_us"]
+    print(f"Parsed {results['parses']} commands ({results['commands']} distinct), grammar built in {results['build_ms']} ms")
+    print(f"Correct: {results['correct']}/{results['commands']}")
+    for miss in results["mismatches"]:
+        print(f"  MISMATCH {miss['command']!r}: expected {miss['expected']}, got {miss['got']}")
+    if results["tools_without_grammar"]:
+        print(f"  Tools without grammar: {', '.join(results['tools_without_grammar'])}")
+    if results["tools_not_in_corpus"]:
+        print(f"  Tools not exercised: {', '.join(results['tools_not_in_corpus'])}")
+    print(f"Latency: mean {lat['mean']} us, p50 {lat['p50']} us, p99 {lat['p99']} us, max {lat['max']} us")
+    print(f"Throughput: {results['parses_per_sec']:,} parses/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
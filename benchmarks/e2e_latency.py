@@ -0,0 +1,191 @@
+"""
+End-to-end latency of the agent pipeline against the mock LLM (benchmarks/mock_llm.py)
+
+Every command goes through the real code path of main_fallback.py's JSON
+mode and is timed per stage:
+
+    prompt   build the prompt around SYSTEM_PROMPT
+    network  llm.ollama_client request to the mock server (stream stops at the tool call)
+    parse    extract the tool call JSON and validate it against the tool registry
+    tool     dispatch the tool (physics, path planner) on a fresh drone per mission
+    render   redraw the simulator views (matplotlib Agg) for the new state
+
+    python -m benchmarks.e2e_latency --missions 20 --latency 0.2 --tokens-per-sec 50 --out e2e.json
+
+Prints p50/p95/p99 per stage and writes them, with the configuration, as
+JSON for regression tracking.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import warnings
+
+MISSION = [
+    "take off to 25 meters",
+    "move forward 40 meters",
+    "plan path to 80 60 25",
+    "check battery",
+    "move right 15",
+    "get full telemetry",
+    "return to home",
+    "land",
+]
+
+STAGES = ("prompt", "network", "parse", "tool", "render")
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def summarize(samples) -> dict:
+    """Milliseconds: mean, p50, p95, p99, max"""
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "mean": statistics.fmean(ms),
+        "p50": percentile(ms, 50),
+        "p95": percentile(ms, 95),
+        "p99": percentile(ms, 99),
+        "max": max(ms),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run(missions: int, latency: float, tokens_per_sec: float, jitter: float,
+        stream: bool, render: bool) -> dict:
+    from benchmarks.mock_llm import MockLLMServer
+
+    mock = MockLLMServer(latency=latency, tokens_per_sec=tokens_per_sec, jitter=jitter)
+    # The Ollama client reads its URLs at import (chat URL derived from it)
+    os.environ["OLLAMA_URL"] = mock.start()
+
+    import matplotlib
+    matplotlib.use("Agg")
+    # The title's emoji glyphs are missing from the default fonts
+    warnings.filterwarnings("ignore", message="Glyph .* missing")
+    from config.agent_config import SYSTEM_PROMPT
+    from llm import ollama_client
+    from llm.tool_call_parser import ToolCallStreamParser, extract_tool_call
+    from tools.registry import ToolCallError, get_tool_registry
+    from utils.context import DroneContext, use_context
+    from utils.drone_visualizer import DroneVisualizer
+
+    ollama_client.OLLY_URL = os.environ["OLLAMA_URL"]  # in case it was imported already
+    registry = get_tool_registry()
+    renderer = None
+    if render:
+        renderer = DroneVisualizer()
+        renderer.start_visualization()
+
+    timings = {stage: [] for stage in STAGES}
+    totals = []
+    failures = []
+    try:
+        for _ in range(missions):
+            ctx = DroneContext()
+            for command in MISSION:
+                t0 = time.perf_counter()
+                prompt = f"User: {command}\nAgent:"
+
+                t1 = time.perf_counter()
+                if stream:
+                    parser = ToolCallStreamParser()
+                    parser.consume(ollama_client.stream_ollama(prompt, system=SYSTEM_PROMPT))
+                    text = parser.text
+                else:
+                    text = ollama_client.query_ollama(prompt, system=SYSTEM_PROMPT)
+
+                t2 = time.perf_counter()
+                tool_call, _ = extract_tool_call(text)
+                try:
+                    tool_call = registry.validate(tool_call)
+                except ToolCallError as e:
+                    failures.append(f"{command}: {e}")
+                    continue
+
+                t3 = time.perf_counter()
+                with use_context(ctx):
+                    registry.dispatch(tool_call)
+
+                t4 = time.perf_counter()
+                if renderer is not None:
+                    renderer.positions = ctx.visualizer.positions
+                    renderer.physics = ctx.physics
+                    renderer.update_plot()
+                    renderer.fig.canvas.draw()
+                t5 = time.perf_counter()
+
+                for stage, duration in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                    timings[stage].append(duration)
+                totals.append(t5 - t0)
+    finally:
+        mock.stop()
+        if renderer is not None:
+            renderer.stop_visualization()
+
+    return {
+        "benchmark": "e2e_latency",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "missions": missions,
+            "commands_per_mission": len(MISSION),
+            "latency_s": latency,
+            "tokens_per_sec": tokens_per_sec,
+            "jitter_s": jitter,
+            "stream": stream,
+            "render": render,
+        },
+        "stages_ms": {stage: summarize(samples) for stage, samples in timings.items() if samples and
+                      (stage != "render" or render)},
+        "total_ms": summarize(totals) if totals else None,
+        "failures": failures,
+        "mock": mock.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end agent latency against a mock LLM")
+    parser.add_argument("--missions", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock time to first token (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--no-stream", action="store_true", help="use the non-streamed request")
+    parser.add_argument("--no-render", action="store_true", help="skip the matplotlib stage")
+    parser.add_argument("--out", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.missions, args.latency, args.tokens_per_sec, args.jitter,
+                 stream=not args.no_stream, render=not args.no_render)
+
+    print(f"{'stage':<8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(report["stages_ms"].items())
+    if report["total_ms"]:
+        rows.append(("total", report["total_ms"]))
+    for stage, s in rows:
+        print(f"{stage:<8} {s['p50']:>9.2f} {s['p95']:>9.2f} {s['p99']:>9.2f}")
+    for failure in report["failures"][:5]:
+        print(f"  failed: {failure}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Scalar vs vectorized GPS conversion
+
+Converts N random points around the base with GPSConverter.gps_to_xyz in a
+Python loop and with gps_to_xyz_many in one call (and the same for the
+inverse), and checks that both paths agree, that a round trip returns the
+input, and how far the projected distances are from the geodesic. Reference
+points at known geodesic distances from the base must land within
+REFERENCE_TOLERANCE (the documented error bound), or the run exits with 1.
+
+    python -m benchmarks.gps --points 100000 --radius 15000 --out gps.json
+"""
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from geopy.distance import geodesic
+
+from utils.gps_utils import BASE_GPS, GPSConverter, calculate_distance
+
+# (distance m, bearing deg from north) of the reference points, and the allowed
+# error in projected distance at each (GPSConverter's documented bound)
+REFERENCE_POINTS = [(1000, 0), (5000, 90), (10000, 45), (15000, 200), (20000, 315)]
+REFERENCE_TOLERANCE = {1000: 0.01, 5000: 0.03, 10000: 0.1, 15000: 0.2, 20000: 0.35}
+
+
+def random_points(count: int, radius: float, seed: int = 0) -> np.ndarray:
+    """(count, 3) lat / lon / altitude within `radius` meters of the base"""
+    rng = np.random.default_rng(seed)
+    converter = GPSConverter(*BASE_GPS)
+    distance = radius * np.sqrt(rng.random(count))
+    bearing = rng.uniform(0, 2 * np.pi, count)
+    xyz = np.column_stack([distance * np.cos(bearing), distance * np.sin(bearing),
+                           rng.uniform(0, 120, count)])
+    return converter.xyz_to_gps_many(xyz)
+
+
+def check_reference(converter: GPSConverter) -> dict:
+    """Points at known geodesic distance / bearing from the base: distance, bearing and round-trip errors"""
+    rows = []
+    for distance, bearing in REFERENCE_POINTS:
+        point = geodesic(meters=distance).destination(BASE_GPS, bearing)
+        x, y, _ = converter.gps_to_xyz(point.latitude, point.longitude, 50.0)
+        lat, lon, alt = converter.xyz_to_gps(x, y, 50.0)
+        error = abs(math.hypot(x, y) - distance)
+        rows.append({
+            "distance_m": distance,
+            "bearing_deg": bearing,
+            "distance_error_m": error,
+            "bearing_error_deg": abs((math.degrees(math.atan2(y, x)) - bearing + 180) % 360 - 180),
+            "round_trip_error_deg": max(abs(lat - point.latitude), abs(lon - point.longitude)),
+            "ok": error <= REFERENCE_TOLERANCE[distance] and alt == 50.0
+                  and max(abs(lat - point.latitude), abs(lon - point.longitude)) < 1e-9,
+        })
+    return {"points": rows, "ok": all(row["ok"] for row in rows)}
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(count: int, radius: float, repeats: int, geodesic_samples: int) -> dict:
+    converter = GPSConverter(*BASE_GPS)
+    gps = random_points(count, radius)
+    lat, lon, alt = gps[:, 0].tolist(), gps[:, 1].tolist(), gps[:, 2].tolist()
+
+    scalar_xyz = np.array([converter.gps_to_xyz(*p) for p in zip(lat, lon, alt)])
+    vector_xyz = converter.gps_to_xyz_many(gps)
+    vector_gps = converter.xyz_to_gps_many(vector_xyz)
+    scalar_gps = np.array([converter.xyz_to_gps(*p) for p in scalar_xyz.tolist()])
+
+    timings = {
+        "gps_to_xyz": best_of(lambda: [converter.gps_to_xyz(*p) for p in zip(lat, lon, alt)], repeats),
+        "gps_to_xyz_many": best_of(lambda: converter.gps_to_xyz_many(gps), repeats),
+    }
+    rows = scalar_xyz.tolist()
+    timings["xyz_to_gps"] = best_of(lambda: [converter.xyz_to_gps(*p) for p in rows], repeats)
+    timings["xyz_to_gps_many"] = best_of(lambda: converter.xyz_to_gps_many(vector_xyz), repeats)
+
+    # Horizontal distance from the base: projection vs ellipsoid
+    sample = np.linspace(0, count - 1, min(count, geodesic_samples)).astype(int)
+    geodesic_error = [abs(float(np.hypot(*vector_xyz[i, :2])) - calculate_distance(*BASE_GPS, lat[i], lon[i]))
+                      for i in sample]
+
+    return {
+        "benchmark": "gps",
+        "config": {"points": count, "radius_m": radius, "repeats": repeats, "base": BASE_GPS},
+        "seconds": timings,
+        "points_per_second": {name: count / seconds for name, seconds in timings.items()},
+        "speedup": {
+            "gps_to_xyz": timings["gps_to_xyz"] / timings["gps_to_xyz_many"],
+            "xyz_to_gps": timings["xyz_to_gps"] / timings["xyz_to_gps_many"],
+        },
+        "max_scalar_vector_diff_m": float(np.abs(scalar_xyz - vector_xyz).max()),
+        "max_scalar_vector_diff_deg": float(np.abs(scalar_gps[:, :2] - vector_gps[:, :2]).max()),
+        "max_round_trip_error_deg": float(np.abs(vector_gps - gps)[:, :2].max()),
+        "max_geodesic_error_m": max(geodesic_error),
+        "reference": check_reference(converter),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar vs vectorized GPS <-> XYZ conversion")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--radius", type=float, default=15_000, help="max distance from the base (m)")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per path (best is kept)")
+    parser.add_argument("--geodesic-samples", type=int, default=1000,
+                        help="points checked against the geodesic distance")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--out", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.points, args.radius, args.repeats, args.geodesic_samples)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.points} points within {args.radius:.0f} m of the base")
+        print(f"{'path':<16} {'ms':>10} {'points/s':>14}")
+        for name, seconds in report["seconds"].items():
+            print(f"{name:<16} {seconds * 1000:>10.2f} {report['points_per_second'][name]:>14,.0f}")
+        print(f"speedup: gps_to_xyz {report['speedup']['gps_to_xyz']:.1f}x, "
+              f"xyz_to_gps {report['speedup']['xyz_to_gps']:.1f}x")
+        print(f"scalar vs vector: {report['max_scalar_vector_diff_m']:.2e} m, "
+              f"round trip: {report['max_round_trip_error_deg']:.2e} deg, "
+              f"vs geodesic: {report['max_geodesic_error_m']:.3f} m")
+        print(f"{'reference':<16} {'error m':>10} {'bearing err':>12}")
+        for row in report["reference"]["points"]:
+            print(f"{row['distance_m']:>7} m @ {row['bearing_deg']:>3}  {row['distance_error_m']:>10.4f} "
+                  f"{row['bearing_error_deg']:>11.5f}°  {'ok' if row['ok'] else 'FAIL'}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+    if not report["reference"]["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
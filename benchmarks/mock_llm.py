@@ -0,0 +1,248 @@
+"""
+Mock LLM server speaking Ollama's HTTP API, for reproducible benchmarks
+
+Answers /api/generate (streamed or not) and /api/chat (native tool calls)
+with the tool call the local command parser (tools/command_parser.py)
+produces for the operator's command. Timing is synthetic and configurable:
+`latency` seconds before the first token, then `tokens_per_sec`. Responses
+carry Ollama's stats fields (prompt_eval_count, eval_count, durations).
+
+    python -m benchmarks.mock_llm --port 11435 --latency 0.3 --tokens-per-sec 40
+    OLLAMA_URL=http://127.0.0.1:11435/api/generate python main_fallback.py
+
+Standard library only, so benchmarks don't depend on a model being installed.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm.token_accounting import estimate_tokens
+from tools.command_parser import parse_command
+
+# Last "User: ..." turn of a JSON-mode prompt ("User: {command}\nAgent:")
+_USER_RE = re.compile(r"User:\s*(.*?)\s*(?:\nAgent:|$)", re.DOTALL)
+FALLBACK_CALL = {"tool": "get_current_location", "args": {}}
+
+
+def command_from_prompt(prompt: str) -> str:
+    matches = _USER_RE.findall(prompt)
+    return matches[-1].strip().strip('"') if matches else prompt.strip()
+
+
+def tool_call_for(command: str) -> dict:
+    return parse_command(command) or FALLBACK_CALL
+
+
+def _chunks(text: str, size: int = 4):
+    """Split text into ~token-sized pieces (4 chars, as estimate_tokens assumes)"""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like Ollama
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass  # client dropped an idle keep-alive connection
+
+    @property
+    def config(self) -> "MockLLMServer":
+        return self.server.mock
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        mock = self.config
+        with mock.lock:
+            mock.requests += 1
+            mock.in_flight += 1
+            mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+        # Like OLLAMA_NUM_PARALLEL: requests beyond max_parallel wait their turn
+        if mock.slots is not None:
+            mock.slots.acquire()
+        try:
+            if random.random() < mock.error_rate:
+                mock.errors += 1
+                self._send_json(500, {"error": "mock failure"})
+            elif self.path == "/api/generate":
+                self._generate(body)
+            elif self.path == "/api/chat":
+                self._chat(body)
+            else:
+                self._send_json(404, {"error": f"unknown endpoint {self.path}"})
+        finally:
+            if mock.slots is not None:
+                mock.slots.release()
+            with mock.lock:
+                mock.in_flight -= 1
+
+    def _timings(self, prompt_text: str, output: str, start: float) -> dict:
+        now = time.perf_counter()
+        prompt_tokens = estimate_tokens(prompt_text)
+        return {
+            "done": True,
+            "total_duration": int((now - start) * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": estimate_tokens(output),
+            "eval_duration": int(max(now - start - self.config.latency, 1e-6) * 1e9),
+        }
+
+    def _generate(self, body: dict):
+        start = time.perf_counter()
+        mock = self.config
+        prompt = body.get("prompt", "")
+        output = json.dumps(tool_call_for(command_from_prompt(prompt)))
+        model = body.get("model", "mock")
+        pieces = _chunks(output)
+
+        time.sleep(mock.first_token_delay())
+        if not body.get("stream", True):
+            time.sleep(len(pieces) / mock.tokens_per_sec)
+            reply = {"model": model, "response": output}
+            reply.update(self._timings((body.get("system") or "") + prompt, output, start))
+            self._send_json(200, reply)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for piece in pieces:
+                self._write_chunk(json.dumps({"model": model, "response": piece, "done": False}).encode() + b"\n")
+                time.sleep(1 / mock.tokens_per_sec)
+            final = {"model": model, "response": ""}
+            final.update(self._timings((body.get("system") or "") + prompt, output, start))
+            self._write_chunk(json.dumps(final).encode() + b"\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream (tool call already complete)
+            mock.cancelled += 1
+            self.close_connection = True
+
+    def _chat(self, body: dict):
+        start = time.perf_counter()
+        mock = self.config
+        messages = body.get("messages") or []
+        prompt = "".join(m.get("content", "") for m in messages)
+        user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        tool_call = tool_call_for(command_from_prompt(user))
+        if body.get("tools"):
+            message = {"role": "assistant", "content": "",
+                       "tool_calls": [{"function": {"name": tool_call["tool"], "arguments": tool_call["args"]}}]}
+            output = json.dumps(message["tool_calls"])
+        else:
+            output = json.dumps(tool_call)
+            message = {"role": "assistant", "content": output}
+
+        time.sleep(mock.first_token_delay() + len(_chunks(output)) / mock.tokens_per_sec)
+        reply = {"model": body.get("model", "mock"), "message": message}
+        reply.update(self._timings(prompt, output, start))
+        self._send_json(200, reply)
+
+
+class MockLLMServer:
+    """Threaded mock server; start() returns the /api/generate URL"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                 tokens_per_sec: float = 50.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 max_parallel: int = 0):
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # Requests generated at once (0 = unlimited); the rest queue as in Ollama
+        self.slots = threading.Semaphore(max_parallel) if max_parallel > 0 else None
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), MockLLMHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.thread = None
+
+    def first_token_delay(self) -> float:
+        return max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return f"{self.base_url}/api/generate"
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors, "cancelled": self.cancelled,
+                "max_in_flight": self.max_in_flight}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Ollama-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="stddev of the first-token latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--parallel", type=int, default=0,
+                        help="requests generated at once, others queue (0 = unlimited)")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.tokens_per_sec,
+                           args.jitter, args.error_rate, args.parallel)
+    print(f"Mock LLM listening on {server.base_url} (/api/generate, /api/chat)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
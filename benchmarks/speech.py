@@ -0,0 +1,185 @@
+"""
+Whisper speed and accuracy on recorded mission commands
+
+For each model size / compute type / thread count, transcribes every clip
+and reports the real-time factor (transcription time / audio duration,
+below 1 keeps up with live speech), word error rate against the reference
+text, and load time.
+
+    python -m benchmarks.speech --record                  # read the commands aloud once
+    python -m benchmarks.speech --models tiny.en,base.en,small.en --compute-types int8,float32
+
+Clips live in benchmarks/speech_clips/ (or --clips DIR): audio files plus a
+manifest.jsonl of {"audio": "takeoff.wav", "text": "take off to 20 meters"}.
+The bundled clips are COMMANDS synthesized with espeak-ng; --record replaces
+them with your own voice and microphone.
+Everything is read from disk, so the benchmark runs offline once the models
+are in the local cache (WHISPER_MODEL_DIR).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+import wave
+
+from speech.models import (WHISPER_CPU_THREADS, WHISPER_DEVICE, WHISPER_MODEL, clear_whisper_models,
+                           get_whisper_model, resolve_compute_type, transcribe)
+from speech.vad import SAMPLE_RATE
+
+DEFAULT_CLIPS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "speech_clips")
+
+# Read aloud by --record
+COMMANDS = [
+    "take off to 20 meters",
+    "move forward 30 meters",
+    "move to coordinates 80, 60, 25",
+    "check the battery",
+    "add an obstacle at 50, 50, 15 with radius 10",
+    "plan a path to 100, 100, 20",
+    "load the package",
+    "deliver the parcel to warehouse A",
+    "return to base and land",
+    "land",
+]
+
+_PUNCT_RE = re.compile(r"[^\w\s']")
+
+
+def words(text: str):
+    return _PUNCT_RE.sub(" ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str):
+    """(substitutions + deletions + insertions, reference word count)"""
+    ref, hyp = words(reference), words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+
+def load_clips(path: str):
+    """[(name, samples, reference)] from a manifest file or a directory holding manifest.jsonl"""
+    from faster_whisper import decode_audio
+
+    manifest = os.path.join(path, "manifest.jsonl") if os.path.isdir(path) else path
+    if not os.path.exists(manifest):
+        raise FileNotFoundError(f"No clip manifest at {manifest} (record clips with --record)")
+    base = os.path.dirname(manifest)
+    clips = []
+    with open(manifest) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                audio = os.path.join(base, entry["audio"])
+                clips.append((entry["audio"], decode_audio(audio, sampling_rate=SAMPLE_RATE), entry["text"]))
+    return clips
+
+
+def record(path: str, seconds: float = 4.0):
+    """Prompt for each command, record it from the microphone and write the manifest"""
+    import sounddevice as sd
+
+    os.makedirs(path, exist_ok=True)
+    entries = []
+    for i, command in enumerate(COMMANDS):
+        input(f"[{i + 1}/{len(COMMANDS)}] Press Enter, then say: \"{command}\"")
+        audio = sd.rec(int(seconds * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype="int16")
+        sd.wait()
+        name = f"command_{i:02d}.wav"
+        with wave.open(os.path.join(path, name), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(audio.tobytes())
+        entries.append({"audio": name, "text": command})
+    with open(os.path.join(path, "manifest.jsonl"), "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+    print(f"Recorded {len(entries)} clips to {path}")
+
+
+def run_config(clips, size: str, compute_type: str, cpu_threads: int, beam_size: int) -> dict:
+    clear_whisper_models()
+    start = time.perf_counter()
+    model = get_whisper_model(size, compute_type, cpu_threads=cpu_threads)
+    load = time.perf_counter() - start
+
+    audio_seconds = compute_seconds = 0.0
+    errors = reference_words = 0
+    latencies = []
+    mistakes = []
+    for name, samples, reference in clips:
+        start = time.perf_counter()
+        text = transcribe(samples, model, beam_size=beam_size, condition_on_previous_text=False)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        audio_seconds += len(samples) / SAMPLE_RATE
+        compute_seconds += elapsed
+        edits, count = word_errors(reference, text)
+        errors += edits
+        reference_words += count
+        if edits:
+            mistakes.append({"clip": name, "reference": reference, "heard": text})
+    return {
+        "model": size,
+        "compute_type": resolve_compute_type(compute_type, WHISPER_DEVICE),  # after any fallback
+        "cpu_threads": cpu_threads,
+        "beam_size": beam_size,
+        "load_s": load,  # includes the warm-up transcription
+        "clips": len(clips),
+        "audio_s": audio_seconds,
+        "real_time_factor": compute_seconds / audio_seconds if audio_seconds else None,
+        "latency_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "latency_max_ms": max(latencies) * 1000 if latencies else None,
+        "wer": errors / reference_words if reference_words else None,
+        "mistakes": mistakes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper real-time factor and WER on mission commands")
+    parser.add_argument("--clips", default=DEFAULT_CLIPS, help="clip directory or manifest.jsonl")
+    parser.add_argument("--models", default=WHISPER_MODEL, help="comma-separated model sizes")
+    parser.add_argument("--compute-types", default="int8,float32", help="comma-separated compute types")
+    parser.add_argument("--threads", default=str(WHISPER_CPU_THREADS),
+                        help="comma-separated cpu_threads values (0 = all cores)")
+    parser.add_argument("--beam-size", type=int, default=1)
+    parser.add_argument("--record", action="store_true", help="record the clips from the microphone")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--out", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.clips)
+        return
+
+    clips = load_clips(args.clips)
+    results = []
+    for size in args.models.split(","):
+        for compute_type in args.compute_types.split(","):
+            for threads in args.threads.split(","):
+                results.append(run_config(clips, size.strip(), compute_type.strip(), int(threads),
+                                          args.beam_size))
+                if not args.json:
+                    r = results[-1]
+                    print(f"{r['model']:<10} {r['compute_type']:<13} threads={r['cpu_threads']:<3} "
+                          f"RTF {r['real_time_factor']:.3f}  WER {r['wer']:.1%}  "
+                          f"p50 {r['latency_p50_ms']:.0f} ms  load {r['load_s']:.1f}s")
+    clear_whisper_models()
+
+    report = {"clips": args.clips, "results": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
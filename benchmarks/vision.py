@@ -0,0 +1,152 @@
+"""
+Frame-processing throughput of the obstacle detector at several resolutions
+
+Times the edge-count chain of utils/vision_pipeline.py per frame:
+
+    baseline      cvtColor -> Canny -> np.sum(edges > 0) at full resolution (the original count)
+    countnonzero  the same with cv2.countNonZero (count_edges, the default path)
+    fast          ROI band -> pyrDown to <= 320 px -> Canny -> countNonZero (VISION_FAST_PATH)
+    analyze       the full detector (edge check + obstacle localization), fast and baseline
+
+and compares the fast path's edge count and obstacle decision with the
+full-resolution baseline on the same frames.
+
+    python -m benchmarks.vision --source flight.mp4 --frames 200 --resolutions 640x480,1280x720,1920x1080
+
+Without --source, seeded synthetic scenes are used.
+"""
+import argparse
+import json
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from utils.vision_pipeline import (CANNY_HIGH, CANNY_LOW, EDGE_PIXEL_THRESHOLD, analyze_frame,
+                                   count_edges, open_source, roi_edges)
+
+
+def synthetic_frames(count: int, width: int = 1920, height: int = 1080, seed: int = 0):
+    """Sky/ground scenes with a random number of boxes and poles, some textured"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        frame = np.empty((height, width, 3), np.uint8)
+        horizon = int(height * rng.uniform(0.3, 0.6))
+        frame[:horizon] = (200, 170, 140)
+        frame[horizon:] = (70, 110, 90)
+        for _ in range(int(rng.integers(0, 6))):
+            x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+            w, h = int(rng.integers(20, width // 4)), int(rng.integers(20, height // 2))
+            color = tuple(int(c) for c in rng.integers(0, 255, 3))
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, -1)
+        noise = rng.normal(0, rng.uniform(2, 12), frame.shape)
+        frames.append(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def load_frames(source: str, count: int):
+    reader = open_source(source)
+    if not reader.is_opened():
+        raise RuntimeError(f"Cannot open {source}")
+    frames = []
+    try:
+        while len(frames) < count:
+            frame = reader.read()
+            if frame is None:
+                break
+            frames.append(frame)
+    finally:
+        reader.release()
+    return frames
+
+
+def count_edges_sum(frame: np.ndarray) -> int:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return int(np.sum(cv2.Canny(gray, CANNY_LOW, CANNY_HIGH) > 0))
+
+
+def count_edges_fast(frame: np.ndarray) -> int:
+    edges, scale, _ = roi_edges(frame)
+    return cv2.countNonZero(edges) * scale
+
+
+VARIANTS = {
+    "baseline": count_edges_sum,
+    "countnonzero": count_edges,
+    "fast": count_edges_fast,
+    "analyze_baseline": lambda frame: analyze_frame(frame, fast=False),
+    "analyze_fast": lambda frame: analyze_frame(frame, fast=True),
+}
+
+
+def time_variant(fn, frames, repeat: int) -> dict:
+    fn(frames[0])  # warm up OpenCV's buffers
+    samples = []
+    for _ in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            fn(frame)
+            samples.append(time.perf_counter() - start)
+    mean = statistics.fmean(samples)
+    return {"fps": 1 / mean, "mean_ms": mean * 1000,
+            "p95_ms": sorted(samples)[int(0.95 * (len(samples) - 1))] * 1000}
+
+
+def accuracy(frames) -> dict:
+    """Fast path vs full-resolution baseline on the same frames"""
+    baseline = np.array([count_edges(f) for f in frames], dtype=float)
+    fast = np.array([count_edges_fast(f) for f in frames], dtype=float)
+    agree = (baseline > EDGE_PIXEL_THRESHOLD) == (fast > EDGE_PIXEL_THRESHOLD)
+    relative = np.abs(fast - baseline) / np.maximum(baseline, 1)
+    return {
+        "decision_agreement": float(agree.mean()),
+        "false_alarms": int(((fast > EDGE_PIXEL_THRESHOLD) & (baseline <= EDGE_PIXEL_THRESHOLD)).sum()),
+        "missed": int(((fast <= EDGE_PIXEL_THRESHOLD) & (baseline > EDGE_PIXEL_THRESHOLD)).sum()),
+        "count_rel_error_median": float(np.median(relative)),
+        "count_correlation": float(np.corrcoef(baseline, fast)[0, 1]) if baseline.std() and fast.std() else None,
+    }
+
+
+def run(frames, resolutions, repeat: int) -> dict:
+    results = []
+    for width, height in resolutions:
+        scaled = [cv2.resize(f, (width, height), interpolation=cv2.INTER_AREA) for f in frames]
+        row = {"resolution": f"{width}x{height}"}
+        row["variants"] = {name: time_variant(fn, scaled, repeat) for name, fn in VARIANTS.items()}
+        row["speedup"] = row["variants"]["fast"]["fps"] / row["variants"]["baseline"]["fps"]
+        row["accuracy"] = accuracy(scaled)
+        results.append(row)
+    return {"benchmark": "vision", "frames": len(frames), "repeat": repeat, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Obstacle detector frame throughput and fast-path accuracy")
+    parser.add_argument("--source", help="video file or image directory (default: synthetic scenes)")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--resolutions", default="640x480,1280x720,1920x1080")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames) if args.source else synthetic_frames(args.frames)
+    resolutions = [tuple(int(v) for v in r.lower().split("x")) for r in args.resolutions.split(",")]
+    report = run(frames, resolutions, args.repeat)
+
+    names = list(VARIANTS)
+    print(f"{'resolution':<11}" + "".join(f"{name:>18}" for name in names) + "   agreement  count err")
+    for row in report["results"]:
+        fps = "".join(f"{row['variants'][name]['fps']:>14.1f} fps" for name in names)
+        acc = row["accuracy"]
+        print(f"{row['resolution']:<11}{fps}   {acc['decision_agreement']:>8.1%}  "
+              f"{acc['count_rel_error_median']:>8.1%}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
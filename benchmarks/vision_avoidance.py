@@ -0,0 +1,152 @@
+"""
+Detection-to-avoidance latency on recorded footage
+
+Replays a video or image directory as the drone's camera while the drone
+flies forward (+X), and times every stage from frame capture to a new
+obstacle-free path:
+
+    read     decode the next frame
+    detect   edge check + contour localization (utils/vision_pipeline.analyze_frame)
+    map      bearing/range -> world coordinates -> PathPlanner.add_obstacles
+    replan   A* from the current position to a goal ahead (only when new cells were mapped)
+
+    python -m benchmarks.vision_avoidance --source flight.mp4 --frames 100 --out avoid.json
+
+Without --source, synthetic footage of an obstacle growing as it gets closer
+is generated, so the benchmark runs anywhere.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from utils.path_planner import PathPlanner
+from utils.vision_pipeline import OBSTACLE_SIZE, analyze_frame, obstacles_to_world, open_source
+
+STAGES = ("read", "detect", "map", "replan")
+
+
+def synthetic_footage(directory: str, frames: int = 60, width: int = 1280, height: int = 720):
+    """Frames of a textured obstacle ahead and slightly right, approaching from 60 m to 8 m"""
+    focal = (width / 2) / np.tan(np.radians(30))
+    for i in range(frames):
+        distance = 60 - 52 * i / max(1, frames - 1)
+        size = int(OBSTACLE_SIZE * focal / distance)
+        frame = np.full((height, width, 3), (150, 140, 120), np.uint8)
+        cx = width // 2 + int(3.0 * focal / distance)  # 3 m right of the flight line
+        top, left = height // 2 - size // 2, cx - size // 2
+        cv2.rectangle(frame, (left, top), (left + size, top + size), (40, 40, 40), -1)
+        # Textured face (windows, foliage): enough edges to pass the obstacle check up close
+        rows, cols = np.indices((size, size)) // max(2, size // 24)
+        face = frame[top:top + size, left:left + size]
+        face[((rows + cols) % 2 == 1)[:face.shape[0], :face.shape[1]]] = (200, 200, 200)
+        cv2.imwrite(os.path.join(directory, f"frame_{i:04d}.png"), frame)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def summarize(samples) -> dict:
+    if not samples:
+        return {"count": 0}
+    ms = [s * 1000 for s in samples]
+    return {"count": len(ms), "mean": statistics.fmean(ms), "p50": percentile(ms, 50),
+            "p95": percentile(ms, 95), "max": max(ms)}
+
+
+def run(source: str, frames: int, fps: float, speed: float, altitude: float, lookahead: float) -> dict:
+    reader = open_source(source)
+    if not reader.is_opened():
+        raise RuntimeError(f"Cannot open {source}")
+    planner = PathPlanner()
+    timings = {stage: [] for stage in STAGES}
+    totals = []
+    detections = blocked_paths = 0
+    position = np.array([0.0, 0.0, altitude])
+    try:
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            frame = reader.read()
+            if frame is None:
+                break
+            t1 = time.perf_counter()
+            result = analyze_frame(frame)
+            t2 = time.perf_counter()
+            added = 0
+            # Same gate as tools/vision_tools.py: only frames that pass the obstacle check are mapped
+            if result["obstacle_detected"] and result["obstacles"]:
+                detections += 1
+                added = planner.add_obstacles(obstacles_to_world(result["obstacles"], position))
+            t3 = time.perf_counter()
+            if added:
+                goal = (position[0] + lookahead, position[1], position[2])
+                path = planner.plan_path(tuple(position), goal)
+                t4 = time.perf_counter()
+                if any(planner.is_obstacle(*waypoint) for waypoint in path[1:]):
+                    blocked_paths += 1
+                timings["replan"].append(t4 - t3)
+                totals.append(t4 - t0)
+            for stage, duration in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2)):
+                timings[stage].append(duration)
+            position[0] += speed / fps
+    finally:
+        reader.release()
+
+    return {
+        "benchmark": "vision_avoidance",
+        "config": {"source": source, "frames": frames, "fps": fps, "speed_mps": speed,
+                   "altitude_m": altitude, "lookahead_m": lookahead},
+        "frames": len(timings["read"]),
+        "frames_with_obstacles": detections,
+        "replans": len(timings["replan"]),
+        "paths_through_obstacles": blocked_paths,
+        "obstacle_cells": len(planner.obstacles),
+        "stages_ms": {stage: summarize(samples) for stage, samples in timings.items()},
+        # Capture to avoiding path, for frames that changed the map
+        "detection_to_avoidance_ms": summarize(totals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision detection-to-avoidance latency")
+    parser.add_argument("--source", help="video file or image directory (default: synthetic footage)")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--fps", type=float, default=10.0, help="frame rate the footage was recorded at")
+    parser.add_argument("--speed", type=float, default=5.0, help="drone ground speed (m/s)")
+    parser.add_argument("--altitude", type=float, default=20.0)
+    parser.add_argument("--lookahead", type=float, default=60.0, help="replanning goal distance (m)")
+    parser.add_argument("--out", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.source
+        if source is None:
+            synthetic_footage(tmp, args.frames)
+            source = tmp
+        report = run(source, args.frames, args.fps, args.speed, args.altitude, args.lookahead)
+
+    print(f"{report['frames']} frames, {report['frames_with_obstacles']} with obstacles, "
+          f"{report['replans']} replans, {report['obstacle_cells']} cells mapped")
+    print(f"{'stage':<9} {'p50 ms':>9} {'p95 ms':>9}")
+    rows = list(report["stages_ms"].items()) + [("total", report["detection_to_avoidance_ms"])]
+    for stage, s in rows:
+        if s["count"]:
+            print(f"{stage:<9} {s['p50']:>9.2f} {s['p95']:>9.2f}")
+    if report["paths_through_obstacles"]:
+        print(f"  {report['paths_through_obstacles']} planned paths still crossed mapped obstacles")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,55 @@
-from faster_whisper import WhisperModel
+"""
+Transcribe recorded audio with faster-whisper
+
+    python fast_wishper.py                                   # audio.mp3, printed
+    python fast_wishper.py logs/ --out transcripts.jsonl --workers 2
+    python fast_wishper.py manifest.jsonl --out transcripts.jsonl
+
+A directory or manifest is transcribed in bulk (speech/batch.py): results are
+streamed to the JSONL file and throughput is reported in audio-hours per
+wall-hour. Re-running with the same --out skips files already transcribed.
+"""
+import argparse
+
+from speech.batch import find_audio, transcribe_files
+from speech.models import get_whisper_model
 
 model_size = "small.en"
 
-model = WhisperModel (model_size, device="cpu", compute_type="float32")
 
-segments, _ = model.transcribe("audio.mp3", language="en", beam_size=5)
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe audio files with faster-whisper")
+    parser.add_argument("source", nargs="?", default="audio.mp3",
+                        help="audio file, directory, or manifest (.jsonl / .txt)")
+    parser.add_argument("--out", help="JSONL output (required for directories and manifests)")
+    parser.add_argument("--workers", type=int, default=2, help="files transcribed in parallel")
+    parser.add_argument("--model", default=model_size)
+    parser.add_argument("--compute-type", help="default: WHISPER_COMPUTE_TYPE or int8")
+    parser.add_argument("--cpu-threads", type=int, help="threads per worker (default: cores / workers)")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--no-vad", action="store_true", help="also decode silence")
+    parser.add_argument("--restart", action="store_true", help="overwrite --out instead of resuming")
+    args = parser.parse_args()
+
+    if not args.out:
+        # Single file: print the segments as they are decoded
+        model = get_whisper_model(args.model, args.compute_type, cpu_threads=args.cpu_threads)
+        segments, _ = model.transcribe(args.source, language="en", beam_size=args.beam_size,
+                                       vad_filter=not args.no_vad)
+        for segment in segments:
+            print(segment.text)
+        return
+
+    paths = find_audio(args.source)
+    print(f"Transcribing {len(paths)} files with {args.workers} workers -> {args.out}")
+    stats = transcribe_files(paths, args.out, workers=args.workers, size=args.model,
+                             compute_type=args.compute_type, cpu_threads=args.cpu_threads,
+                             beam_size=args.beam_size, vad_filter=not args.no_vad,
+                             resume=not args.restart)
+    print(f"Done: {stats['files']} files ({stats['skipped']} skipped, {stats['errors']} errors), "
+          f"{stats['audio_seconds'] / 3600:.2f} h of audio in {stats['wall_seconds'] / 60:.1f} min "
+          f"= {stats['audio_hours_per_hour']:.1f} audio-hours per hour")
+
 
-for segment in segments:
-    print(segment.text)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,41 @@
+"""
+Ollama latency and throughput benchmark
+
+    python latency_test.py                          # one request, generation stats
+    python latency_test.py --sweep 1,2,4,8 --requests 16 --models phi3-fast,phi3:mini --out sweep.csv
+    python latency_test.py --sweep 1,4,16 --mock    # against benchmarks/mock_llm.py
+
+The sweep streams the agent's own prompt (SYSTEM_PROMPT + a mission command)
+through the same payload as llm/ollama_client.py at each concurrency level and
+reports time to first token, end-to-end latency, queueing delay (time the
+request spent waiting before Ollama started on it), aggregate tokens/sec and
+error rate per model. --out writes CSV or JSON (by extension).
+"""
+import argparse
+import csv
+import os
+import statistics
+import threading
 import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # --- CONFIGURATION ---
 # We use the optimized model we just created
 MODEL = "phi3-fast" 
 PROMPT = "Write a Python function to calculate the Fibonacci sequence recursively."
+URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 
-def test_latency():
-    url = "http://localhost:11434/api/generate"
+# Commands cycled through by the sweep (same prompt format as main_fallback.py)
+SWEEP_COMMANDS = [
+    "take off to 20 meters",
+    "fly forward 30 meters then check the battery",
+    "deliver the parcel to 50, 30, 10",
+    "return to base and land",
+]
+
+def test_latency(url: str = URL):
     headers = {"Content-Type": "application/json"}
     
     # We disable streaming to get the full timing stats in one packet
@@ -19,7 +46,7 @@ def test_latency():
     }
 
     print(f"--- 🚀 Testing Model: {MODEL} ---")
-    print("Sending request to Gemini API...")
+    print("Sending request to Ollama (localhost:11434)...")
     
     start_wall_time = time.time()
     try:
@@ -29,7 +56,7 @@ def test_latency():
         if response.status_code == 200:
             result = response.json()
             
-            # Gemini API returns timing in nanoseconds (ns)
+            # Ollama returns timing in nanoseconds (ns)
             total_duration_ns = result.get("total_duration", 0)
             load_duration_ns = result.get("load_duration", 0)
             eval_count = result.get("eval_count", 0)       # Number of tokens generated
@@ -60,8 +87,182 @@ def test_latency():
             print(f"Error: {response.status_code} - {response.text}")
             
     except requests.exceptions.ConnectionError:
-        print("\n❌ Error: Could not connect to Gemini API.")
-        print("Make sure your GEMINI_API_KEY is set in the .env file")
+        print("\n❌ Error: Could not connect to Ollama.")
+        print("Make sure Ollama is running (ollama serve) and the model is created from the Modelfile")
+
+
+
+# --- CONCURRENCY SWEEP ---
+
+def percentile(samples, q: float):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def stream_request(session: requests.Session, url: str, model: str, prompt: str,
+                   system: str, timeout: float) -> dict:
+    """One streamed generation with client-side timings and Ollama's own stats"""
+    from llm.ollama_client import _build_payload  # same options / keep_alive as the agent
+
+    payload = _build_payload(prompt, model, stream=True, system=system)
+    start = time.perf_counter()
+    result = {"model": model, "ok": False, "ttft": None, "latency": None, "queue": None,
+              "eval_count": 0, "eval_duration": 0.0, "error": ""}
+    try:
+        with session.post(url, json=payload, stream=True, timeout=timeout) as resp:
+            if resp.status_code != 200:
+                result["error"] = f"HTTP {resp.status_code}"
+                return result
+            final = None
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    result["error"] = data["error"]
+                    return result
+                if data.get("response") and result["ttft"] is None:
+                    result["ttft"] = time.perf_counter() - start
+                if data.get("done"):
+                    final = data
+                    break
+    except (requests.RequestException, ValueError) as e:
+        result["error"] = type(e).__name__
+        return result
+
+    result["latency"] = time.perf_counter() - start
+    if final is None:
+        result["error"] = "stream ended without final stats"
+        return result
+    result["ok"] = True
+    result["eval_count"] = final.get("eval_count", 0)
+    result["eval_duration"] = final.get("eval_duration", 0) / 1e9
+    # Ollama's total_duration starts when it picks the request up: the rest is queueing + network
+    result["queue"] = max(0.0, result["latency"] - final.get("total_duration", 0) / 1e9)
+    return result
+
+
+def run_level(url: str, model: str, concurrency: int, requests_per_level: int,
+              system: str, timeout: float) -> dict:
+    """Send requests_per_level prompts with `concurrency` in flight at a time"""
+    local = threading.local()
+    sessions = []
+
+    def worker(i: int) -> dict:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            sessions.append(local.session)
+        command = SWEEP_COMMANDS[i % len(SWEEP_COMMANDS)]
+        return stream_request(local.session, url, model, f"User: {command}\nAgent:", system, timeout)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(requests_per_level)))
+    wall = time.perf_counter() - start
+    for session in sessions:
+        session.close()
+
+    ok = [r for r in results if r["ok"]]
+    tokens = sum(r["eval_count"] for r in ok)
+    decode_rates = [r["eval_count"] / r["eval_duration"] for r in ok if r["eval_duration"] > 0]
+    ms = lambda values, q: None if percentile(values, q) is None else percentile(values, q) * 1000
+    ttft = [r["ttft"] for r in ok if r["ttft"] is not None]
+    latency = [r["latency"] for r in ok]
+    queue = [r["queue"] for r in ok]
+    return {
+        "model": model,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "error_rate": (len(results) - len(ok)) / len(results) if results else 0.0,
+        "wall_s": wall,
+        "requests_per_s": len(ok) / wall if wall else 0.0,
+        "tokens_per_s": tokens / wall if wall else 0.0,
+        "decode_tokens_per_s": statistics.fmean(decode_rates) if decode_rates else None,
+        "ttft_p50_ms": ms(ttft, 50),
+        "ttft_p95_ms": ms(ttft, 95),
+        "latency_p50_ms": ms(latency, 50),
+        "latency_p95_ms": ms(latency, 95),
+        "latency_p99_ms": ms(latency, 99),
+        "queue_p50_ms": ms(queue, 50),
+        "queue_p95_ms": ms(queue, 95),
+        "error_samples": sorted({r["error"] for r in results if r["error"]})[:3],
+    }
+
+
+def sweep(url: str, models, levels, requests_per_level: int, timeout: float = 120.0):
+    from config.agent_config import SYSTEM_PROMPT
+
+    rows = []
+    for model in models:
+        # Load the model (and its prompt prefix) so the first level isn't charged for it
+        warm = stream_request(requests.Session(), url, model, "User: check battery\nAgent:",
+                              SYSTEM_PROMPT, timeout)
+        if not warm["ok"]:
+            print(f"⚠️  {model}: warm-up failed ({warm['error']})")
+        for concurrency in levels:
+            row = run_level(url, model, concurrency, max(requests_per_level, concurrency),
+                            SYSTEM_PROMPT, timeout)
+            rows.append(row)
+            fmt = lambda v, spec: "-" if v is None else format(v, spec)
+            print(f"{model:<16} c={concurrency:<3} {row['requests_per_s']:6.2f} req/s "
+                  f"{row['tokens_per_s']:7.1f} tok/s  "
+                  f"TTFT p50 {fmt(row['ttft_p50_ms'], '.0f')} ms  "
+                  f"p95 latency {fmt(row['latency_p95_ms'], '.0f')} ms  "
+                  f"queue p50 {fmt(row['queue_p50_ms'], '.0f')} ms  "
+                  f"errors {row['error_rate']:.0%}")
+    return rows
+
+
+def write_report(rows, path: str, config: dict):
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            json.dump({"config": config, "results": rows}, f, indent=2)
+    else:
+        fields = [key for key in rows[0] if key != "error_samples"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+    print(f"📄 Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama latency / throughput benchmark")
+    parser.add_argument("--url", default=URL)
+    parser.add_argument("--sweep", help="comma-separated concurrency levels, e.g. 1,2,4,8")
+    parser.add_argument("--models", default=MODEL, help="comma-separated models to compare")
+    parser.add_argument("--requests", type=int, default=16, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--mock", action="store_true", help="run against an in-process mock LLM")
+    parser.add_argument("--out", help="write the sweep report (.csv or .json)")
+    args = parser.parse_args()
+
+    if not args.sweep:
+        test_latency(args.url)
+        return
+
+    url = args.url
+    mock = None
+    if args.mock:
+        from benchmarks.mock_llm import MockLLMServer
+        mock = MockLLMServer(latency=0.2, tokens_per_sec=40, max_parallel=1)
+        url = mock.start()
+
+    levels = [int(level) for level in args.sweep.split(",")]
+    models = [model.strip() for model in args.models.split(",") if model.strip()]
+    print(f"--- 🚀 Concurrency sweep {levels} on {', '.join(models)} ({url}) ---")
+    try:
+        rows = sweep(url, models, levels, args.requests, args.timeout)
+    finally:
+        if mock is not None:
+            mock.stop()
+    if args.out and rows:
+        write_report(rows, args.out, {"url": url, "models": models, "levels": levels,
+                                      "requests_per_level": args.requests})
+
 
 if __name__ == "__main__":
-    test_latency()
\ No newline at end of file
+    main()
\ No newline at end of file
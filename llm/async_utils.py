@@ -0,0 +1,25 @@
+import asyncio
+import weakref
+
+
+class LoopLocal:
+    """Lazily create one object per running event loop.
+
+    asyncio primitives and async HTTP clients are bound to the loop they were
+    first used on, so shared instances are kept per loop rather than globally.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._values = weakref.WeakKeyDictionary()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        value = self._values.get(loop)
+        if value is None:
+            value = self._values[loop] = self._factory()
+        return value
+
+    def pop(self):
+        """Remove and return the current loop's object (None if never created)"""
+        return self._values.pop(asyncio.get_running_loop(), None)
@@ -1,7 +1,21 @@
 from google import genai
+from google.genai import types
 import os
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
+from llm.async_utils import LoopLocal
+from llm.rate_limiter import RateLimitedError, get_scheduler, parse_retry_after
+from llm.token_accounting import estimate_tokens, get_token_ledger
+from utils.logger import get_logger
+
+logger = get_logger("GeminiClient")
+
 # Load environment variables
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -12,16 +26,353 @@ if not GEMINI_API_KEY:
 # Initialize Gemini client
 client = genai.Client(api_key=GEMINI_API_KEY)
 MODEL_NAME = "gemini-2.0-flash"  # Using the latest stable Gemini model
+# Max in-flight async requests per event loop
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+# Explicit context caching of the static system prompt (set GEMINI_CONTEXT_CACHE=0 to disable)
+CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "1") != "0"
+CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))  # seconds the server keeps the cache
+CACHE_RETRY = 600  # seconds before retrying cache creation after a failure
+
+# Project quota for MODEL_NAME, enforced client side by llm/rate_limiter.py (0 disables)
+RPM_LIMIT = float(os.getenv("GEMINI_RPM", "15"))
+TPM_LIMIT = float(os.getenv("GEMINI_TPM", "1000000"))
+# Output tokens budgeted per request when checking the token quota
+OUTPUT_ALLOWANCE = 256
+
+get_scheduler().configure(MODEL_NAME, RPM_LIMIT, TPM_LIMIT or None)
+
+_async_limits = LoopLocal(lambda: asyncio.Semaphore(MAX_CONCURRENCY))
+
+# sha256(system prompt + tool schemas) -> (cached content name or None if creation failed, valid until)
+_context_caches = {}
+_context_lock = threading.Lock()
+# sha256(...) -> [types.Tool] built from the tool schemas
+_declarations = {}
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    return getattr(e, "code", None) == 429
+
+
+def _api_error(e: Exception) -> RuntimeError:
+    """RuntimeError for a failed call; RateLimitedError when the quota is exhausted (429)"""
+    if _is_rate_limited(e):
+        return RateLimitedError(f"Gemini quota exhausted: {e}", retry_after=parse_retry_after(str(e)))
+    return RuntimeError(f"Error querying Gemini API: {str(e)}")
+
+
+def estimate_request_tokens(prompt: str, system: Optional[str] = None,
+                            tools: Optional[List[dict]] = None) -> int:
+    """Tokens a request counts against the TPM quota (cached prefix included)"""
+    text = (system or "") + prompt + (json.dumps(tools) if tools else "")
+    return estimate_tokens(text) + OUTPUT_ALLOWANCE
+
+
+def _cache_key(system: str, tools: Optional[List[dict]]) -> str:
+    material = system + (json.dumps(tools, sort_keys=True) if tools else "")
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _tool_declarations(key: str, tools: List[dict]) -> List[types.Tool]:
+    """Gemini function declarations for registry schemas (tools/registry.py)"""
+    declarations = _declarations.get(key)
+    if declarations is None:
+        declarations = [types.Tool(function_declarations=[
+            types.FunctionDeclaration(
+                name=tool["name"],
+                description=tool["description"],
+                # Tools without arguments must not send an empty object schema
+                parameters=tool["parameters"] if tool["parameters"]["properties"] else None,
+            )
+            for tool in tools
+        ])]
+        _declarations[key] = declarations
+    return declarations
+
+
+def _fresh_cache_entry(key: str):
+    entry = _context_caches.get(key)
+    if entry is not None and entry[1] > time.monotonic():
+        return entry
+    return None
+
+
+def _cached_content(system: str, tools: Optional[List[dict]] = None) -> Optional[str]:
+    """Name of a server-side context cache holding system (and tools), created on demand.
+
+    Returns None when explicit caching isn't available (prompt below the
+    model's minimum cacheable size, unsupported model, quota); the system
+    prompt is then sent inline and creation is retried after CACHE_RETRY.
+    """
+    key = _cache_key(system, tools)
+    entry = _fresh_cache_entry(key)
+    if entry is not None:
+        return entry[0]
+
+    with _context_lock:
+        entry = _fresh_cache_entry(key)
+        if entry is not None:
+            return entry[0]
+        try:
+            cache = client.caches.create(
+                model=MODEL_NAME,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system,
+                    tools=_tool_declarations(key, tools) if tools else None,
+                    ttl=f"{CACHE_TTL}s",
+                    display_name=f"system-{key[:12]}",
+                ),
+            )
+            # Stop using it a minute before the server expires it
+            entry = (cache.name, time.monotonic() + max(CACHE_TTL - 60, 1))
+            logger.info(f"Created Gemini context cache {cache.name}")
+        except Exception as e:
+            logger.warning(f"Gemini context caching unavailable, sending system prompt inline: {e}")
+            entry = (None, time.monotonic() + CACHE_RETRY)
+        _context_caches[key] = entry
+    return entry[0]
+
+
+def _forget_cached_content(system: str, tools: Optional[List[dict]] = None):
+    with _context_lock:
+        _context_caches.pop(_cache_key(system, tools), None)
+
+
+def _generate_config(system: Optional[str], tools: Optional[List[dict]] = None,
+                     use_cache: bool = True) -> Optional[types.GenerateContentConfig]:
+    if system is None and not tools:
+        return None
+    system = system or ""
+    name = _cached_content(system, tools) if CONTEXT_CACHE and use_cache else None
+    if name:
+        # System prompt and tool declarations live in the cache
+        return types.GenerateContentConfig(cached_content=name)
+    key = _cache_key(system, tools)
+    return types.GenerateContentConfig(
+        system_instruction=system or None,
+        tools=_tool_declarations(key, tools) if tools else None,
+    )
+
+
+async def _agenerate_config(system: Optional[str], tools: Optional[List[dict]] = None):
+    if ((system is not None or tools) and CONTEXT_CACHE
+            and _fresh_cache_entry(_cache_key(system or "", tools)) is None):
+        # Cache creation is a blocking API call: keep it off the event loop
+        await asyncio.to_thread(_cached_content, system or "", tools)
+    return _generate_config(system, tools)
+
+
+def _uses_cache(config) -> bool:
+    return config is not None and config.cached_content is not None
+
 
+def _record_usage(usage, prompt: str, system: Optional[str], output: str, start: float):
+    latency = time.perf_counter() - start
+    if usage is not None and usage.prompt_token_count:
+        get_token_ledger().record("gemini", MODEL_NAME, usage.prompt_token_count,
+                                  usage.cached_content_token_count or 0,
+                                  usage.candidates_token_count or 0, latency)
+    else:
+        get_token_ledger().record("gemini", MODEL_NAME, estimate_tokens((system or "") + prompt),
+                                  0, estimate_tokens(output), latency)
 
-def query_llm(prompt: str) -> str:
-    """Query the Gemini API with the given prompt."""
+
+def _function_calls(chunk) -> List[dict]:
+    """Native function calls in a response chunk as [{"tool", "args"}]"""
+    return [{"tool": call.name, "args": dict(call.args or {})} for call in chunk.function_calls or []]
+
+
+def _as_tool_call(calls: List[dict]) -> Optional[dict]:
+    """One call as-is; several calls in one response become an ordered plan"""
+    if not calls:
+        return None
+    if len(calls) == 1:
+        return calls[0]
+    return {"plan": calls}
+
+
+def query_llm(prompt: str, system: Optional[str] = None) -> str:
+    """Query the Gemini API with the given prompt.
+
+    system: static instructions sent separately from the prompt, served from
+    a server-side context cache when possible.
+    """
+    start = time.perf_counter()
+    config = _generate_config(system)
+    try:
+        try:
+            response = client.models.generate_content(model=MODEL_NAME, contents=prompt, config=config)
+        except Exception as e:
+            if not _uses_cache(config) or _is_rate_limited(e):
+                raise
+            # Cache expired or was deleted server-side: send the system prompt inline
+            _forget_cached_content(system)
+            config = _generate_config(system, use_cache=False)
+            response = client.models.generate_content(model=MODEL_NAME, contents=prompt, config=config)
+    except Exception as e:
+        raise _api_error(e)
+
+    _record_usage(response.usage_metadata, prompt, system, response.text or "", start)
+    return response.text
+
+
+def _stream_chunks(prompt: str, system: Optional[str], tools: Optional[List[dict]]):
+    """Raw response chunks, with cache fallback and usage accounting"""
+    start = time.perf_counter()
+    config = _generate_config(system, tools)
+    usage = None
+    output = []
+    failed = False
+    stream = None
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt
-        )
-        
-        return response.text
+        stream = client.models.generate_content_stream(model=MODEL_NAME, contents=prompt, config=config)
+        try:
+            first = next(stream, None)
+        except Exception as e:
+            if not _uses_cache(config) or _is_rate_limited(e):
+                raise
+            # Cache expired or was deleted server-side: send the system prompt inline
+            _forget_cached_content(system or "", tools)
+            config = _generate_config(system, tools, use_cache=False)
+            stream = client.models.generate_content_stream(model=MODEL_NAME, contents=prompt, config=config)
+            first = next(stream, None)
+
+        chunk = first
+        while chunk is not None:
+            usage = chunk.usage_metadata or usage
+            if chunk.text:
+                output.append(chunk.text)
+            yield chunk
+            chunk = next(stream, None)
     except Exception as e:
-        raise RuntimeError(f"Error querying Gemini API: {str(e)}")
+        failed = True
+        raise _api_error(e)
+    finally:
+        # Also runs when the caller stops early
+        if stream is not None:
+            stream.close()
+        if not failed:
+            _record_usage(usage, prompt, system, "".join(output), start)
+
+
+def stream_llm(prompt: str, system: Optional[str] = None) -> Iterator[str]:
+    """Query the Gemini API, yielding response text chunks as they arrive."""
+    chunks = _stream_chunks(prompt, system, None)
+    try:
+        for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+    finally:
+        chunks.close()
+
+
+def query_tool_call(prompt: str, tools: List[dict], system: Optional[str] = None,
+                    first_call: bool = False) -> Tuple[Optional[dict], str]:
+    """Query Gemini with native function calling.
+
+    tools: schemas from tools.registry.ToolRegistry.schemas().
+    Returns (tool call or None, response text). A response with several
+    function calls is returned as a plan, {"plan": [{"tool", "args"}, ...]},
+    for tools.plan_executor.execute_plan.
+    first_call: return as soon as a chunk carrying function calls arrives and
+    drop the rest of the stream (Gemini sends parallel calls in one chunk).
+    """
+    text = []
+    calls = []
+    chunks = _stream_chunks(prompt, system, tools)
+    try:
+        for chunk in chunks:
+            calls.extend(_function_calls(chunk))
+            if chunk.text:
+                text.append(chunk.text)
+            if first_call and calls:
+                break
+    finally:
+        chunks.close()
+    return _as_tool_call(calls), "".join(text)
+
+
+async def aquery_llm(prompt: str, system: Optional[str] = None) -> str:
+    """Async query_llm. At most MAX_CONCURRENCY requests run at once; cancellation aborts the call."""
+    start = time.perf_counter()
+    async with _async_limits.get():
+        config = await _agenerate_config(system)
+        try:
+            try:
+                response = await client.aio.models.generate_content(
+                    model=MODEL_NAME, contents=prompt, config=config)
+            except Exception as e:
+                if not _uses_cache(config) or _is_rate_limited(e):
+                    raise
+                _forget_cached_content(system)
+                config = _generate_config(system, use_cache=False)
+                response = await client.aio.models.generate_content(
+                    model=MODEL_NAME, contents=prompt, config=config)
+        except Exception as e:
+            raise _api_error(e)
+
+    _record_usage(response.usage_metadata, prompt, system, response.text or "", start)
+    return response.text
+
+
+async def _astream_chunks(prompt: str, system: Optional[str], tools: Optional[List[dict]]):
+    """Async _stream_chunks"""
+    start = time.perf_counter()
+    usage = None
+    output = []
+    failed = False
+    async with _async_limits.get():
+        config = await _agenerate_config(system, tools)
+        try:
+            try:
+                stream = await client.aio.models.generate_content_stream(
+                    model=MODEL_NAME, contents=prompt, config=config)
+            except Exception as e:
+                if not _uses_cache(config) or _is_rate_limited(e):
+                    raise
+                _forget_cached_content(system or "", tools)
+                config = _generate_config(system, tools, use_cache=False)
+                stream = await client.aio.models.generate_content_stream(
+                    model=MODEL_NAME, contents=prompt, config=config)
+
+            async for chunk in stream:
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    output.append(chunk.text)
+                yield chunk
+        except Exception as e:
+            failed = True
+            raise _api_error(e)
+        finally:
+            if not failed:
+                _record_usage(usage, prompt, system, "".join(output), start)
+
+
+async def astream_llm(prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+    """Async stream_llm: yields response text chunks as they arrive."""
+    chunks = _astream_chunks(prompt, system, None)
+    try:
+        async for chunk in chunks:
+            if chunk.text:
+                yield chunk.text
+    finally:
+        await chunks.aclose()
+
+
+async def aquery_tool_call(prompt: str, tools: List[dict], system: Optional[str] = None,
+                           first_call: bool = False) -> Tuple[Optional[dict], str]:
+    """Async query_tool_call"""
+    text = []
+    calls = []
+    chunks = _astream_chunks(prompt, system, tools)
+    try:
+        async for chunk in chunks:
+            calls.extend(_function_calls(chunk))
+            if chunk.text:
+                text.append(chunk.text)
+            if first_call and calls:
+                break
+    finally:
+        await chunks.aclose()
+    return _as_tool_call(calls), "".join(text)
@@ -1,46 +1,163 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import httpx
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from llm.async_utils import LoopLocal
+from llm.token_accounting import estimate_tokens, get_token_ledger
 
 # Simple Ollama client that talks to a local Ollama HTTP API (default port 11434).
 # Model used as a fallback: phi3-fast:latest
 
-OLLY_URL = "http://localhost:11434/api/generate"
+OLLY_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+# Chat endpoint, used for native tool calling
+OLLAMA_CHAT_URL = os.getenv("OLLAMA_CHAT_URL", OLLY_URL.rsplit("/api/", 1)[0] + "/api/chat")
 DEFAULT_MODEL = "phi3-fast:latest"
 
+# Connection pool / retry tuning (overridable via environment)
+POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "2"))
+BACKOFF_FACTOR = float(os.getenv("OLLAMA_BACKOFF_FACTOR", "0.2"))
+# Max in-flight async requests per event loop (Ollama serialises generation anyway)
+MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+# How long Ollama keeps the model (and its KV cache of the shared system prompt) loaded
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+_session = None
+_session_lock = threading.RLock()
+
+# Models that rejected the 'tools' field; they only get JSON-in-prompt requests
+_no_tool_models = set()
+
+
+class ToolsUnsupportedError(RuntimeError):
+    """The model has no native tool calling (e.g. phi3): use a prompt with the JSON tool format"""
 
-def query_ollama(prompt: str, model: str = DEFAULT_MODEL, timeout: int = 30) -> str:
-    """Query a local Ollama server. Returns text output on success or raises RuntimeError.
 
-    Note: Ollama typically streams responses; this implementation requests synchronously
-    and returns whatever text the server provides. Ensure Ollama is running locally.
+def configure_session(pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES,
+                      backoff_factor: float = BACKOFF_FACTOR) -> requests.Session:
+    """(Re)create the shared keep-alive session used by query_ollama.
+
+    pool_size: connections kept open per host (concurrent requests beyond this
+    open short-lived extra connections instead of blocking).
+    max_retries: retries on connection errors and 429/5xx responses, with
+    exponential backoff (backoff_factor * 2^n seconds). Read timeouts are not
+    retried, since a slow generation would only get slower.
     """
+    global _session
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=0,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    with _session_lock:
+        old, _session = _session, session
+    if old is not None:
+        old.close()
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get or create the shared Ollama HTTP session"""
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                configure_session()
+    return _session
+
+
+def get_connection_stats() -> dict:
+    """Connection reuse metrics for the shared session"""
+    stats = {"requests": 0, "connections_opened": 0}
+    if _session is not None:
+        pools = _session.get_adapter(OLLY_URL).poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                stats["requests"] += pool.num_requests
+                stats["connections_opened"] += pool.num_connections
+    stats["connections_reused"] = max(0, stats["requests"] - stats["connections_opened"])
+    stats["reuse_ratio"] = stats["connections_reused"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
+
+
+def _build_payload(prompt: str, model: str, stream: bool, system: Optional[str] = None) -> dict:
     payload = {
         "model": model,
         "prompt": prompt,
-        "max_tokens": 512,
-        "temperature": 0.2,
+        "stream": stream,
+        "keep_alive": KEEP_ALIVE,
+        "options": {"num_predict": 512, "temperature": 0.2},
     }
+    if system is not None:
+        # Sent separately so every request shares the same prefix, which Ollama
+        # keeps evaluated in the loaded model's KV cache between requests
+        payload["system"] = system
+    return payload
 
-    try:
-        resp = requests.post(OLLY_URL, json=payload, timeout=timeout)
-    except Exception as e:
-        raise RuntimeError(f"Error connecting to Ollama server: {e}")
 
-    if resp.status_code != 200:
-        # include body for easier debugging
-        raise RuntimeError(f"Ollama error {resp.status_code}: {resp.text}")
+def _build_chat_payload(prompt: str, model: str, tools: List[dict], system: Optional[str]) -> dict:
+    messages = []
+    if system is not None:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    return {
+        "model": model,
+        "messages": messages,
+        "tools": tools,
+        "stream": False,
+        "keep_alive": KEEP_ALIVE,
+        "options": {"num_predict": 512, "temperature": 0.2},
+    }
 
-    # Try to parse JSON responses first
-    content_type = resp.headers.get("Content-Type", "")
-    if "application/json" in content_type:
-        try:
-            data = resp.json()
-        except Exception:
-            return resp.text
 
+def _record_usage(data, model: str, prompt: str, system: Optional[str], output: str, start: float):
+    latency = time.perf_counter() - start
+    estimated = estimate_tokens((system or "") + prompt)
+    if isinstance(data, dict) and ("eval_count" in data or "prompt_eval_count" in data):
+        # Ollama counts only the prompt tokens it had to evaluate; the rest
+        # were reused from the cached prefix
+        evaluated = int(data.get("prompt_eval_count", 0))
+        input_tokens = max(estimated, evaluated)
+        get_token_ledger().record("ollama", model, input_tokens, input_tokens - evaluated,
+                                  data.get("eval_count", 0), latency)
+    else:
+        # Stream closed before the final stats line: estimate
+        get_token_ledger().record("ollama", model, estimated, 0, estimate_tokens(output), latency)
+
+
+def _response_data(resp):
+    """Parsed JSON body of a (requests or httpx) response, or None"""
+    if "application/json" not in resp.headers.get("Content-Type", ""):
+        return None
+    try:
+        return resp.json()
+    except Exception:
+        return None
+
+
+def _response_text(resp, data) -> str:
+    """Extract generated text from an Ollama response and its parsed JSON body"""
+    if data is not None:
         # Common sensible fallbacks for returned fields
         if isinstance(data, dict):
-            for key in ("text", "content", "output", "result"):
+            for key in ("response", "text", "content", "output", "result"):
                 if key in data and isinstance(data[key], (str, list)):
                     val = data[key]
                     if isinstance(val, list):
@@ -57,7 +174,239 @@ def query_ollama(prompt: str, model: str = DEFAULT_MODEL, timeout: int = 30) ->
                         parts.append(str(c))
                 return "".join(parts)
 
-        return resp.text
-
     # Fallback: return raw text
     return resp.text
+
+
+def query_ollama(prompt: str, model: str = DEFAULT_MODEL, timeout: int = 30,
+                 system: Optional[str] = None) -> str:
+    """Query a local Ollama server. Returns text output on success or raises RuntimeError.
+
+    Requests a single non-streamed response; see stream_ollama for token streaming.
+    system: static instructions sent separately from the prompt (kept warm by Ollama).
+    Ensure Ollama is running locally.
+    """
+    start = time.perf_counter()
+    payload = _build_payload(prompt, model, stream=False, system=system)
+
+    try:
+        resp = get_session().post(OLLY_URL, json=payload, timeout=timeout)
+    except Exception as e:
+        raise RuntimeError(f"Error connecting to Ollama server: {e}")
+
+    if resp.status_code != 200:
+        # include body for easier debugging
+        raise RuntimeError(f"Ollama error {resp.status_code}: {resp.text}")
+
+    data = _response_data(resp)
+    text = _response_text(resp, data)
+    _record_usage(data, model, prompt, system, text, start)
+    return text
+
+
+def stream_ollama(prompt: str, model: str = DEFAULT_MODEL, timeout: int = 30,
+                  system: Optional[str] = None) -> Iterator[str]:
+    """Query a local Ollama server, yielding response tokens as they arrive.
+
+    Ollama streams NDJSON lines ({"response": "...", "done": false}). Closing the
+    generator early closes the connection, which stops generation server-side.
+    """
+    start = time.perf_counter()
+    payload = _build_payload(prompt, model, stream=True, system=system)
+
+    try:
+        resp = get_session().post(OLLY_URL, json=payload, timeout=timeout, stream=True)
+    except Exception as e:
+        raise RuntimeError(f"Error connecting to Ollama server: {e}")
+
+    final = None  # last NDJSON line, carrying the token counts
+    output = []
+    failed = False
+    try:
+        if resp.status_code != 200:
+            raise RuntimeError(f"Ollama error {resp.status_code}: {resp.text}")
+
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                raise RuntimeError(f"Malformed Ollama stream line: {line[:200]!r}")
+            if data.get("error"):
+                raise RuntimeError(f"Ollama error: {data['error']}")
+            if data.get("response"):
+                output.append(data["response"])
+                yield data["response"]
+            if data.get("done"):
+                final = data
+                break
+    except requests.RequestException as e:
+        failed = True
+        raise RuntimeError(f"Error reading Ollama stream: {e}")
+    except RuntimeError:
+        failed = True
+        raise
+    finally:
+        resp.close()
+        if not failed:
+            _record_usage(final, model, prompt, system, "".join(output), start)
+
+
+def _chat_result(resp, model: str, prompt: str, system: Optional[str],
+                 start: float) -> Tuple[Optional[dict], str]:
+    """(tool call or None, text) from a (requests or httpx) /api/chat response"""
+    if resp.status_code != 200:
+        if resp.status_code == 400 and "does not support tools" in resp.text:
+            _no_tool_models.add(model)
+            raise ToolsUnsupportedError(f"Ollama model {model} does not support tools")
+        raise RuntimeError(f"Ollama error {resp.status_code}: {resp.text}")
+
+    data = _response_data(resp)
+    if not isinstance(data, dict):
+        raise RuntimeError(f"Malformed Ollama chat response: {resp.text[:200]!r}")
+    message = data.get("message") or {}
+    text = message.get("content") or ""
+
+    calls = []
+    for call in message.get("tool_calls") or []:
+        function = call.get("function") or {}
+        args = function.get("arguments") or {}
+        if isinstance(args, str):
+            try:
+                args = json.loads(args)
+            except ValueError:
+                raise RuntimeError(f"Malformed Ollama tool arguments: {args[:200]!r}")
+        calls.append({"tool": function.get("name"), "args": args})
+
+    # Several calls in one response form an ordered plan (tools/plan_executor.py)
+    tool_call = None
+    if len(calls) == 1:
+        tool_call = calls[0]
+    elif calls:
+        tool_call = {"plan": calls}
+
+    _record_usage(data, model, prompt, system, text, start)
+    return tool_call, text
+
+
+def chat_tool_call(prompt: str, tools: List[dict], model: str = DEFAULT_MODEL, timeout: int = 30,
+                   system: Optional[str] = None) -> Tuple[Optional[dict], str]:
+    """Query Ollama's /api/chat with native tool calling.
+
+    tools: schemas from tools.registry.ToolRegistry.ollama_tools().
+    Returns ({"tool": name, "args": {...}}, {"plan": [...]} for several calls,
+    or None; response text). Raises ToolsUnsupportedError for models without
+    tool support.
+    """
+    if model in _no_tool_models:
+        raise ToolsUnsupportedError(f"Ollama model {model} does not support tools")
+    start = time.perf_counter()
+    payload = _build_chat_payload(prompt, model, tools, system)
+
+    try:
+        resp = get_session().post(OLLAMA_CHAT_URL, json=payload, timeout=timeout)
+    except Exception as e:
+        raise RuntimeError(f"Error connecting to Ollama server: {e}")
+
+    return _chat_result(resp, model, prompt, system, start)
+
+
+# --- asyncio API -------------------------------------------------------------
+
+_async_clients = LoopLocal(lambda: httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+    transport=httpx.AsyncHTTPTransport(retries=MAX_RETRIES),
+))
+_async_limits = LoopLocal(lambda: asyncio.Semaphore(MAX_CONCURRENCY))
+
+
+async def aquery_ollama(prompt: str, model: str = DEFAULT_MODEL, timeout: float = 30,
+                        system: Optional[str] = None) -> str:
+    """Async query_ollama sharing one pooled httpx client per event loop.
+
+    At most MAX_CONCURRENCY requests run at once; others wait their turn.
+    Cancelling the awaiting task aborts the HTTP request.
+    """
+    start = time.perf_counter()
+    payload = _build_payload(prompt, model, stream=False, system=system)
+
+    async with _async_limits.get():
+        try:
+            resp = await _async_clients.get().post(OLLY_URL, json=payload, timeout=timeout)
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Error connecting to Ollama server: {e}")
+
+    if resp.status_code != 200:
+        raise RuntimeError(f"Ollama error {resp.status_code}: {resp.text}")
+
+    data = _response_data(resp)
+    text = _response_text(resp, data)
+    _record_usage(data, model, prompt, system, text, start)
+    return text
+
+
+async def astream_ollama(prompt: str, model: str = DEFAULT_MODEL, timeout: float = 30,
+                         system: Optional[str] = None) -> AsyncIterator[str]:
+    """Async stream_ollama: yields response tokens as they arrive"""
+    start = time.perf_counter()
+    payload = _build_payload(prompt, model, stream=True, system=system)
+    final = None
+    output = []
+    failed = False
+
+    async with _async_limits.get():
+        try:
+            async with _async_clients.get().stream("POST", OLLY_URL, json=payload, timeout=timeout) as resp:
+                if resp.status_code != 200:
+                    body = await resp.aread()
+                    raise RuntimeError(f"Ollama error {resp.status_code}: {body.decode(errors='replace')}")
+
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        raise RuntimeError(f"Malformed Ollama stream line: {line[:200]!r}")
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama error: {data['error']}")
+                    if data.get("response"):
+                        output.append(data["response"])
+                        yield data["response"]
+                    if data.get("done"):
+                        final = data
+                        break
+        except httpx.HTTPError as e:
+            failed = True
+            raise RuntimeError(f"Error reading Ollama stream: {e}")
+        except RuntimeError:
+            failed = True
+            raise
+        finally:
+            if not failed:
+                _record_usage(final, model, prompt, system, "".join(output), start)
+
+
+async def achat_tool_call(prompt: str, tools: List[dict], model: str = DEFAULT_MODEL,
+                          timeout: float = 30, system: Optional[str] = None) -> Tuple[Optional[dict], str]:
+    """Async chat_tool_call"""
+    if model in _no_tool_models:
+        raise ToolsUnsupportedError(f"Ollama model {model} does not support tools")
+    start = time.perf_counter()
+    payload = _build_chat_payload(prompt, model, tools, system)
+
+    async with _async_limits.get():
+        try:
+            resp = await _async_clients.get().post(OLLAMA_CHAT_URL, json=payload, timeout=timeout)
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Error connecting to Ollama server: {e}")
+
+    return _chat_result(resp, model, prompt, system, start)
+
+
+async def aclose_async_client():
+    """Close the current event loop's shared httpx client"""
+    client = _async_clients.pop()
+    if client is not None:
+        await client.aclose()
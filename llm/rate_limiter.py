@@ -0,0 +1,327 @@
+"""
+Client-side rate limiting for LLM quotas (requests and tokens per minute)
+
+Each model gets two token buckets, one for requests and one for tokens.
+A bucket holds `burst` units and refills at (limit - burst) per minute, so
+no 60 s window ever carries more than the quota. A request is only sent once
+both buckets can pay for it, so it never comes back as a guaranteed 429.
+
+Waiting requests queue per model in priority order (safety commands first)
+and identical requests already queued or in flight are coalesced onto one call:
+
+    scheduler = get_scheduler()
+    scheduler.configure("gemini-2.0-flash", rpm=15, tpm=1_000_000)
+    result = await scheduler.submit(lambda: aquery_llm(prompt), model="gemini-2.0-flash",
+                                    tokens=900, key=prompt, priority=PRIORITY_SAFETY)
+
+submit() raises RateLimitedError instead of queueing longer than max_wait,
+so a router can move on to a fallback provider right away.
+"""
+import asyncio
+import heapq
+import itertools
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from llm.async_utils import LoopLocal
+from llm.router import LatencyHistogram
+from utils.logger import get_logger
+
+logger = get_logger("RateLimiter")
+
+PRIORITY_SAFETY = 0  # land / return home / abort
+PRIORITY_NORMAL = 10
+
+# Fallback wait after a server-side 429 that carries no retry delay
+DEFAULT_RETRY_AFTER = 30.0
+
+_RETRY_DELAY_RE = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+
+
+class RateLimitedError(RuntimeError):
+    """Quota exhausted: the request was not sent (client side) or got a 429 (server side)"""
+
+    def __init__(self, message: str, retry_after: float = DEFAULT_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(text: str, default: float = DEFAULT_RETRY_AFTER) -> float:
+    """Seconds from a google.rpc.RetryInfo 'retryDelay' in an error message"""
+    match = _RETRY_DELAY_RE.search(text)
+    return float(match.group(1)) if match else default
+
+
+class TokenBucket:
+    """Holds up to `burst` units and refills so that at most `per_minute` pass in any minute"""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        if burst is None:
+            burst = max(1.0, per_minute / 5)
+        self.capacity = min(float(burst), float(per_minute))
+        self.rate = max(per_minute - self.capacity, 1e-9) / 60.0  # units per second
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        # A request bigger than the bucket goes through once the bucket is full
+        amount = min(amount, self.capacity)
+        wait = max(0.0, (amount - self.tokens) / self.rate)
+        return max(wait, self.blocked_until - now)
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def block(self, seconds: float):
+        """Refuse everything for `seconds` (server reported the quota exhausted)"""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self._refill(now)
+        self.tokens = 0.0
+
+
+class ModelQuota:
+    """Request and token buckets for one model, plus its metrics"""
+
+    def __init__(self, model: str, rpm: float, tpm: Optional[float] = None,
+                 burst: Optional[float] = None):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, burst)
+        self.tokens = TokenBucket(tpm, tpm * self.requests.capacity / rpm) if tpm else None
+        self.lock = threading.Lock()
+
+        self.wait_times = LatencyHistogram()
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.throttled = 0  # had to wait for the buckets
+        self.rejected = 0  # would have waited longer than max_wait
+        self.server_limited = 0  # 429s that got through anyway
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def wait_time(self, tokens: float) -> float:
+        now = time.monotonic()
+        wait = self.requests.wait_time(1, now)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def try_acquire(self, tokens: float) -> float:
+        """Take one request and `tokens` if available now (returns 0), else the seconds to wait"""
+        with self.lock:
+            wait = self.wait_time(tokens)
+            if wait <= 0:
+                self.requests.consume(1)
+                if self.tokens is not None:
+                    self.tokens.consume(tokens)
+                self.sent += 1
+            return wait
+
+    def block(self, seconds: float):
+        with self.lock:
+            self.requests.block(seconds)
+        logger.warning(f"{self.model} quota exhausted, holding requests for {seconds:.0f}s")
+
+    def stats(self) -> dict:
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "server_limited": self.server_limited,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "wait": self.wait_times.summary(),
+        }
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    ready: asyncio.Event = field(compare=False, default_factory=asyncio.Event)
+
+
+class _LoopState:
+    """Per-event-loop queues and in-flight calls (asyncio objects are loop-bound)"""
+
+    def __init__(self):
+        self.queues: Dict[str, list] = {}  # model -> heap of _Ticket
+        self.inflight: Dict[tuple, list] = {}  # (model, key) -> [task, waiters]
+
+
+class RateLimitScheduler:
+    """Admit LLM calls within per-model quotas, highest priority first"""
+
+    def __init__(self):
+        self.quotas: Dict[str, ModelQuota] = {}
+        self._seq = itertools.count()
+        self._state = LoopLocal(_LoopState)
+        self._lock = threading.Lock()
+
+    def configure(self, model: str, rpm: float, tpm: Optional[float] = None,
+                  burst: Optional[float] = None) -> ModelQuota:
+        """Set the quota for a model (rpm <= 0 removes the limit)"""
+        with self._lock:
+            if rpm <= 0:
+                self.quotas.pop(model, None)
+                return None
+            quota = self.quotas[model] = ModelQuota(model, rpm, tpm, burst)
+        return quota
+
+    async def submit(self, fn: Callable[[], Awaitable], model: str, tokens: float = 0,
+                     key: Optional[Hashable] = None, priority: int = PRIORITY_NORMAL,
+                     max_wait: Optional[float] = None):
+        """Run fn() once the model's quota allows; returns its result.
+
+        key: requests with the same key share one queued or in-flight call.
+        max_wait: raise RateLimitedError rather than queue longer than this.
+        Models without a configured quota run immediately.
+        """
+        quota = self.quotas.get(model)
+        if quota is None:
+            return await fn()
+        quota.submitted += 1
+        if key is None:
+            return await self._run(quota, fn, tokens, priority, max_wait)
+
+        state = self._state.get()
+        inflight_key = (model, key)
+        entry = state.inflight.get(inflight_key)
+        if entry is None:
+            task = asyncio.ensure_future(self._run(quota, fn, tokens, priority, max_wait))
+            entry = state.inflight[inflight_key] = [task, 0]
+            task.add_done_callback(
+                lambda _: state.inflight.pop(inflight_key, None) if state.inflight.get(inflight_key) is entry else None)
+        else:
+            quota.coalesced += 1
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            # Cancel the shared call only when nobody is waiting for it any more
+            entry[1] -= 1
+            if entry[1] == 0:
+                entry[0].cancel()
+            raise
+
+    async def _run(self, quota: ModelQuota, fn, tokens: float, priority: int,
+                   max_wait: Optional[float]):
+        await self._admit(quota, tokens, priority, max_wait)
+        try:
+            return await fn()
+        except RateLimitedError as e:
+            quota.server_limited += 1
+            quota.block(e.retry_after)
+            raise
+
+    async def _admit(self, quota: ModelQuota, tokens: float, priority: int,
+                     max_wait: Optional[float]):
+        queue = self._state.get().queues.setdefault(quota.model, [])
+        ticket = _Ticket(priority, next(self._seq))
+        heapq.heappush(queue, ticket)
+        quota.queue_depth = len(queue)
+        quota.max_queue_depth = max(quota.max_queue_depth, quota.queue_depth)
+        start = time.monotonic()
+        waited = admitted = False
+        try:
+            while True:
+                elapsed = time.monotonic() - start
+                if queue[0] is ticket:
+                    wait = quota.try_acquire(tokens)
+                    if wait <= 0:
+                        admitted = True
+                        break
+                    if max_wait is not None and elapsed + wait > max_wait:
+                        quota.rejected += 1
+                        raise RateLimitedError(
+                            f"{quota.model} quota: request would wait {elapsed + wait:.1f}s "
+                            f"(max {max_wait:g}s)", retry_after=wait)
+                    timeout = wait
+                else:
+                    timeout = None if max_wait is None else max_wait - elapsed
+                    if timeout is not None and timeout <= 0:
+                        quota.rejected += 1
+                        raise RateLimitedError(f"{quota.model} quota: queued longer than {max_wait:g}s")
+                waited = True
+                ticket.ready.clear()
+                try:
+                    await asyncio.wait_for(ticket.ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Leave the queue (admitted, rejected or cancelled) and wake the next in line
+            queue.remove(ticket)
+            heapq.heapify(queue)
+            quota.queue_depth = len(queue)
+            if queue:
+                queue[0].ready.set()
+            if admitted:
+                if waited:
+                    quota.throttled += 1
+                quota.wait_times.record(time.monotonic() - start)
+
+    def acquire(self, model: str, tokens: float = 0, max_wait: Optional[float] = None):
+        """Blocking admission for synchronous callers (no priority queue or coalescing)"""
+        quota = self.quotas.get(model)
+        if quota is None:
+            return
+        quota.submitted += 1
+        start = time.monotonic()
+        waited = False
+        while True:
+            wait = quota.try_acquire(tokens)
+            if wait <= 0:
+                break
+            elapsed = time.monotonic() - start
+            if max_wait is not None and elapsed + wait > max_wait:
+                quota.rejected += 1
+                raise RateLimitedError(
+                    f"{quota.model} quota: request would wait {elapsed + wait:.1f}s "
+                    f"(max {max_wait:g}s)", retry_after=wait)
+            waited = True
+            time.sleep(wait)
+        if waited:
+            quota.throttled += 1
+        quota.wait_times.record(time.monotonic() - start)
+
+    def report_rate_limited(self, model: str, retry_after: float = DEFAULT_RETRY_AFTER):
+        """Record a 429 from a call made outside submit() and hold the model's requests"""
+        quota = self.quotas.get(model)
+        if quota is not None:
+            quota.server_limited += 1
+            quota.block(retry_after)
+
+    def stats(self) -> dict:
+        return {model: quota.stats() for model, quota in self.quotas.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Get the process-wide scheduler (quotas are shared across threads and loops)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RateLimitScheduler()
+    return _scheduler
@@ -0,0 +1,175 @@
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger("ResponseCache")
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = re.compile(r"^[\s\"'`.,!?;:]+|[\s\"'`.,!?;:]+$")
+
+CACHE_FILE_VERSION = 1
+
+# Defaults, overridable from the environment. AGENT_CACHE_PATH enables persistence.
+CACHE_PATH = os.getenv("AGENT_CACHE_PATH") or None
+CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "512"))
+CACHE_TTL = float(os.getenv("AGENT_CACHE_TTL", str(24 * 3600)))
+
+
+def normalize_command(user_input: str) -> str:
+    """Canonical form of an operator command: case, spacing and edge punctuation ignored"""
+    text = _WHITESPACE.sub(" ", user_input.lower())
+    return _EDGE_PUNCTUATION.sub("", text)
+
+
+def prompt_fingerprint(system_prompt: str) -> str:
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """LRU + TTL cache of validated tool calls, keyed by normalized command and system prompt.
+
+    Only {"tool": name, "args": {...}} objects (or plans of them) whose args
+    bind to the named tool's signature are stored, so a cached entry is always dispatchable.
+    Changing the system prompt changes every key, which invalidates old entries.
+    """
+
+    def __init__(self, system_prompt: str, tools: Dict[str, Callable],
+                 max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL,
+                 persist_path: Optional[str] = CACHE_PATH):
+        self.tools = tools
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self._prefix = prompt_fingerprint(system_prompt) + ":"
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (tool call JSON, stored_at)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+        if persist_path:
+            self._load()
+
+    def _key(self, user_input: str) -> str:
+        return self._prefix + normalize_command(user_input)
+
+    def validate(self, tool_call) -> bool:
+        """True if tool_call names a known tool and its args fit the signature.
+
+        A plan, {"plan": [...]}, validates when every step does.
+        """
+        if isinstance(tool_call, dict) and "plan" in tool_call:
+            steps = tool_call["plan"]
+            return (isinstance(steps, list) and bool(steps)
+                    and all(self.validate(step) for step in steps))
+        if not isinstance(tool_call, dict):
+            return False
+        fn = self.tools.get(tool_call.get("tool"))
+        args = tool_call.get("args", {})
+        if fn is None or not isinstance(args, dict):
+            return False
+        try:
+            inspect.signature(fn).bind(**args)
+            json.dumps(args)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def get(self, user_input: str) -> Optional[dict]:
+        """Cached tool call for this command, or None"""
+        key = self._key(user_input)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(entry[0])
+
+    def put(self, user_input: str, tool_call: dict) -> bool:
+        """Cache a tool call if it validates. Returns True when stored."""
+        if not self.validate(tool_call):
+            self.rejected += 1
+            return False
+        if "plan" in tool_call:
+            stored = {"plan": tool_call["plan"]}
+        else:
+            stored = {"tool": tool_call["tool"], "args": tool_call.get("args", {})}
+        entry = (json.dumps(stored), time.time())
+        with self._lock:
+            key = self._key(user_input)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        if self.persist_path:
+            self._save()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.persist_path:
+            self._save()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejected": self.rejected,
+        }
+
+    def _save(self):
+        with self._lock:
+            entries = [[key, value, stored_at] for key, (value, stored_at) in self._entries.items()]
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_FILE_VERSION, "entries": entries}, f)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as e:
+            logger.warning(f"Could not persist response cache: {e}")
+
+    def _load(self):
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable response cache {self.persist_path}: {e}")
+            return
+        if data.get("version") != CACHE_FILE_VERSION:
+            return
+
+        now = time.time()
+        for key, value, stored_at in data.get("entries", []):
+            # Entries from other system prompts or past their TTL are dropped
+            if not key.startswith(self._prefix) or now - stored_at > self.ttl:
+                continue
+            if self.validate(json.loads(value)):
+                self._entries[key] = (value, stored_at)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,222 @@
+"""
+Hedged provider routing: race LLM providers and keep the first valid tool call
+
+Modes:
+  sequential - call the next provider only after the previous one fails
+  hedge      - start the backups once the primary has been silent for hedge_delay
+               (or immediately if it fails)
+  parallel   - start every provider at once
+
+In hedge mode the delay tracks the primary's observed latency percentile
+("hedge after p95"), so only the slowest ~5% of requests pay for a second call.
+
+A provider returns the response text (tool call JSON is extracted from it) or,
+when the model answered through native function calling, a (tool_call, text) pair.
+With a `validate` callable (e.g. parse_plan against the tool registry), a tool
+call it rejects with ValueError counts as a failure, so a fast malformed answer
+doesn't cancel a good one still in flight.
+"""
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from llm.tool_call_parser import extract_tool_call
+from utils.logger import get_logger
+
+logger = get_logger("ProviderRouter")
+
+Provider = Callable[[str], Awaitable[Union[str, Tuple[Optional[dict], str]]]]
+
+ROUTING_MODES = ("sequential", "hedge", "parallel")
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (5 ms .. ~80 s, ~12% bucket width)"""
+
+    BOUNDS = tuple(0.005 * 1.12 ** i for i in range(86))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile (seconds)"""
+        if self.count == 0:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.BOUNDS[min(i, len(self.BOUNDS) - 1)]
+        return self.BOUNDS[-1]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+@dataclass
+class RouteResult:
+    text: str
+    tool_call: Optional[dict]
+    remaining: str  # text outside the tool call JSON
+    provider: str
+    latency: float  # seconds, from route() start
+
+
+class ProviderRouter:
+    """Route a prompt across providers in priority order (first = primary)"""
+
+    def __init__(self, providers: List[Tuple[str, Provider]], mode: str = "hedge",
+                 hedge_delay: float = 2.0, adaptive: bool = True,
+                 hedge_percentile: float = 95.0, min_samples: int = 20,
+                 min_delay: float = 0.05, max_delay: float = 10.0,
+                 validate: Optional[Callable[[dict], object]] = None):
+        if mode not in ROUTING_MODES:
+            raise ValueError(f"mode must be one of {ROUTING_MODES}")
+        if not providers:
+            raise ValueError("at least one provider is required")
+        self.providers = providers
+        self.mode = mode
+        self.base_hedge_delay = hedge_delay
+        self.adaptive = adaptive
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.validate = validate
+
+        self.histograms = {name: LatencyHistogram() for name, _ in providers}
+        self.wins = {name: 0 for name, _ in providers}
+        self.errors = {name: 0 for name, _ in providers}
+        self.invalid = {name: 0 for name, _ in providers}  # tool calls rejected by validate
+        self.hedges_fired = 0
+        self.cancelled = 0
+
+    @property
+    def hedge_delay(self) -> float:
+        """Current hedge delay: primary's latency percentile once enough samples exist"""
+        primary = self.histograms[self.providers[0][0]]
+        if not self.adaptive or primary.count < self.min_samples:
+            return self.base_hedge_delay
+        return min(self.max_delay, max(self.min_delay, primary.percentile(self.hedge_percentile)))
+
+    async def _call(self, name: str, fn: Provider, prompt: str):
+        start = time.perf_counter()
+        try:
+            text = await fn(prompt)
+        except asyncio.CancelledError:
+            # Lost the race: its latency is at least this long. Leaving it out would bias the
+            # percentile (and so the hedge delay) towards the fast calls.
+            self.histograms[name].record(time.perf_counter() - start)
+            raise
+        self.histograms[name].record(time.perf_counter() - start)
+        return text
+
+    async def route(self, prompt: str) -> RouteResult:
+        """Return the first response carrying a tool call (else the best plain-text answer).
+
+        Raises RuntimeError if every provider fails.
+        """
+        start = time.perf_counter()
+        pending: Dict[asyncio.Task, str] = {}
+        queued = list(self.providers)
+        text_results: Dict[str, str] = {}
+        failures: Dict[str, str] = {}
+
+        def launch(count: int):
+            for _ in range(min(count, len(queued))):
+                name, fn = queued.pop(0)
+                pending[asyncio.ensure_future(self._call(name, fn, prompt))] = name
+
+        launch(len(queued) if self.mode == "parallel" else 1)
+        try:
+            while pending:
+                timeout = None
+                if self.mode == "hedge" and queued:
+                    timeout = max(0.0, self.hedge_delay - (time.perf_counter() - start))
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Primary is slow: hedge with every backup
+                    self.hedges_fired += 1
+                    launch(len(queued))
+                    continue
+
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        self.errors[name] += 1
+                        failures[name] = str(e)
+                        logger.warning(f"{name} failed: {e}")
+                        continue
+
+                    if isinstance(result, tuple):
+                        tool_call, text = result
+                        remaining = text
+                    else:
+                        text = result
+                        tool_call, remaining = extract_tool_call(text)
+                    if tool_call is not None and self.validate is not None:
+                        try:
+                            self.validate(tool_call)
+                        except ValueError as e:
+                            self.invalid[name] += 1
+                            failures[name] = f"invalid tool call: {e}"
+                            logger.warning(f"{name} returned an invalid tool call: {e}")
+                            continue
+                    if tool_call is not None:
+                        self.wins[name] += 1
+                        return RouteResult(text, tool_call, remaining, name, time.perf_counter() - start)
+                    text_results[name] = text
+
+                if not pending and queued:
+                    if text_results:
+                        # Answered in plain text (no tool needed): don't ask the backups
+                        break
+                    # Everything in flight failed: fall back to the next provider(s)
+                    launch(len(queued) if self.mode == "hedge" else 1)
+        finally:
+            for task in pending:
+                task.cancel()
+                self.cancelled += 1
+            # Let the losers unwind (close their HTTP streams) before returning
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        # No tool call anywhere: prefer the highest-priority plain-text answer
+        for name, _ in self.providers:
+            if name in text_results:
+                self.wins[name] += 1
+                text = text_results[name]
+                return RouteResult(text, None, text, name, time.perf_counter() - start)
+
+        details = "; ".join(f"{name}: {msg}" for name, msg in failures.items())
+        raise RuntimeError(f"All providers failed ({details})")
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "hedge_delay": self.hedge_delay,
+            "hedges_fired": self.hedges_fired,
+            "cancelled": self.cancelled,
+            "wins": dict(self.wins),
+            "errors": dict(self.errors),
+            "invalid": dict(self.invalid),
+            "latency": {name: h.summary() for name, h in self.histograms.items()},
+        }
@@ -0,0 +1,103 @@
+"""
+Local token accounting for LLM calls
+
+Each client records the provider-reported token counts of every request
+(input, input served from a cached prefix, output) together with its
+latency, so the savings from prompt-prefix caching are visible per request
+and in aggregate:
+
+    get_token_ledger().summary()["gemini/gemini-2.0-flash"]["cached_ratio"]
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for providers that don't report usage"""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class UsageRecord:
+    provider: str
+    model: str
+    input_tokens: int  # total prompt tokens, cached prefix included
+    cached_tokens: int  # prompt tokens served from a cached prefix
+    output_tokens: int
+    latency: float  # seconds for the whole request
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def uncached_tokens(self) -> int:
+        return max(0, self.input_tokens - self.cached_tokens)
+
+
+class TokenLedger:
+    """Running totals per provider/model plus the most recent request records"""
+
+    def __init__(self, history: int = 1000):
+        self.records = deque(maxlen=history)
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, input_tokens: int, cached_tokens: int = 0,
+               output_tokens: int = 0, latency: float = 0.0) -> UsageRecord:
+        rec = UsageRecord(provider, model, int(input_tokens or 0), int(cached_tokens or 0),
+                          int(output_tokens or 0), latency)
+        with self._lock:
+            self.records.append(rec)
+            totals = self._totals.setdefault(f"{provider}/{model}", {
+                "requests": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0,
+                "cached_requests": 0, "cached_latency": 0.0, "uncached_latency": 0.0,
+            })
+            totals["requests"] += 1
+            totals["input_tokens"] += rec.input_tokens
+            totals["cached_tokens"] += rec.cached_tokens
+            totals["output_tokens"] += rec.output_tokens
+            if rec.cached_tokens:
+                totals["cached_requests"] += 1
+                totals["cached_latency"] += latency
+            else:
+                totals["uncached_latency"] += latency
+        return rec
+
+    def last(self, provider: Optional[str] = None) -> Optional[UsageRecord]:
+        """Most recent record (optionally for one provider)"""
+        with self._lock:
+            for rec in reversed(self.records):
+                if provider is None or rec.provider == provider:
+                    return rec
+        return None
+
+    def summary(self) -> dict:
+        """Per provider/model totals, share of input tokens served from cache and mean latencies"""
+        out = {}
+        with self._lock:
+            for key, t in self._totals.items():
+                uncached_requests = t["requests"] - t["cached_requests"]
+                out[key] = {
+                    "requests": t["requests"],
+                    "input_tokens": t["input_tokens"],
+                    "cached_tokens": t["cached_tokens"],
+                    "output_tokens": t["output_tokens"],
+                    "cached_ratio": t["cached_tokens"] / t["input_tokens"] if t["input_tokens"] else 0.0,
+                    "mean_latency_cached": t["cached_latency"] / t["cached_requests"] if t["cached_requests"] else None,
+                    "mean_latency_uncached": t["uncached_latency"] / uncached_requests if uncached_requests else None,
+                }
+        return out
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self._totals.clear()
+
+
+_ledger = TokenLedger()
+
+
+def get_token_ledger() -> TokenLedger:
+    """Get the process-wide token ledger"""
+    return _ledger
@@ -0,0 +1,108 @@
+import json
+from typing import Optional, Tuple
+
+
+class ToolCallStreamParser:
+    """Incrementally find the first {"tool": ..., "args": {...}} or {"plan": [...]} object in streamed LLM text.
+
+    feed() returns the parsed tool call as soon as its closing brace arrives,
+    so the caller can dispatch the tool without waiting for the rest of the
+    response. Braces inside JSON strings are ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.tool_call = None
+        self._span = None  # (start, end) of the tool call JSON in self.text
+        self._pos = 0  # next index of self.text to scan
+        self._start = None  # index of the '{' opening the current candidate
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[dict]:
+        """Add streamed text. Returns the tool call once complete, else None."""
+        self.text += chunk
+        if self.tool_call is None:
+            self._scan()
+        return self.tool_call
+
+    def consume(self, stream) -> Optional[dict]:
+        """Feed chunks from a stream until a tool call closes, then close (cancel) the stream."""
+        try:
+            for chunk in stream:
+                if self.feed(chunk):
+                    break
+        finally:
+            stream.close()
+        return self.tool_call
+
+    async def aconsume(self, stream) -> Optional[dict]:
+        """Async consume() for async generators"""
+        try:
+            async for chunk in stream:
+                if self.feed(chunk):
+                    break
+        finally:
+            await stream.aclose()
+        return self.tool_call
+
+    def remaining_text(self) -> str:
+        """Text received so far with the tool call JSON removed"""
+        if self._span is None:
+            return self.text
+        start, end = self._span
+        return self.text[:start] + self.text[end:]
+
+    def _reset_candidate(self, resume: int):
+        self._pos = resume
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _scan(self):
+        text = self.text
+        while self._pos < len(text):
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if self._start is None:
+                if ch == "{":
+                    self._start = i
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    start = self._start
+                    try:
+                        obj = json.loads(text[start:i + 1])
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict) and ("tool" in obj or "plan" in obj):
+                        self.tool_call = obj
+                        self._span = (start, i + 1)
+                        return
+                    # Not a tool call: look for one nested inside it
+                    self._reset_candidate(start + 1)
+
+
+def extract_tool_call(text: str) -> Tuple[Optional[dict], str]:
+    """Parse a complete response. Returns (tool_call or None, remaining text)."""
+    parser = ToolCallStreamParser()
+    parser.feed(text)
+    return parser.tool_call, parser.remaining_text()
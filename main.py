@@ -1,9 +1,13 @@
-from llm.gemini_client import query_llm
+from llm.gemini_client import MODEL_NAME, estimate_request_tokens, query_tool_call
+from llm.rate_limiter import RateLimitedError, get_scheduler
+from llm.response_cache import ResponseCache
+from llm.token_accounting import get_token_ledger
 from utils import get_logger
 from utils.drone_visualizer import get_visualizer
-from tools import *
-from config.agent_config import SYSTEM_PROMPT
-import json
+from tools.command_parser import parse_command
+from tools.plan_executor import PlanError, execute_plan, is_plan
+from tools.registry import ToolCallError, get_tool_registry
+from config.agent_config import TOOL_CALLING_PROMPT
 
 logger = get_logger("AgenticDrone")
 
@@ -17,39 +21,68 @@ def run_drone_agent():
     visualizer.start_visualization()
     print("[INFO] 3D visualization started\n")
 
+    registry = get_tool_registry()
+    # Repeated commands reuse the validated tool call instead of a new LLM round trip
+    cache = ResponseCache(TOOL_CALLING_PROMPT, registry.functions)
+
     while True:
         user_input = input("Mission Command > ").strip()
 
         if user_input.lower() in {"exit", "quit"}:
             print("Shutting down agent...")
+            logger.info(f"Response cache stats: {cache.stats()}")
+            logger.info(f"Quota scheduler stats: {get_scheduler().stats()}")
+            logger.info(f"Token usage: {get_token_ledger().summary()}")
             visualizer.stop_visualization()
             break
 
-        prompt = f"{SYSTEM_PROMPT}\nUser: {user_input}\nAgent:"
-        response = query_llm(prompt)
-
-        try:
-            tool_call = json.loads(response)
-
-            if "tool" in tool_call:
-                tool_name = tool_call["tool"]
-                args = tool_call.get("args", {})
-
-                logger.info(f"Executing tool: {tool_name}")
-
-                tool_fn = globals().get(tool_name)
-                if tool_fn:
-                    result = tool_fn(**args)
-                    print(f"[TOOL OUTPUT] {result}")
-                else:
-                    print("Unknown tool requested.")
+        # Routine commands are parsed locally; only free-form requests reach the LLM
+        tool_call = parse_command(user_input) or cache.get(user_input)
+        from_llm = tool_call is None
+        text = ""
+        if tool_call:
+            logger.info(f"Resolved locally: {tool_call.get('tool', 'plan')}")
+        else:
+            # Tools are sent as function declarations; Gemini answers with a structured call.
+            # Wait for quota here rather than spend a request on a certain 429.
+            tools = registry.schemas()
+            get_scheduler().acquire(MODEL_NAME, estimate_request_tokens(user_input, TOOL_CALLING_PROMPT, tools))
+            try:
+                # Dispatch as soon as the function call arrives instead of waiting for the whole stream
+                tool_call, text = query_tool_call(user_input, tools, system=TOOL_CALLING_PROMPT,
+                                                  first_call=True)
+            except RateLimitedError as e:
+                get_scheduler().report_rate_limited(MODEL_NAME, e.retry_after)
+                print(f"Gemini quota exhausted, retry in {e.retry_after:.0f}s")
+                print("-" * 60)
+                continue
 
-        except json.JSONDecodeError:
+        if tool_call and is_plan(tool_call):
+            # Several tool calls from one response: validated and dry-run before flying
+            try:
+                report = execute_plan(tool_call, registry)
+            except PlanError as e:
+                print(f"Invalid plan: {e}")
+            else:
+                print(report.summary())
+                if report.ok and from_llm:
+                    cache.put(user_input, tool_call)
+        elif tool_call:
+            logger.info(f"Executing tool: {tool_call['tool']}")
+            try:
+                result = registry.dispatch(tool_call)
+            except ToolCallError as e:
+                print(f"Invalid tool call: {e}")
+            else:
+                print(f"[TOOL OUTPUT] {result}")
+                if from_llm:
+                    cache.put(user_input, tool_call)
+        else:
             print("\n[AGENT RESPONSE]")
-            print(response)
+            print(text)
 
         print("-" * 60)
 
 
 if __name__ == "__main__":
-    run_drone_agent()
\ No newline at end of file
+    run_drone_agent()
@@ -1,219 +1,157 @@
-from llm.gemini_client import query_llm
-from llm.ollama_client import query_ollama
+from llm.gemini_client import MODEL_NAME as GEMINI_MODEL, aquery_tool_call, estimate_request_tokens
+from llm.ollama_client import ToolsUnsupportedError, achat_tool_call, astream_ollama
+from llm.rate_limiter import PRIORITY_NORMAL, PRIORITY_SAFETY, get_scheduler
+from llm.response_cache import ResponseCache, normalize_command
+from llm.token_accounting import get_token_ledger
+from llm.router import ProviderRouter, RouteResult
+from llm.tool_call_parser import ToolCallStreamParser
 from utils import get_logger
 from utils.drone_visualizer import get_visualizer
-from tools import *
-from config.agent_config import SYSTEM_PROMPT
-import json
+from tools.command_parser import parse_command
+from tools.plan_executor import PlanError, execute_plan, is_plan, parse_plan
+from tools.registry import ToolCallError, get_tool_registry
+from config.agent_config import SYSTEM_PROMPT, TOOL_CALLING_PROMPT
+import asyncio
+import os
+import re
 
 logger = get_logger("AgenticDrone")
 
-
-def run_drone_agent():
-    print("\n=== Agentic Drone System (Gemini primary, Ollama fallback) ===")
-    print("Type 'exit' or 'quit' to stop\n")
-
-    # Start 3D visualization
-    visualizer = get_visualizer()
-    visualizer.start_visualization()
-    print("[INFO] 3D visualization started\n")
-
-    while True:
-        user_input = input("Mission Command > ").strip()
-
-        if user_input.lower() in {"exit", "quit"}:
-            print("Shutting down agent...")
-            visualizer.stop_visualization()
-            break
-
-        # If user invoked a direct tool command like 'takeoff 100' or movement commands,
-        # run locally and skip LLM.
-        import re
-
+# Provider routing: "hedge" (default), "parallel" or "sequential" (fallback only on error)
+ROUTING_MODE = os.getenv("AGENT_ROUTING_MODE", "hedge")
+# Initial seconds to wait for Gemini before also asking Ollama (adapts to Gemini's p95)
+HEDGE_DELAY = float(os.getenv("AGENT_HEDGE_DELAY", "2.0"))
+
+# Longest a command waits for Gemini quota before it is left to Ollama
+QUOTA_MAX_WAIT = float(os.getenv("AGENT_QUOTA_MAX_WAIT", "5.0"))
+
+# Commands that jump the quota queue
+SAFETY_RE = re.compile(r"\b(?:land|abort|emergency|stop|hover|return|home|come back)\b", re.IGNORECASE)
+
+# 'speed 4' / 'animation speed 4x' (anchored so 'set wind speed 5' reaches set_wind)
+SPEED_RE = re.compile(r"^\s*(?:animation\s+)?speed\s*(\d+(?:\.\d+)?)\s*x?\s*$", re.IGNORECASE)
+
+
+async def _stream_until_tool_call(stream) -> str:
+    # Stop reading (and cancel the request) as soon as the tool call JSON closes
+    parser = ToolCallStreamParser()
+    await parser.aconsume(stream)
+    return parser.text
+
+
+async def gemini_provider(user_input: str):
+    # Native function calling: the tool call comes back structured. The scheduler
+    # keeps calls within the Gemini quota; identical commands share one call.
+    tools = get_tool_registry().schemas()
+    return await get_scheduler().submit(
+        lambda: aquery_tool_call(user_input, tools, system=TOOL_CALLING_PROMPT, first_call=True),
+        model=GEMINI_MODEL,
+        tokens=estimate_request_tokens(user_input, TOOL_CALLING_PROMPT, tools),
+        key=normalize_command(user_input),
+        priority=PRIORITY_SAFETY if SAFETY_RE.search(user_input) else PRIORITY_NORMAL,
+        max_wait=QUOTA_MAX_WAIT,
+    )
+
+
+async def ollama_provider(user_input: str):
+    try:
+        return await achat_tool_call(user_input, get_tool_registry().ollama_tools(),
+                                     system=TOOL_CALLING_PROMPT)
+    except ToolsUnsupportedError:
+        # Models without tool support (e.g. the default phi3) get the JSON tool format in the prompt
+        prompt = f"User: {user_input}\nAgent:"
+        return await _stream_until_tool_call(astream_ollama(prompt, system=SYSTEM_PROMPT))
+
+
+class DroneAgent:
+    """Command path shared by the typed and voice front ends: local parse -> cache -> LLMs -> tools"""
+
+    def __init__(self, visualizer=None):
+        self.visualizer = visualizer
+        self.registry = get_tool_registry()
+        self.router = ProviderRouter(
+            [("gemini", gemini_provider), ("ollama", ollama_provider)],
+            mode=ROUTING_MODE,
+            hedge_delay=HEDGE_DELAY,
+            # The first tool call that names a known tool with valid args wins the race
+            validate=lambda tool_call: parse_plan(tool_call, self.registry),
+        )
+        # Repeated commands reuse the validated tool call instead of a new LLM round trip.
+        # Keyed on both prompts, so editing either invalidates cached translations.
+        self.cache = ResponseCache(TOOL_CALLING_PROMPT + SYSTEM_PROMPT, self.registry.functions)
+        # One loop for the whole session so pooled async connections are reused
+        self.loop = asyncio.new_event_loop()
+
+    def close(self):
+        logger.info(f"Provider routing stats: {self.router.stats()}")
+        logger.info(f"Quota scheduler stats: {get_scheduler().stats()}")
+        logger.info(f"Response cache stats: {self.cache.stats()}")
+        logger.info(f"Token usage: {get_token_ledger().summary()}")
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+
+    def handle(self, user_input: str):
+        """Run one operator command and print the outcome (call from one thread only)"""
         # Speed control: 'speed 4' to make animation 4x faster
-        speed_cmd = re.search(r"\bspeed\b\s*(\d+(?:\.\d+)?)", user_input, re.IGNORECASE)
-        if speed_cmd:
+        speed_cmd = SPEED_RE.search(user_input)
+        if speed_cmd and self.visualizer is not None:
             factor = float(speed_cmd.group(1))
             try:
-                viz = get_visualizer()
-                viz.set_animation_speed(factor)
+                self.visualizer.set_animation_speed(factor)
                 print(f"Animation speed set to {factor}x")
             except Exception as e:
                 print(f"Failed to set animation speed: {e}")
-
-            print("-" * 60)
-            continue
-
-        # TAKEOFF: e.g., 'takeoff 100' or 'takeoff 100 meters'
-        direct_cmd = re.search(r"\b(takeoff)\b\s*(\d+(?:\.\d+)?)", user_input, re.IGNORECASE)
-        if direct_cmd:
-            cmd = direct_cmd.group(1).lower()
-            value = float(direct_cmd.group(2))
-            logger.info(f"Direct command detected: {cmd} {value}")
-            fn = globals().get(cmd)
-            if fn:
-                try:
-                    result = fn(value)
-                    print(result)
-                except Exception as e:
-                    print(f"Error executing {cmd}: {e}")
-            else:
-                print(f"Unknown direct command: {cmd}")
-
-            print("-" * 60)
-            continue
-
-        # MOVEMENT: 'move forward 10', 'move backward 5 meters', 'move up 3', etc.
-        mv = re.search(r"\bmove\b\s*(forward|backward|right|left|up|down)\b\s*(\-?\d+(?:\.\d+)?)", user_input, re.IGNORECASE)
-        if mv:
-            direction = mv.group(1).lower()
-            distance = float(mv.group(2))
-            map_fn = {
-                'forward': 'move_forward',
-                'backward': 'move_backward',
-                'right': 'move_right',
-                'left': 'move_left',
-                'up': 'move_up',
-                'down': 'move_down',
-            }
-            fn_name = map_fn.get(direction)
-            fn = globals().get(fn_name)
-            logger.info(f"Direct movement detected: {fn_name}({distance})")
-            if fn:
-                try:
-                    result = fn(distance)
-                    print(result)
-                except Exception as e:
-                    print(f"Error executing movement {direction}: {e}")
-            else:
-                print(f"Movement function {fn_name} not found.")
-
-            print("-" * 60)
-            continue
-
-        # MOVE TO XYZ: 'move to 10 20 30' or 'move to 10,20,30'
-        mv_to = re.search(r"\bmove\s+to\b\s*\(?\s*(\-?\d+(?:\.\d+)?)[,\s]+(\-?\d+(?:\.\d+)?)[,\s]+(\-?\d+(?:\.\d+)?)", user_input, re.IGNORECASE)
-        if mv_to:
-            x = float(mv_to.group(1))
-            y = float(mv_to.group(2))
-            z = float(mv_to.group(3))
-            logger.info(f"Direct move_to_location detected: {x}, {y}, {z}")
-            fn = globals().get('move_to_location')
-            if fn:
-                try:
-                    result = fn(x, y, z)
-                    print(result)
-                except Exception as e:
-                    print(f"Error executing move_to_location: {e}")
-            else:
-                print("move_to_location function not available.")
-
-            print("-" * 60)
-            continue
-
-        # LAND or RETURN: simple keywords
-        if re.search(r"\bland\b", user_input, re.IGNORECASE):
-            fn = globals().get('land')
-            if fn:
-                try:
-                    print(fn())
-                except Exception as e:
-                    print(f"Error landing: {e}")
-            else:
-                print("land function not available.")
-            print("-" * 60)
-            continue
-
-        if re.search(r"\breturn to base\b|\breturn home\b|\breturn to home\b", user_input, re.IGNORECASE):
-            # Prefer mission-level landing helper when available
-            fn = globals().get('return_to_base_and_land') or globals().get('return_to_home')
-            if fn:
-                try:
-                    print(fn())
-                except Exception as e:
-                    print(f"Error returning home: {e}")
-            else:
-                print("return function not available.")
-            print("-" * 60)
-            continue
-
-        prompt = f"{SYSTEM_PROMPT}\nUser: {user_input}\nAgent:"
-
-        # First try Gemini
-        try:
-            response = query_llm(prompt)
-        except RuntimeError as e:
-            msg = str(e)
-            logger.warning(f"Gemini error: {msg}")
-            # Detect quota / resource exhausted
-            if "RESOURCE_EXHAUSTED" in msg or "quota" in msg.lower() or "exceeded" in msg.lower():
-                print("[WARN] Gemini quota exhausted or rate-limited — attempting Ollama fallback.")
-                try:
-                    response = query_ollama(prompt)
-                except Exception as oe:
-                    logger.error(f"Ollama fallback failed: {oe}")
-                    print("Both Gemini and Ollama failed. See logs for details.")
-                    continue
-            else:
-                # Other Gemini error: surface and continue loop
-                logger.error(f"Gemini unexpected error: {msg}")
-                print(f"Error from Gemini: {msg}")
-                continue
-
-        # The LLM response may include streaming/extra human text plus a JSON tool call.
-        # Try to extract a JSON object that contains the 'tool' key.
-        def extract_tool_json(text: str):
-            idx = text.find('{"tool"')
-            if idx == -1:
-                idx = text.find('"tool"')
-                if idx == -1:
-                    return None, text
-                # backtrack to opening brace
-                brace_idx = text.rfind('{', 0, idx)
-                if brace_idx == -1:
-                    return None, text
-                start = brace_idx
-            else:
-                start = text.find('{', idx)
-
-            # Find matching closing brace using a stack
-            stack = 0
-            end = None
-            for i in range(start, len(text)):
-                if text[i] == '{':
-                    stack += 1
-                elif text[i] == '}':
-                    stack -= 1
-                    if stack == 0:
-                        end = i + 1
-                        break
-
-            if end is None:
-                return None, text
-
-            candidate = text[start:end]
+            return
+
+        # Routine commands ('takeoff 100', 'move left 5', 'check battery') are
+        # parsed locally; only free-form requests go to the cache / LLM.
+        local = parse_command(user_input)
+        cached = None if local else self.cache.get(user_input)
+        if local:
+            logger.info(f"Direct command detected: {local['tool']}")
+            routed = RouteResult("", local, "", "local", 0.0)
+        elif cached:
+            logger.info("Response cache hit")
+            routed = RouteResult("", cached, "", "cache", 0.0)
+        else:
+            # Gemini first; Ollama is raced in if Gemini is slow or fails (quota, errors)
             try:
-                obj = json.loads(candidate)
-                return obj, text[:start] + text[end:]
-            except Exception:
-                return None, text
-
-        tool_call, remaining = extract_tool_json(response)
-        if tool_call and isinstance(tool_call, dict) and "tool" in tool_call:
+                routed = self.loop.run_until_complete(self.router.route(user_input))
+            except RuntimeError as e:
+                logger.error(f"LLM routing failed: {e}")
+                print("Both Gemini and Ollama failed. See logs for details.")
+                return
+
+        if routed.provider not in ("gemini", "cache", "local"):
+            print(f"[INFO] Answered by {routed.provider} fallback ({routed.latency:.2f}s)")
+
+        # A text-mode response may include extra human text around the JSON tool call.
+        tool_call = routed.tool_call
+        remaining = routed.remaining
+        if tool_call and is_plan(tool_call):
+            # Several tool calls from one response: validated and dry-run before flying
+            try:
+                report = execute_plan(tool_call, self.registry)
+            except PlanError as e:
+                print(f"Invalid plan: {e}")
+            else:
+                print(report.summary())
+                if report.ok and routed.provider not in ("cache", "local"):
+                    self.cache.put(user_input, tool_call)
+        elif tool_call:
             tool_name = tool_call["tool"]
-            args = tool_call.get("args", {})
-
             logger.info(f"Executing tool: {tool_name}")
 
-            tool_fn = globals().get(tool_name)
-            if tool_fn:
-                try:
-                    result = tool_fn(**args)
-                    print(f"[TOOL OUTPUT] {result}")
-                except Exception as e:
-                    print(f"Error running tool {tool_name}: {e}")
+            try:
+                result = self.registry.dispatch(tool_call)
+            except ToolCallError as e:
+                print(f"Invalid tool call: {e}")
+            except Exception as e:
+                print(f"Error running tool {tool_name}: {e}")
             else:
-                print("Unknown tool requested.")
+                print(f"[TOOL OUTPUT] {result}")
+                if routed.provider not in ("cache", "local"):
+                    self.cache.put(user_input, tool_call)
 
             # Print any remaining non-JSON text as agent response
             if remaining and remaining.strip():
@@ -221,8 +159,30 @@ def run_drone_agent():
                 print(remaining)
         else:
             print("\n[AGENT RESPONSE]")
-            print(response)
+            print(routed.text)
+
+
+def run_drone_agent():
+    print("\n=== Agentic Drone System (Gemini primary, Ollama fallback) ===")
+    print("Type 'exit' or 'quit' to stop\n")
+
+    # Start 3D visualization
+    visualizer = get_visualizer()
+    visualizer.start_visualization()
+    print("[INFO] 3D visualization started\n")
+
+    agent = DroneAgent(visualizer)
+
+    while True:
+        user_input = input("Mission Command > ").strip()
+
+        if user_input.lower() in {"exit", "quit"}:
+            print("Shutting down agent...")
+            agent.close()
+            visualizer.stop_visualization()
+            break
 
+        agent.handle(user_input)
         print("-" * 60)
 
 
@@ -1,75 +1,75 @@
-import sounddevice as sd
-import numpy as np
-import queue
-import threading
-from faster_whisper import WhisperModel
+"""
+Voice-controlled drone agent
 
-# Settings
-samplerate = 16000
-block_duration = 0.5 #seconds
-chunk_duration=2 #seconds
-channels=1
+Listens on the microphone, cuts the stream into utterances with voice
+activity detection (speech/vad.py) and sends each spoken command through
+the same command path as typed ones (main_fallback.DroneAgent).
 
-frames_per_block = int(samplerate * block_duration)
-frames_per_chunk = int(samplerate * chunk_duration)
+    python realTime.py                       # live microphone, runs the agent
+    python realTime.py --transcribe-only     # just print what was heard
+    python realTime.py --file mission.wav    # 16 kHz 16-bit recording instead of the microphone
+"""
+import argparse
 
-audio_queue = queue.Queue()
-audio_buffer = []
+from speech.models import get_whisper_model, transcribe
+from speech.pipeline import Microphone, VoiceCommandPipeline
+from speech.vad import SAMPLE_RATE, EnergyVAD, SpeechSegmenter
 
-#Model setup: medium.en + float16 (optimized for 3088)
-model = WhisperModel("large-v3", device="cpu", compute_type="float32")
 
-def audio_callback(indata, frames, time, status):
-    if status:
-        print(status)
-    audio_queue.put(indata.copy())
+def main():
+    parser = argparse.ArgumentParser(description="Voice commands for the drone agent")
+    parser.add_argument("--file", help="transcribe a WAV recording instead of the microphone")
+    parser.add_argument("--transcribe-only", action="store_true", help="print commands without running them")
+    parser.add_argument("--device", help="input device name or index (default: system default)")
+    parser.add_argument("--model", help="Whisper model size (default: WHISPER_MODEL or small.en)")
+    parser.add_argument("--compute-type", help="int8, int8_float16, float32, ... (default: WHISPER_COMPUTE_TYPE or int8)")
+    parser.add_argument("--silence", type=float, default=0.6, help="seconds of silence that end a command")
+    parser.add_argument("--threshold", type=float, default=3.0, help="speech level over the noise floor")
+    args = parser.parse_args()
 
-def recorder():
-    try:
-        # Check for available input devices
-        devices = sd.query_devices()
-        input_devices = [d for d in devices if d['max_input_channels'] > 0]
-        if not input_devices:
-            print("No audio input devices found. Cannot record live audio.")
-            print("Consider uploading an audio file and modifying the `transcriber` function to process it.")
-            return
-
-        # Use the default input device if found
-        # If you have multiple devices, you might need to specify device=input_devices[0]['name'] or similar
-        with sd.InputStream(samplerate=samplerate, channels=channels,
-                            blocksize=frames_per_block, callback=audio_callback):
-            print(" Listening... Press Ctrl+C to stop.")
-            while True:
-                sd.sleep(100)
-    except sd.PortAudioError as e:
-        print(f"Error initializing audio input: {e}")
-        print("This often happens in environments like Google Colab where direct microphone access is restricted.")
-        print("You might need to provide audio input via a pre-recorded file or a browser-based recording method.")
-    except Exception as e:
-        print(f"An unexpected error occurred in the recorder: {e}")
+    # Loaded (and warmed up) before listening, so the first command isn't slow
+    model = get_whisper_model(args.model, args.compute_type)
+    agent = None
+    if args.transcribe_only:
+        on_command = lambda command: print(f"🎙️  {command}")
+    else:
+        from main_fallback import DroneAgent
 
+        agent = DroneAgent()
 
-def transcriber():
-    global audio_buffer
-    while True:
-        block = audio_queue.get()
-        audio_buffer.append(block)
-        total_frames = sum(len(block) for block in audio_buffer)
-        if total_frames >= frames_per_chunk:
-            audio_data = np.concatenate(audio_buffer)[:frames_per_chunk]
-            audio_buffer = [] # Clear buffer
-            audio_data = audio_data.flatten().astype(np.float32)
+        def on_command(command: str):
+            print(f"🎙️  Mission Command > {command}")
+            agent.handle(command)
+            print("-" * 60)
 
-            #Transcription without timestamps
-            segments, _ = model.transcribe(
-                audio_data,
-                language="en",
-                beam_size=1 # Max speed
-            )
+    segmenter = SpeechSegmenter(SAMPLE_RATE, EnergyVAD(threshold=args.threshold), silence=args.silence)
+    # Each utterance is a separate command: don't condition on the previous one
+    pipeline = VoiceCommandPipeline(
+        lambda audio: transcribe(audio, model, condition_on_previous_text=False), on_command, segmenter)
+    try:
+        if args.file:
+            pipeline.feed_wav(args.file)
+        else:
+            device = int(args.device) if args.device and args.device.isdigit() else args.device
+            mic = Microphone(pipeline, device=device)
+            try:
+                mic.start()
+            except Exception as e:
+                print(f"Error initializing audio input: {e}")
+                print("Use --file with a recording when no microphone is available.")
+                return
+            try:
+                print(" Listening... Press Ctrl+C to stop.")
+                pipeline.run()
+            finally:
+                mic.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\nVoice pipeline: {pipeline.stats()}")
+        if agent is not None:
+            agent.close()
 
-            for segment in segments:
-                print(f"{segment.text}")
 
-#Start threads
-threading.Thread(target=recorder, daemon=True).start()
-transcriber()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
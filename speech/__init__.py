@@ -0,0 +1,4 @@
+"""
+Speech input for the drone agent: voice activity detection, streaming
+segmentation and the voice command pipeline (see realTime.py).
+"""
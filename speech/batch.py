@@ -0,0 +1,132 @@
+"""
+Bulk transcription of recorded audio (operator logs)
+
+A bounded pool of threads shares one Whisper model created with
+num_workers = workers, so files decode and transcribe in parallel without a
+model copy per thread. Results are appended to a JSONL file as each file
+finishes; files already in it are skipped, so an interrupted run resumes.
+
+    stats = transcribe_files(find_audio("logs/"), "transcripts.jsonl", workers=2)
+    stats["audio_hours_per_hour"]
+"""
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, List, Optional
+
+from speech.models import get_whisper_model
+from utils.logger import get_logger
+
+logger = get_logger("BatchTranscriber")
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm", ".mp4"}
+
+
+def find_audio(source: str) -> List[str]:
+    """Audio files under a directory, or the paths listed in a manifest.
+
+    Manifests are .jsonl ({"audio": path} per line) or plain text (one path
+    per line); relative paths are relative to the manifest.
+    """
+    if os.path.isdir(source):
+        found = []
+        for root, _, files in os.walk(source):
+            found.extend(os.path.join(root, name) for name in files
+                         if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS)
+        return sorted(found)
+    if os.path.splitext(source)[1].lower() in AUDIO_EXTENSIONS:
+        return [source]
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = json.loads(line)["audio"] if line.startswith("{") else line
+            paths.append(path if os.path.isabs(path) else os.path.join(base, path))
+    return paths
+
+
+def _done_paths(out_path: str) -> set:
+    done = set()
+    if os.path.exists(out_path):
+        with open(out_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # line cut short by an interrupted run
+                if "error" not in entry:
+                    done.add(entry["audio"])
+    return done
+
+
+def transcribe_file(model, path: str, beam_size: int = 5, vad_filter: bool = True,
+                    language: str = "en") -> dict:
+    start = time.perf_counter()
+    segments, info = model.transcribe(path, language=language, beam_size=beam_size, vad_filter=vad_filter)
+    segments = [{"start": round(s.start, 2), "end": round(s.end, 2), "text": s.text.strip()} for s in segments]
+    return {
+        "audio": path,
+        "text": " ".join(s["text"] for s in segments),
+        "duration": info.duration,
+        "segments": segments,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def transcribe_files(paths: Iterable[str], out_path: str, workers: int = 2, size: Optional[str] = None,
+                     compute_type: Optional[str] = None, cpu_threads: Optional[int] = None,
+                     beam_size: int = 5, vad_filter: bool = True, resume: bool = True) -> dict:
+    """Transcribe files with `workers` in parallel, appending one JSON line per file to out_path"""
+    workers = max(1, workers)
+    if cpu_threads is None:
+        # Split the cores between workers instead of oversubscribing them
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    model = get_whisper_model(size, compute_type, cpu_threads=cpu_threads, num_workers=workers)
+
+    done = _done_paths(out_path) if resume else set()
+    paths = list(paths)
+    pending = [path for path in paths if path not in done]
+    stats = {"files": 0, "skipped": len(paths) - len(pending), "errors": 0, "audio_seconds": 0.0}
+
+    def run(path: str) -> dict:
+        try:
+            return transcribe_file(model, path, beam_size, vad_filter)
+        except Exception as e:
+            return {"audio": path, "error": f"{type(e).__name__}: {e}"}
+
+    start = time.perf_counter()
+    with open(out_path, "a" if resume else "w") as out, ThreadPoolExecutor(workers) as pool:
+        queued = iter(pending)
+        in_flight = set()
+        while True:
+            # Keep a couple of files per worker queued, not the whole list
+            for path in queued:
+                in_flight.add(pool.submit(run, path))
+                if len(in_flight) >= 2 * workers:
+                    break
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+                if "error" in result:
+                    stats["errors"] += 1
+                    logger.warning(f"{result['audio']}: {result['error']}")
+                else:
+                    stats["files"] += 1
+                    stats["audio_seconds"] += result["duration"]
+
+    wall = time.perf_counter() - start
+    stats["wall_seconds"] = wall
+    stats["workers"] = workers
+    stats["cpu_threads"] = cpu_threads
+    # Hours of audio transcribed per hour of wall time (> 1 is faster than real time)
+    stats["audio_hours_per_hour"] = stats["audio_seconds"] / wall if wall else 0.0
+    return stats
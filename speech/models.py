@@ -0,0 +1,106 @@
+"""
+Shared faster-whisper models
+
+Models are loaded once per configuration and reused by every caller (voice
+pipeline, batch transcription, benchmarks). The defaults suit CPU inference:
+a small English model with int8 weights.
+
+    WHISPER_MODEL=base.en WHISPER_COMPUTE_TYPE=int8 python realTime.py
+
+WHISPER_CPU_THREADS sets the threads per transcription (0: all cores) and
+WHISPER_NUM_WORKERS how many transcriptions one model runs concurrently
+when called from several threads.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger("Speech")
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small.en")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+# Where models are downloaded to / loaded from (default: the Hugging Face cache)
+WHISPER_MODEL_DIR = os.getenv("WHISPER_MODEL_DIR") or None
+
+# Fallbacks for compute types the device can't run (int8_float16 needs a GPU)
+_COMPUTE_FALLBACKS = {
+    "int8_float16": "int8",
+    "int8_bfloat16": "int8",
+    "float16": "float32",
+    "bfloat16": "float32",
+}
+
+_models: Dict[Tuple, object] = {}
+_models_lock = threading.Lock()
+
+
+def resolve_compute_type(compute_type: str, device: str) -> str:
+    """The requested compute type, or the closest one the device supports"""
+    import ctranslate2
+
+    supported = ctranslate2.get_supported_compute_types(device)
+    if compute_type in ("default", "auto") or compute_type in supported:
+        return compute_type
+    fallback = _COMPUTE_FALLBACKS.get(compute_type, "default")
+    logger.warning(f"{compute_type} is not supported on {device}, using {fallback}")
+    return fallback
+
+
+def get_whisper_model(size: Optional[str] = None, compute_type: Optional[str] = None,
+                      device: Optional[str] = None, cpu_threads: Optional[int] = None,
+                      num_workers: Optional[int] = None):
+    """Get the shared WhisperModel for a configuration (unset arguments come from the environment)"""
+    device = device or WHISPER_DEVICE
+    key = (
+        size or WHISPER_MODEL,
+        device,
+        compute_type or WHISPER_COMPUTE_TYPE,
+        WHISPER_CPU_THREADS if cpu_threads is None else cpu_threads,
+        WHISPER_NUM_WORKERS if num_workers is None else num_workers,
+    )
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                model = _models[key] = _load(*key)
+    return model
+
+
+def _load(size: str, device: str, compute_type: str, cpu_threads: int, num_workers: int):
+    from faster_whisper import WhisperModel
+
+    compute_type = resolve_compute_type(compute_type, device)
+    start = time.perf_counter()
+    model = WhisperModel(size, device=device, compute_type=compute_type,
+                         cpu_threads=cpu_threads, num_workers=num_workers,
+                         download_root=WHISPER_MODEL_DIR)
+    loaded = time.perf_counter() - start
+    # The first transcription initializes the decoder: pay for it now, not on the first command
+    segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="en", beam_size=1)
+    list(segments)
+    logger.info(f"Loaded whisper {size} ({compute_type}, {device}) in {loaded:.1f}s, "
+                f"warm-up {time.perf_counter() - start - loaded:.1f}s")
+    return model
+
+
+def transcribe(audio, model=None, language: str = "en", beam_size: int = 1, **options) -> str:
+    """Text of an utterance (float32 16 kHz samples or an audio file path)"""
+    model = model or get_whisper_model()
+    segments, _ = model.transcribe(audio, language=language, beam_size=beam_size,
+                                   without_timestamps=True, **options)
+    return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def clear_whisper_models():
+    """Drop the shared models (benchmarks switching between many configurations)"""
+    with _models_lock:
+        _models.clear()
@@ -0,0 +1,167 @@
+"""
+Voice command pipeline: microphone -> VAD segments -> Whisper -> agent command
+
+The audio callback only copies each block into a queue; one worker thread
+segments the stream (speech/vad.py), transcribes each utterance and hands
+the cleaned-up text to `on_command`. Silence never reaches the model.
+
+    pipeline = VoiceCommandPipeline(transcribe, agent.handle)
+    with Microphone(pipeline):
+        pipeline.run()              # until stop() or Ctrl+C
+
+    pipeline.feed_wav("mission.wav")  # same path, from a recording
+"""
+import queue
+import re
+import time
+import wave
+from typing import Callable, Optional
+
+import numpy as np
+
+from speech.vad import SAMPLE_RATE, SpeechSegment, SpeechSegmenter, merge_overlap
+from utils.logger import get_logger
+
+logger = get_logger("VoicePipeline")
+
+# Whisper's usual output on noise or breathing that slips past the VAD
+HALLUCINATIONS = {"", "you", "thank you", "thanks for watching", "bye"}
+
+_TRAILING_RE = re.compile(r"[\s.!?,;:]+$")
+
+
+def clean_command(text: str) -> str:
+    """Transcript -> command text ('Take off to 20 meters.' -> 'Take off to 20 meters')"""
+    text = _TRAILING_RE.sub("", " ".join(text.split()))
+    return "" if text.lower() in HALLUCINATIONS else text
+
+
+class VoiceCommandPipeline:
+    """Segments streamed audio, transcribes speech and dispatches commands"""
+
+    def __init__(self, transcribe: Callable[[np.ndarray], str], on_command: Callable[[str], None],
+                 segmenter: Optional[SpeechSegmenter] = None, sample_rate: int = SAMPLE_RATE):
+        self.transcribe = transcribe
+        self.on_command = on_command
+        self.sample_rate = sample_rate
+        self.segmenter = segmenter or SpeechSegmenter(sample_rate)
+        self.blocks = queue.Queue()
+        self.parts = []  # transcripts of the windows of a long utterance
+
+        self.segments = 0
+        self.commands = 0
+        self.speech_seconds = 0.0
+        self.transcribe_seconds = 0.0
+        self.dropped = 0  # overflow reported by the audio driver
+
+    def callback(self, indata, frames, time_info, status):
+        """sounddevice InputStream callback (runs on the audio thread: copy and return)"""
+        if status:
+            self.dropped += 1
+        self.blocks.put(indata[:, 0].copy() if indata.ndim > 1 else indata.copy())
+
+    def stop(self):
+        self.blocks.put(None)
+
+    def run(self):
+        """Process queued audio until stop(); the utterance in progress is flushed"""
+        while True:
+            block = self.blocks.get()
+            if block is None:
+                break
+            for segment in self.segmenter.feed(block):
+                self.process(segment)
+        for segment in self.segmenter.flush():
+            self.process(segment)
+
+    def process(self, segment: SpeechSegment):
+        start = time.perf_counter()
+        # An empty final segment only ends an utterance whose windows were already transcribed
+        text = self.transcribe(segment.audio).strip() if len(segment.audio) else ""
+        elapsed = time.perf_counter() - start
+        self.segments += 1
+        self.speech_seconds += segment.duration
+        self.transcribe_seconds += elapsed
+        logger.debug(f"Segment {segment.start:.2f}-{segment.end:.2f}s transcribed in {elapsed:.2f}s: {text!r}")
+
+        if self.parts:
+            text = merge_overlap(self.parts[-1], text)
+        if text:
+            self.parts.append(text)
+        if not segment.final:
+            return
+        command = clean_command(" ".join(self.parts))
+        self.parts = []
+        if command:
+            self.commands += 1
+            self.on_command(command)
+
+    def feed_wav(self, path: str, block: float = 0.1, realtime: bool = False):
+        """Run a 16-bit PCM WAV file through the pipeline (the queue and worker are bypassed)"""
+        audio = read_wav(path, self.sample_rate)
+        step = max(1, int(block * self.sample_rate))
+        for i in range(0, len(audio), step):
+            for segment in self.segmenter.feed(audio[i:i + step]):
+                self.process(segment)
+            if realtime:
+                time.sleep(block)
+        for segment in self.segmenter.flush():
+            self.process(segment)
+
+    def stats(self) -> dict:
+        return {
+            "segments": self.segments,
+            "commands": self.commands,
+            "speech_seconds": self.speech_seconds,
+            "transcribe_seconds": self.transcribe_seconds,
+            # Below 1.0 the transcriber keeps up with the speech
+            "real_time_factor": self.transcribe_seconds / self.speech_seconds if self.speech_seconds else None,
+            "queued_blocks": self.blocks.qsize(),
+            "dropped": self.dropped,
+        }
+
+
+def read_wav(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Mono float32 samples in [-1, 1] from a 16-bit PCM WAV recorded at sample_rate"""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM, got {8 * f.getsampwidth()}-bit")
+        if f.getframerate() != sample_rate:
+            raise ValueError(f"{path}: expected {sample_rate} Hz, got {f.getframerate()} Hz")
+        channels = f.getnchannels()
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels)[:, 0]
+    return pcm.astype(np.float32) / 32768.0
+
+
+class Microphone:
+    """Context manager streaming the default input device into a pipeline"""
+
+    def __init__(self, pipeline: VoiceCommandPipeline, device=None, block: float = 0.1):
+        self.pipeline = pipeline
+        self.device = device
+        self.blocksize = int(block * pipeline.sample_rate)
+        self.stream = None
+
+    def start(self):
+        import sounddevice as sd
+
+        self.stream = sd.InputStream(samplerate=self.pipeline.sample_rate, channels=1, dtype="float32",
+                                     blocksize=self.blocksize, device=self.device,
+                                     callback=self.pipeline.callback)
+        self.stream.start()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        self.pipeline.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,197 @@
+"""
+Voice activity detection and speech segmentation for streamed microphone audio
+
+Audio blocks of any size are written into a preallocated ring buffer
+(RingBuffer). EnergyVAD classifies fixed 30 ms frames against an adaptive
+noise floor, and SpeechSegmenter cuts the stream into utterances:
+
+    segmenter = SpeechSegmenter()
+    for block in blocks:                      # float32 mono, 16 kHz
+        for segment in segmenter.feed(block):
+            text = transcribe(segment.audio)
+
+An utterance starts with `preroll` seconds of audio before the first speech
+frame and ends after `silence` seconds without speech. Utterances longer
+than `max_segment` are split into windows that overlap by `overlap` seconds,
+so a word on the cut is heard whole in one of them (merge_overlap drops the
+words the two transcripts then share).
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+
+class RingBuffer:
+    """Fixed-size float32 sample buffer addressed by absolute sample index"""
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=np.float32)
+        self.written = 0  # samples written since the start of the stream
+
+    @property
+    def oldest(self) -> int:
+        """Absolute index of the oldest sample still held"""
+        return max(0, self.written - self.capacity)
+
+    def write(self, samples: np.ndarray):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        n = len(samples)
+        if n >= self.capacity:
+            # Only the newest `capacity` samples are kept, but all of them count as written
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+        pos = self.written % self.capacity
+        head = min(len(samples), self.capacity - pos)
+        self.data[pos:pos + head] = samples[:head]
+        self.data[:len(samples) - head] = samples[head:]
+        self.written += len(samples)
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """Samples [start, end): a view when contiguous, a copy across the wrap"""
+        start = max(start, self.oldest)
+        end = min(end, self.written)
+        if end <= start:
+            return self.data[:0]
+        lo, hi = start % self.capacity, end % self.capacity or self.capacity
+        if lo < hi:
+            return self.data[lo:hi]
+        return np.concatenate((self.data[lo:], self.data[:hi]))
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy of samples [start, end) that stays valid after later writes"""
+        return np.array(self.view(start, end))
+
+
+class EnergyVAD:
+    """Frame-level speech detector: RMS above an adaptive noise floor"""
+
+    def __init__(self, threshold: float = 3.0, min_rms: float = 0.01, adapt: float = 0.05):
+        self.threshold = threshold  # speech = rms > threshold * noise floor
+        self.min_rms = min_rms  # never call anything quieter than this speech
+        self.adapt = adapt  # noise floor smoothing per non-speech frame
+        self.noise_floor = min_rms / threshold
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.dot(frame, frame) / len(frame))) if len(frame) else 0.0
+        speech = rms > max(self.min_rms, self.threshold * self.noise_floor)
+        if not speech:
+            self.noise_floor += self.adapt * (rms - self.noise_floor)
+        return speech
+
+
+@dataclass
+class SpeechSegment:
+    audio: np.ndarray
+    start: float  # seconds since the start of the stream
+    end: float
+    final: bool  # False for a window cut from a longer utterance
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class SpeechSegmenter:
+    """Split a sample stream into speech segments using a VAD"""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, vad: Optional[EnergyVAD] = None,
+                 silence: float = 0.6, preroll: float = 0.3, min_speech: float = 0.25,
+                 max_segment: float = 10.0, overlap: float = 1.0):
+        self.sample_rate = sample_rate
+        self.vad = vad or EnergyVAD()
+        self.frame = sample_rate * FRAME_MS // 1000
+        self.silence_frames = max(1, int(silence * 1000 / FRAME_MS))
+        self.preroll = int(preroll * sample_rate)
+        self.min_speech = int(min_speech * sample_rate)
+        self.max_segment = int(max_segment * sample_rate)
+        self.overlap = min(int(overlap * sample_rate), self.max_segment // 2)
+        self.ring = RingBuffer(self.max_segment + self.preroll + sample_rate)
+
+        self.processed = 0  # next frame to classify (absolute sample index)
+        self.start = None  # start of the current utterance, None while silent
+        self.last_speech = 0  # end of the last speech frame
+        self.quiet_frames = 0
+        self.speech_samples = 0
+        self.windows = 0  # non-final windows emitted for the current utterance
+
+    def feed(self, samples: np.ndarray) -> List[SpeechSegment]:
+        """Add audio; returns the segments completed by it"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        # Classify in slices no larger than the ring's spare second, so long blocks
+        # (a whole file at once) don't overwrite audio before it is segmented
+        step = self.ring.capacity - self.max_segment - self.preroll
+        segments = []
+        for offset in range(0, len(samples), step):
+            segments.extend(self._feed(samples[offset:offset + step]))
+        return segments
+
+    def _feed(self, samples: np.ndarray) -> List[SpeechSegment]:
+        self.ring.write(samples)
+        segments = []
+        while self.ring.written - self.processed >= self.frame:
+            frame_start = self.processed
+            self.processed += self.frame
+            speech = self.vad.is_speech(self.ring.view(frame_start, self.processed))
+            if self.start is None:
+                if speech:
+                    self.start = max(self.ring.oldest, frame_start - self.preroll)
+                    self.speech_samples = self.frame
+                    self.last_speech = self.processed
+                    self.quiet_frames = 0
+                continue
+            if speech:
+                self.speech_samples += self.frame
+                self.last_speech = self.processed
+                self.quiet_frames = 0
+            else:
+                self.quiet_frames += 1
+            if self.quiet_frames >= self.silence_frames:
+                segment = self._emit(self.last_speech, final=True)
+                if segment is not None:
+                    segments.append(segment)
+                self.start = None
+            elif self.processed - self.start >= self.max_segment:
+                segments.append(self._emit(self.processed, final=False))
+                self.start = self.processed - self.overlap
+        return segments
+
+    def flush(self) -> List[SpeechSegment]:
+        """End of stream: emit the utterance in progress"""
+        segment = None
+        if self.start is not None:
+            segment = self._emit(self.last_speech, final=True)
+            self.start = None
+        return [segment] if segment is not None else []
+
+    def _emit(self, end: int, final: bool) -> Optional[SpeechSegment]:
+        if final:
+            windows, self.windows = self.windows, 0
+            # A click or cough is dropped, but an utterance that already emitted windows
+            # always ends with a final segment (possibly empty), so listeners can flush
+            if not windows and self.speech_samples < self.min_speech:
+                return None
+        else:
+            self.windows += 1
+        self.speech_samples = 0
+        return SpeechSegment(self.ring.read(self.start, max(self.start, end)), self.start / self.sample_rate,
+                             max(self.start, end) / self.sample_rate, final)
+
+
+_WORD_RE = re.compile(r"[^\w']+")
+
+
+def merge_overlap(previous: str, text: str, max_words: int = 8) -> str:
+    """Drop the leading words of `text` that repeat the end of `previous`"""
+    prev_words = _WORD_RE.sub(" ", previous.lower()).split()
+    words = text.split()
+    norm = [_WORD_RE.sub("", w.lower()) for w in words]
+    for n in range(min(max_words, len(prev_words), len(words)), 0, -1):
+        if prev_words[-n:] == norm[:n]:
+            return " ".join(words[n:])
+    return text
@@ -0,0 +1,168 @@
+"""
+Local fast path: parse routine operator commands straight into tool calls
+
+Each tool gets a trigger phrase in COMMAND_GRAMMAR. Argument names, types,
+defaults and which arguments are required come from the tool's signature, so
+the grammar only says how a command starts. All triggers are compiled into a
+single anchored regex, so a command costs one match plus argument extraction:
+
+    parse_command("move to 10, 20, 30")
+    -> {"tool": "move_to_location", "args": {"x": 10.0, "y": 20.0, "z": 30.0}}
+
+Anything ambiguous (missing or extra numbers, unknown phrasing) returns None
+and goes to the LLM as before.
+"""
+import inspect
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+# Trigger phrase per tool. Order matters: earlier entries win, so specific
+# phrases ("return to base and land") come before their prefixes ("return home").
+COMMAND_GRAMMAR = [
+    ("return_to_base_and_land", r"(?:return|go back|fly back)\s+(?:to\s+)?(?:the\s+)?(?:base|home)\s+and\s+land|rtb"),
+    ("return_to_home", r"(?:return|go back|fly back|head back|come back)(?:\s+to)?(?:\s+the)?\s+(?:home|base|start|initial point|starting point)|go home|return home|come home"),
+    ("land", r"land|touch\s*down"),
+    ("takeoff", r"take\s*-?\s*off|launch|lift\s*off"),
+    ("move_to_gps", r"(?:move|go|fly|navigate)\s+to\s+gps(?:\s+coordinates?)?"),
+    ("plan_path_to", r"plan\s+(?:a\s+)?(?:path|route)(?:\s+to)?"),
+    ("deliver_to_location", r"deliver(?:\s+(?:the\s+)?(?:package|payload|parcel))?(?:\s+to)?(?:\s+location)?"),
+    ("move_to_location", r"(?:move|go|fly|navigate)\s+to(?:\s+(?:coordinates?|location|position|point))?"),
+    ("move_forward", r"(?:(?:move|go|fly)\s+)?(?:forward|forwards|ahead)"),
+    ("move_backward", r"(?:(?:move|go|fly)\s+)?(?:backward|backwards|back)"),
+    ("move_right", r"(?:(?:move|go|fly)\s+)?right"),
+    ("move_left", r"(?:(?:move|go|fly)\s+)?left"),
+    ("move_up", r"(?:(?:move|go|fly)\s+)?(?:up|ascend|climb)"),
+    ("move_down", r"(?:(?:move|go|fly)\s+)?(?:down|descend)"),
+    ("get_current_gps", r"(?:(?:get|show|what is|what's)\s+)?(?:the\s+)?(?:my\s+)?(?:current\s+)?gps(?:\s+(?:coordinates|position|location))?"),
+    ("get_current_location", r"where am i|where is the drone|(?:(?:get|show|what is|what's)\s+)?(?:the\s+)?(?:my\s+)?(?:current\s+)?(?:position|location)"),
+    ("add_no_fly_zone", r"(?:add|create|define)\s+(?:a\s+)?no[\s-]*fly[\s-]*zone"),
+    ("add_obstacle", r"(?:add|create|mark)\s+(?:an\s+)?obstacle"),
+    ("load_payload", r"load(?:\s+(?:the\s+)?(?:payload|cargo))?"),
+    ("drop_payload", r"(?:drop|release)(?:\s+(?:the\s+)?(?:payload|package|parcel|cargo))?"),
+    ("check_payload_status", r"(?:check\s+)?(?:the\s+)?payload(?:\s+status)?|is (?:the\s+)?payload loaded"),
+    ("list_delivery_locations", r"(?:list|show)(?:\s+all)?(?:\s+(?:the\s+)?delivery)?\s+(?:locations|deliveries)"),
+    ("recharge_battery", r"recharge(?:\s+(?:the\s+)?battery)?"),
+    ("get_battery_status", r"(?:(?:check|get|show)\s+)?(?:the\s+)?battery(?:\s+(?:status|level|charge))?"),
+    ("get_flight_statistics", r"(?:(?:get|show)\s+)?flight\s+(?:stats|statistics|information|info)"),
+    ("get_full_telemetry", r"(?:(?:get|show)\s+)?(?:full\s+)?telemetry|(?:drone\s+)?status"),
+    ("set_wind", r"(?:set\s+)?wind(?:\s+speed)?"),
+    ("detect_obstacles_opencv", r"(?:detect|scan for|check for|look for)\s+obstacles|scan"),
+    ("verify_delivery_otp", r"verify(?:\s+(?:the\s+)?(?:delivery\s+)?otp)?"),
+    ("update_delivery_status", r"(?:update|set)\s+(?:the\s+)?(?:delivery\s+)?status(?:\s+to)?"),
+]
+
+NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\d.])")
+# Units, fillers and punctuation that carry no argument value
+_UNITS = (
+    r"\b(?:meters per second|metres per second|m/s|mps|meters|metres|meter|metre|m|"
+    r"kilograms|kg|kgs|percent|degrees|deg)\b|%|[,():]"
+)
+_FILLER = (
+    rf"(?:{_UNITS}|\b(?:the|a|an|to|at|of|by|for|named|called|with|and|please|now|drone|altitude|"
+    r"height|distance|x|y|z|radius|direction|speed|heading)\b)"
+)
+FILLER_RE = re.compile(_FILLER, re.IGNORECASE)
+# Text arguments keep their inner words: only leading fillers and trailing units are dropped
+EDGE_FILLER_RE = re.compile(
+    rf"^(?:\s|{_FILLER})+|(?:\s|{_UNITS}|\b(?:of|at|to|with|weighing|and)\b)+$", re.IGNORECASE
+)
+SPACES_RE = re.compile(r"\s+")
+TRAILING_PUNCT = " \t.!?;:"
+
+NUMERIC_TYPES = (float, int)
+
+
+class _ToolSpec:
+    """Argument layout of one tool, read from its signature"""
+
+    def __init__(self, name: str, fn: Callable):
+        self.name = name
+        self.numeric: List[inspect.Parameter] = []
+        self.text: List[inspect.Parameter] = []
+        for param in inspect.signature(fn).parameters.values():
+            (self.numeric if param.annotation in NUMERIC_TYPES else self.text).append(param)
+        self.required_numbers = sum(1 for p in self.numeric if p.default is inspect.Parameter.empty)
+
+    def bind(self, tail: str) -> Optional[dict]:
+        """Build the args dict from the text after the trigger, or None if it doesn't fit"""
+        matches = list(NUMBER_RE.finditer(tail))
+        if len(matches) < self.required_numbers:
+            return None
+        if len(matches) > len(self.numeric) and not self.text:
+            return None
+
+        args = {}
+        for param, match in zip(self.numeric, matches):
+            value = float(match.group())
+            if param.annotation is int:
+                if not value.is_integer():
+                    return None
+                value = int(value)
+            args[param.name] = value
+
+        # Drop the numbers consumed above; string arguments may keep the rest
+        pieces, last = [], 0
+        for match in matches[:len(args)]:
+            pieces.append(tail[last:match.start()])
+            last = match.end()
+        pieces.append(tail[last:])
+        tail = " ".join(pieces)
+
+        if self.text:
+            # Free text goes to the first string argument (e.g. item_name, location_name)
+            rest = SPACES_RE.sub(" ", EDGE_FILLER_RE.sub("", tail))
+            if rest:
+                args[self.text[0].name] = rest
+            elif self.text[0].default is inspect.Parameter.empty:
+                return None
+        elif FILLER_RE.sub("", tail).strip():
+            # Leftover words on a tool without text arguments: not a routine command
+            return None
+        return args
+
+
+class CommandParser:
+    """Compiled fast-path parser for a name -> tool function table"""
+
+    def __init__(self, tools: Dict[str, Callable], grammar=COMMAND_GRAMMAR):
+        self.specs: Dict[str, _ToolSpec] = {}
+        alternatives = []
+        for name, trigger in grammar:
+            if name not in tools:
+                continue
+            self.specs[name] = _ToolSpec(name, tools[name])
+            alternatives.append(f"(?P<{name}>{trigger})")
+        self.missing = sorted(set(tools) - set(self.specs))
+        self._pattern = re.compile(r"\s*(?:" + "|".join(alternatives) + r")(?![\w-])", re.IGNORECASE)
+
+    def parse(self, command: str) -> Optional[dict]:
+        """Return {"tool": name, "args": {...}} for a routine command, else None"""
+        command = command.strip(TRAILING_PUNCT)
+        match = self._pattern.match(command)
+        if match is None:
+            return None
+        spec = self.specs[match.lastgroup]
+        args = spec.bind(command[match.end():])
+        if args is None:
+            return None
+        return {"tool": spec.name, "args": args}
+
+
+_command_parser = None
+_parser_lock = threading.Lock()
+
+
+def get_command_parser() -> CommandParser:
+    """Get the parser for the tools exported by the tools package"""
+    global _command_parser
+    if _command_parser is None:
+        with _parser_lock:
+            if _command_parser is None:
+                from tools.registry import get_tool_registry
+                _command_parser = CommandParser(get_tool_registry().functions)
+    return _command_parser
+
+
+def parse_command(command: str) -> Optional[dict]:
+    return get_command_parser().parse(command)
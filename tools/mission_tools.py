@@ -1,26 +1,30 @@
-from utils.drone_visualizer import get_visualizer
+from utils.context import get_context
 
-# Payload tracking
-_payload_loaded = False
-_delivery_locations = {}
+# Payload tracking lives on the active DroneContext (payload_loaded, delivery_locations)
+DEFAULT_PAYLOAD_WEIGHT = 0.5  # kg
 
-def load_payload(item_name: str = "package") -> str:
+def load_payload(item_name: str = "package", weight_kg: float = DEFAULT_PAYLOAD_WEIGHT) -> str:
     """Load payload onto drone"""
-    global _payload_loaded
-    _payload_loaded = True
-    return f"[MISSION] Payload '{item_name}' loaded successfully."
+    ctx = get_context()
+    try:
+        ctx.physics.set_payload(weight_kg)
+    except ValueError as e:
+        return f"[MISSION] ERROR: {e}"
+    
+    ctx.payload_loaded = True
+    return f"[MISSION] Payload '{item_name}' ({weight_kg:.2f} kg) loaded successfully."
 
 def drop_payload(location_name: str = "current location") -> str:
     """Drop payload at current location"""
-    global _payload_loaded
-    visualizer = get_visualizer()
-    current = visualizer.get_current_position()
+    ctx = get_context()
+    current = ctx.visualizer.get_current_position()
     
-    if not _payload_loaded:
+    if not ctx.payload_loaded:
         return "[MISSION] ERROR: No payload loaded!"
     
-    _payload_loaded = False
-    _delivery_locations[location_name] = current.copy()
+    ctx.payload_loaded = False
+    ctx.physics.set_payload(0.0)
+    ctx.delivery_locations[location_name] = current.copy()
     
     return f"[MISSION] Payload dropped at {location_name} - Coordinates: ({current[0]:.1f}, {current[1]:.1f}, {current[2]:.1f})"
 
@@ -28,7 +32,7 @@ def deliver_to_location(x: float, y: float, z: float, location_name: str = "deli
     """Fly to location and drop payload"""
     from tools.navigation_tools import move_to_location
     
-    if not _payload_loaded:
+    if not get_context().payload_loaded:
         return "[MISSION] ERROR: No payload loaded! Use load_payload first."
     
     # Move to location
@@ -48,21 +52,26 @@ def return_to_base_and_land() -> str:
 
 def check_payload_status() -> str:
     """Check if payload is loaded"""
-    status = "LOADED" if _payload_loaded else "EMPTY"
-    return f"[MISSION] Payload status: {status}"
+    ctx = get_context()
+    if ctx.payload_loaded:
+        return f"[MISSION] Payload status: LOADED ({ctx.physics.payload_mass:.2f} kg)"
+    return "[MISSION] Payload status: EMPTY"
 
 def list_delivery_locations() -> str:
     """List all delivery locations"""
-    if not _delivery_locations:
+    delivery_locations = get_context().delivery_locations
+    if not delivery_locations:
         return "[MISSION] No deliveries made yet."
     
     locations = "\n".join([f"  - {name}: ({pos[0]:.1f}, {pos[1]:.1f}, {pos[2]:.1f})" 
-                          for name, pos in _delivery_locations.items()])
+                          for name, pos in delivery_locations.items()])
     return f"[MISSION] Delivery locations:\n{locations}"
 
 def verify_delivery_otp(otp: int) -> bool:
+    """Verify the recipient's one-time delivery password"""
     VALID_OTP = 1234
     return otp == VALID_OTP
 
 def update_delivery_status(status: str) -> str:
+    """Report a delivery status update"""
     return f"[MISSION STATUS] {status}"
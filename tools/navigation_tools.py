@@ -4,6 +4,7 @@ from utils.path_planner import get_path_planner
 from utils.physics import get_physics
 
 def takeoff(height: float) -> str:
+    """Take off to specified height (meters)"""
     visualizer = get_visualizer()
     physics = get_physics()
     
@@ -21,6 +22,7 @@ def takeoff(height: float) -> str:
     return f"[DRONE] Takeoff to {height}m - Time: {time_taken:.1f}s, Energy: {energy:.2f}Wh, Battery: {physics.battery_percentage:.1f}%"
 
 def move_to_location(x: float, y: float, z: float) -> str:
+    """Move to absolute coordinates (meters)"""
     visualizer = get_visualizer()
     physics = get_physics()
     
@@ -108,6 +110,7 @@ def get_current_location() -> str:
     return f"[DRONE] Current position: X={current[0]}, Y={current[1]}, Z={current[2]}"
 
 def land() -> str:
+    """Land at current position"""
     visualizer = get_visualizer()
     physics = get_physics()
     
@@ -186,46 +189,48 @@ def add_no_fly_zone(min_x: float, max_x: float, min_y: float,
 def get_battery_status() -> str:
     """Get battery status"""
     physics = get_physics()
-    telemetry = physics.get_telemetry()
+    telemetry = physics.telemetry
     
     return f"""[TELEMETRY] Battery Status:
-  - Charge: {telemetry['battery_percentage']:.1f}% ({telemetry['battery_remaining_mah']:.0f} mAh)
-  - Flight time remaining: {telemetry['flight_time_remaining']:.1f} minutes
-  - Energy consumed: {telemetry['energy_consumed']:.2f} Wh"""
+  - Charge: {telemetry.battery_percentage:.1f}% ({telemetry.battery_remaining_mah:.0f} mAh)
+  - Voltage: {telemetry.battery_voltage:.2f} V
+  - Flight time remaining: {telemetry.flight_time_remaining:.1f} minutes
+  - Energy consumed: {telemetry.energy_consumed:.2f} Wh"""
 
 
 def get_flight_statistics() -> str:
     """Get flight statistics"""
     physics = get_physics()
-    telemetry = physics.get_telemetry()
+    telemetry = physics.telemetry
     
     return f"""[TELEMETRY] Flight Statistics:
-  - Current altitude: {telemetry['position'][2]:.1f} m
-  - Current speed: {telemetry['current_speed']:.2f} m/s
-  - Max speed reached: {telemetry['max_speed_reached']:.2f} m/s
-  - Max altitude: {telemetry['max_altitude']:.1f} m
-  - Total distance: {telemetry['total_distance']:.1f} m
-  - Total flight time: {telemetry['total_flight_time']:.1f} s"""
+  - Current altitude: {telemetry.position[2]:.1f} m
+  - Current speed: {telemetry.current_speed:.2f} m/s
+  - Max speed reached: {telemetry.max_speed_reached:.2f} m/s
+  - Max altitude: {telemetry.max_altitude:.1f} m
+  - Total distance: {telemetry.total_distance:.1f} m
+  - Total flight time: {telemetry.total_flight_time:.1f} s"""
 
 
 def get_full_telemetry() -> str:
     """Get complete telemetry"""
     physics = get_physics()
-    telemetry = physics.get_telemetry()
+    telemetry = physics.telemetry
     
-    status = "FLYING" if telemetry['is_flying'] else "LANDED"
+    status = "FLYING" if telemetry.is_flying else "LANDED"
     
     return f"""[TELEMETRY] Complete Drone Status:
   - Status: {status}
-  - Position: X={telemetry['position'][0]:.1f}m, Y={telemetry['position'][1]:.1f}m, Z={telemetry['position'][2]:.1f}m
-  - Velocity: X={telemetry['velocity'][0]:.2f}m/s, Y={telemetry['velocity'][1]:.2f}m/s, Z={telemetry['velocity'][2]:.2f}m/s
-  - Current speed: {telemetry['current_speed']:.2f} m/s
-  - Battery: {telemetry['battery_percentage']:.1f}% ({telemetry['battery_remaining_mah']:.0f} mAh)
-  - Flight time remaining: {telemetry['flight_time_remaining']:.1f} minutes
-  - Energy consumed: {telemetry['energy_consumed']:.2f} Wh
-  - Total distance: {telemetry['total_distance']:.1f} m
-  - Max speed: {telemetry['max_speed_reached']:.2f} m/s
-  - Max altitude: {telemetry['max_altitude']:.1f} m"""
+  - Position: X={telemetry.position[0]:.1f}m, Y={telemetry.position[1]:.1f}m, Z={telemetry.position[2]:.1f}m
+  - Velocity: X={telemetry.velocity[0]:.2f}m/s, Y={telemetry.velocity[1]:.2f}m/s, Z={telemetry.velocity[2]:.2f}m/s
+  - Current speed: {telemetry.current_speed:.2f} m/s
+  - Battery: {telemetry.battery_percentage:.1f}% ({telemetry.battery_remaining_mah:.0f} mAh, {telemetry.battery_voltage:.2f} V)
+  - Payload: {telemetry.payload_mass:.2f} kg
+  - Flight time remaining: {telemetry.flight_time_remaining:.1f} minutes
+  - Energy consumed: {telemetry.energy_consumed:.2f} Wh
+  - Total distance: {telemetry.total_distance:.1f} m
+  - Max speed: {telemetry.max_speed_reached:.2f} m/s
+  - Max altitude: {telemetry.max_altitude:.1f} m"""
 
 
 def recharge_battery(percentage: float = 100.0) -> str:
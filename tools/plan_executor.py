@@ -0,0 +1,223 @@
+"""
+Multi-step mission plans: many tool calls from one LLM response
+
+A plan is an ordered list of tool calls, or a DAG when steps name their
+dependencies:
+
+    {"plan": [
+        {"id": "load", "tool": "load_payload", "args": {"item_name": "package"}},
+        {"id": "up", "tool": "takeoff", "args": {"height": 30}, "after": ["load"]},
+        ...
+    ]}
+
+Without any "after" keys each step depends on the previous one. Plans are
+validated up front (known tools, argument types, ids, dependency cycles) and
+dry-run against a copy of the drone state, so an infeasible mission (takeoff
+missing, payload too heavy, battery below reserve) is rejected before the
+drone moves. Steps run in dependency order; when a step fails, the steps that
+depend on it are skipped.
+"""
+import contextvars
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from tools.registry import ToolCallError, get_tool_registry
+from utils.context import get_context, use_context
+
+# Battery percentage the dry run must still show at the end of the plan
+RESERVE_BATTERY = 10.0
+# Tools that touch real hardware and are assumed to succeed in dry runs
+NOT_SIMULATED = {"detect_obstacles_opencv"}
+
+_dry_run = contextvars.ContextVar("plan_dry_run", default=False)
+
+
+class _DryRunFilter(logging.Filter):
+    """Keep simulated steps out of the physics log"""
+
+    def filter(self, record):
+        return not _dry_run.get()
+
+
+logging.getLogger("DronePhysics").addFilter(_DryRunFilter())
+
+
+class PlanError(ValueError):
+    """A plan is malformed: bad step, duplicate id, unknown dependency or cycle"""
+
+
+@dataclass
+class PlanStep:
+    id: str
+    tool: str
+    args: dict
+    after: List[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        args = ", ".join(f"{key}={value!r}" for key, value in self.args.items())
+        return f"{self.tool}({args})"
+
+
+@dataclass
+class StepResult:
+    step: PlanStep
+    status: str  # "ok", "failed" or "skipped"
+    result: object = None
+
+
+@dataclass
+class PlanReport:
+    results: List[StepResult]
+    feasible: bool = True
+    reason: str = ""
+    battery_start: float = 0.0
+    battery_end: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.feasible and all(r.status == "ok" for r in self.results)
+
+    def summary(self) -> str:
+        lines = []
+        total = len(self.results)
+        for i, r in enumerate(self.results, 1):
+            lines.append(f"[STEP {i}/{total}] {r.step.describe()} - {r.status.upper()}")
+            if r.result is not None:
+                lines.append(f"  {r.result}")
+        if not self.feasible:
+            lines.append(f"[PLAN] REJECTED: {self.reason}")
+        else:
+            lines.append(f"[PLAN] Battery {self.battery_start:.1f}% -> {self.battery_end:.1f}%")
+        return "\n".join(lines)
+
+
+def is_plan(obj) -> bool:
+    return isinstance(obj, dict) and "plan" in obj
+
+
+def step_failed(result) -> bool:
+    """Tools report errors in their result ('[DRONE] ERROR: ...') or return False"""
+    return result is False or (isinstance(result, str) and "ERROR" in result)
+
+
+def parse_plan(obj, registry=None) -> List[PlanStep]:
+    """Validate a tool call, list of tool calls or {"plan": [...]} into steps in execution order"""
+    registry = registry or get_tool_registry()
+    raw = obj["plan"] if is_plan(obj) else obj
+    if isinstance(raw, dict):
+        raw = [raw]
+    if not isinstance(raw, list) or not raw:
+        raise PlanError("A plan must be a non-empty list of tool calls")
+
+    is_dag = any(isinstance(item, dict) and "after" in item for item in raw)
+    steps = []
+    ids = set()
+    for index, item in enumerate(raw):
+        try:
+            call = registry.validate(item)
+        except ToolCallError as e:
+            raise PlanError(f"Step {index + 1}: {e}")
+        step_id = str(item.get("id", index + 1))
+        if step_id in ids:
+            raise PlanError(f"Duplicate step id {step_id!r}")
+        ids.add(step_id)
+
+        if is_dag:
+            after = item.get("after") or []
+            if not isinstance(after, list):
+                after = [after]
+            after = [str(dep) for dep in after]
+        else:
+            after = [steps[-1].id] if steps else []
+        steps.append(PlanStep(step_id, call["tool"], call["args"], after))
+
+    for step in steps:
+        unknown = [dep for dep in step.after if dep not in ids]
+        if unknown:
+            raise PlanError(f"Step {step.id!r} depends on unknown step(s) {', '.join(unknown)}")
+
+    # Kahn's algorithm, keeping the given order among ready steps
+    order = []
+    done = set()
+    pending = list(steps)
+    while pending:
+        ready = [s for s in pending if all(dep in done for dep in s.after)]
+        if not ready:
+            raise PlanError(f"Dependency cycle between steps {', '.join(s.id for s in pending)}")
+        for step in ready:
+            order.append(step)
+            done.add(step.id)
+        pending = [s for s in pending if s.id not in done]
+    return order
+
+
+def _run(steps: List[PlanStep], registry, simulate: bool) -> List[StepResult]:
+    results = []
+    failed = set()
+    for step in steps:
+        if any(dep in failed for dep in step.after):
+            failed.add(step.id)
+            results.append(StepResult(step, "skipped"))
+            continue
+        if simulate and step.tool in NOT_SIMULATED:
+            results.append(StepResult(step, "ok", "(not simulated)"))
+            continue
+        try:
+            result = registry.functions[step.tool](**step.args)
+        except Exception as e:
+            result = f"ERROR: {e}"
+        if step_failed(result):
+            failed.add(step.id)
+            results.append(StepResult(step, "failed", result))
+        else:
+            results.append(StepResult(step, "ok", result))
+    return results
+
+
+def dry_run(steps: List[PlanStep], ctx=None, registry=None,
+            reserve: float = RESERVE_BATTERY) -> PlanReport:
+    """Simulate the plan on a copy of ctx (default: active context) without touching the drone"""
+    registry = registry or get_tool_registry()
+    sim = (ctx or get_context()).clone()
+    battery_start = sim.physics.battery_percentage
+
+    token = _dry_run.set(True)
+    try:
+        with use_context(sim):
+            results = _run(steps, registry, simulate=True)
+    finally:
+        _dry_run.reset(token)
+
+    report = PlanReport(results, battery_start=battery_start,
+                        battery_end=sim.physics.battery_percentage)
+    failures = [r for r in results if r.status == "failed"]
+    if failures:
+        report.feasible = False
+        report.reason = f"step {failures[0].step.id} ({failures[0].step.tool}) would fail: {failures[0].result}"
+    elif report.battery_end < reserve:
+        report.feasible = False
+        report.reason = f"battery would end at {report.battery_end:.1f}% (reserve {reserve:.0f}%)"
+    return report
+
+
+def execute_plan(plan, registry=None, check: Optional[bool] = None,
+                 reserve: float = RESERVE_BATTERY) -> PlanReport:
+    """Validate and run a tool call or plan on the active drone.
+
+    check: dry-run first and refuse infeasible plans (default: for multi-step plans).
+    Raises PlanError for malformed plans.
+    """
+    registry = registry or get_tool_registry()
+    steps = parse_plan(plan, registry)
+    if check is None:
+        check = len(steps) > 1
+    if check:
+        report = dry_run(steps, registry=registry, reserve=reserve)
+        if not report.feasible:
+            return report
+
+    ctx = get_context()
+    battery_start = ctx.physics.battery_percentage
+    results = _run(steps, registry, simulate=False)
+    return PlanReport(results, battery_start=battery_start, battery_end=ctx.physics.battery_percentage)
@@ -0,0 +1,135 @@
+"""
+Tool registry: JSON schemas and validated dispatch for the agent's tools
+
+Schemas are introspected once from the tool functions (name, first docstring
+line, annotated parameters and defaults) and handed to the LLM providers for
+native function calling. Tool calls are dispatched from the precomputed
+name -> function table after their arguments are checked and coerced:
+
+    registry = get_tool_registry()
+    registry.dispatch({"tool": "takeoff", "args": {"height": "15"}})  # height -> 15.0
+"""
+import inspect
+import threading
+from typing import Callable, Dict, List
+
+JSON_TYPES = {float: "number", int: "integer", str: "string", bool: "boolean"}
+
+
+class ToolCallError(ValueError):
+    """A tool call names an unknown tool or has invalid arguments"""
+
+
+def _coerce(value, json_type: str, name: str):
+    """Convert an LLM-supplied argument to the parameter's type, or raise ToolCallError"""
+    if json_type in ("number", "integer"):
+        if isinstance(value, bool):
+            raise ToolCallError(f"'{name}' must be a {json_type}, got {value!r}")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ToolCallError(f"'{name}' must be a {json_type}, got {value!r}")
+        if json_type == "number":
+            return number
+        if not number.is_integer():
+            raise ToolCallError(f"'{name}' must be an integer, got {value!r}")
+        return int(number)
+    if json_type == "boolean":
+        if isinstance(value, bool):
+            return value
+        raise ToolCallError(f"'{name}' must be true or false, got {value!r}")
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ToolCallError(f"'{name}' must be a string, got {value!r}")
+
+
+class ToolSpec:
+    """One tool: its function, JSON schema and parameter types"""
+
+    def __init__(self, fn: Callable):
+        self.name = fn.__name__
+        self.fn = fn
+        doc = inspect.getdoc(fn)
+        self.description = doc.splitlines()[0] if doc else self.name.replace("_", " ")
+
+        self.types: Dict[str, str] = {}
+        self.required: List[str] = []
+        properties = {}
+        for param in inspect.signature(fn).parameters.values():
+            json_type = JSON_TYPES.get(param.annotation, "string")
+            self.types[param.name] = json_type
+            prop = {"type": json_type}
+            if param.default is inspect.Parameter.empty:
+                self.required.append(param.name)
+            else:
+                prop["default"] = param.default
+            properties[param.name] = prop
+
+        self.schema = {
+            "name": self.name,
+            "description": self.description,
+            "parameters": {"type": "object", "properties": properties, "required": self.required},
+        }
+
+    def validate_args(self, args) -> dict:
+        """Checked and type-coerced copy of args"""
+        if args is None:
+            args = {}
+        if not isinstance(args, dict):
+            raise ToolCallError(f"{self.name}: args must be an object, got {args!r}")
+        unknown = [key for key in args if key not in self.types]
+        if unknown:
+            raise ToolCallError(f"{self.name}: unknown argument(s) {', '.join(unknown)}")
+        missing = [key for key in self.required if key not in args]
+        if missing:
+            raise ToolCallError(f"{self.name}: missing argument(s) {', '.join(missing)}")
+        return {key: _coerce(value, self.types[key], key) for key, value in args.items()}
+
+
+class ToolRegistry:
+    """Name -> tool table with schemas for function calling"""
+
+    def __init__(self, functions: List[Callable]):
+        self.specs: Dict[str, ToolSpec] = {}
+        for fn in functions:
+            spec = ToolSpec(fn)
+            self.specs[spec.name] = spec
+        self.functions: Dict[str, Callable] = {name: spec.fn for name, spec in self.specs.items()}
+        self._schemas = [spec.schema for spec in self.specs.values()]
+
+    def schemas(self) -> List[dict]:
+        """Provider-neutral function declarations: [{"name", "description", "parameters"}]"""
+        return self._schemas
+
+    def ollama_tools(self) -> List[dict]:
+        """Schemas in the format of Ollama's /api/chat 'tools' field"""
+        return [{"type": "function", "function": schema} for schema in self._schemas]
+
+    def validate(self, tool_call) -> dict:
+        """Normalised {"tool", "args"} for a tool call, or raise ToolCallError"""
+        if not isinstance(tool_call, dict):
+            raise ToolCallError(f"Tool call must be an object, got {tool_call!r}")
+        spec = self.specs.get(tool_call.get("tool"))
+        if spec is None:
+            raise ToolCallError(f"Unknown tool: {tool_call.get('tool')!r}")
+        return {"tool": spec.name, "args": spec.validate_args(tool_call.get("args"))}
+
+    def dispatch(self, tool_call):
+        """Validate a tool call and run it. Returns the tool's result."""
+        call = self.validate(tool_call)
+        return self.functions[call["tool"]](**call["args"])
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Get the registry for the tools exported by the tools package"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                import tools
+                _registry = ToolRegistry([getattr(tools, name) for name in tools.__all__])
+    return _registry
@@ -1,26 +1,33 @@
-import cv2
-import numpy as np
+import weakref
 
+from utils.context import get_default_context
+from utils.vision_pipeline import get_vision_pipeline, obstacles_to_world
 
-def detect_obstacles_opencv() -> dict:
-    cap = cv2.VideoCapture(0)
-
-    if not cap.isOpened():
-        return {"obstacle_detected": False, "reason": "Camera unavailable"}
-
-    ret, frame = cap.read()
-    cap.release()
+# Newest frame index mapped into each planner, so a result is mapped only once
+_mapped_frames = weakref.WeakKeyDictionary()
 
-    if not ret:
-        return {"obstacle_detected": False, "reason": "Frame capture failed"}
 
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    edges = cv2.Canny(gray, 100, 200)
-
-    edge_pixels = int(np.sum(edges > 0))
-    obstacle = edge_pixels > 5000
-
-    return {
-        "obstacle_detected": obstacle,
-        "edge_pixel_count": edge_pixels
-    }
+def detect_obstacles_opencv() -> dict:
+    """Check the camera feed for obstacles"""
+    # The camera stays open in a background pipeline that analyzes every frame;
+    # this returns its latest result instead of capturing a frame per call.
+    pipeline = get_vision_pipeline()
+    result = pipeline.latest_result()
+
+    if result is None:
+        return {"obstacle_detected": False, "reason": pipeline.error or "Camera unavailable"}
+
+    # Located obstacles go into the path planner, so plan_path_to avoids them. Only frames
+    # that passed the obstacle check are mapped, each once, from where the drone was at capture.
+    # The camera (and the position sampled with its frames) belongs to the process's default
+    # drone, so its planner is the one mapped into, whichever context is calling.
+    ctx = get_default_context()
+    planner = ctx.path_planner
+    if (result["obstacle_detected"] and result["obstacles"]
+            and result["frame_index"] > _mapped_frames.get(planner, -1)):
+        position = result.get("position") or ctx.physics.telemetry.position
+        world = obstacles_to_world(result["obstacles"], position)
+        result["mapped_cells"] = planner.add_obstacles(world)
+        _mapped_frames[planner] = result["frame_index"]
+
+    return result
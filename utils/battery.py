@@ -0,0 +1,119 @@
+"""
+LiPo battery model with discharge curve and voltage sag
+
+The discharge curve is resampled once into uniform lookup tables
+(open-circuit voltage and stored energy vs. state of charge, plus the
+inverse), so each simulation step costs a couple of O(1) interpolations.
+"""
+import math
+from functools import lru_cache
+
+# Resting LiPo cell voltage vs. state of charge (0 = cutoff, 1 = full)
+LIPO_DISCHARGE_CURVE = (
+    (0.00, 3.27), (0.05, 3.61), (0.10, 3.69), (0.15, 3.71), (0.20, 3.73),
+    (0.25, 3.75), (0.30, 3.77), (0.35, 3.79), (0.40, 3.80), (0.45, 3.82),
+    (0.50, 3.84), (0.55, 3.85), (0.60, 3.87), (0.65, 3.91), (0.70, 3.95),
+    (0.75, 3.98), (0.80, 4.02), (0.85, 4.08), (0.90, 4.11), (0.95, 4.15),
+    (1.00, 4.20),
+)
+
+TABLE_STEPS = 1000
+
+
+def _curve_voltage(soc: float) -> float:
+    """Cell voltage at soc by linear interpolation of LIPO_DISCHARGE_CURVE"""
+    for (s0, v0), (s1, v1) in zip(LIPO_DISCHARGE_CURVE, LIPO_DISCHARGE_CURVE[1:]):
+        if soc <= s1:
+            return v0 + (v1 - v0) * (soc - s0) / (s1 - s0)
+    return LIPO_DISCHARGE_CURVE[-1][1]
+
+
+def _lookup(table: tuple, x: float) -> float:
+    """Interpolate a table sampled uniformly over [0, 1]"""
+    pos = min(max(x, 0.0), 1.0) * (len(table) - 1)
+    i = int(pos)
+    if i >= len(table) - 1:
+        return table[-1]
+    return table[i] + (table[i + 1] - table[i]) * (pos - i)
+
+
+@lru_cache(maxsize=None)
+def _build_tables(cells: int, capacity_mah: float, steps: int = TABLE_STEPS):
+    """
+    Returns (ocv, energy, soc_by_energy):
+    ocv[i]           pack open-circuit voltage at soc = i / steps
+    energy[i]        Wh stored above cutoff at soc = i / steps
+    soc_by_energy[k] soc holding k / steps of the full-charge energy
+    """
+    ocv = tuple(cells * _curve_voltage(i / steps) for i in range(steps + 1))
+
+    capacity_ah = capacity_mah / 1000.0
+    energy = [0.0]
+    for i in range(1, steps + 1):
+        energy.append(energy[-1] + 0.5 * (ocv[i - 1] + ocv[i]) * capacity_ah / steps)
+
+    total = energy[-1]
+    soc_by_energy = []
+    j = 0
+    for k in range(steps + 1):
+        target = total * k / steps
+        while j < steps - 1 and energy[j + 1] < target:
+            j += 1
+        frac = (target - energy[j]) / (energy[j + 1] - energy[j])
+        soc_by_energy.append((j + min(max(frac, 0.0), 1.0)) / steps)
+
+    return ocv, tuple(energy), tuple(soc_by_energy)
+
+
+class Battery:
+    """Multi-cell LiPo pack tracked by state of charge"""
+
+    CELL_RESISTANCE = 0.015  # ohm per cell (small 3S pack, ~45 mOhm total)
+
+    def __init__(self, capacity_mah: float = 2250.0, cells: int = 3,
+                 cell_resistance: float = None):
+        self.capacity_mah = capacity_mah
+        self.cells = cells
+        self.resistance = cells * (self.CELL_RESISTANCE if cell_resistance is None else cell_resistance)
+        self._ocv, self._energy, self._soc_by_energy = _build_tables(cells, float(capacity_mah))
+        self.capacity_wh = self._energy[-1]
+        self.soc = 1.0
+
+    @property
+    def percentage(self) -> float:
+        return self.soc * 100
+
+    @property
+    def remaining_mah(self) -> float:
+        return self.soc * self.capacity_mah
+
+    @property
+    def open_circuit_voltage(self) -> float:
+        return _lookup(self._ocv, self.soc)
+
+    def loaded_voltage(self, power_w: float) -> float:
+        """Terminal voltage while delivering power_w (sag across internal resistance)"""
+        v_oc = self.open_circuit_voltage
+        # P = (V_oc - I*R) * I  ->  I = (V_oc - sqrt(V_oc^2 - 4*R*P)) / (2*R)
+        disc = v_oc * v_oc - 4 * self.resistance * max(power_w, 0.0)
+        current = (v_oc - math.sqrt(max(disc, 0.0))) / (2 * self.resistance)
+        return v_oc - current * self.resistance
+
+    def remaining_energy_wh(self, power_w: float = 0.0) -> float:
+        """Energy deliverable above cutoff at a constant load of power_w"""
+        stored = _lookup(self._energy, self.soc)
+        if power_w <= 0 or stored <= 0:
+            return stored
+        return stored * self.loaded_voltage(power_w) / self.open_circuit_voltage
+
+    def draw(self, energy_wh: float, power_w: float):
+        """Deliver energy_wh at power_w; resistive losses come out of the pack too"""
+        if energy_wh <= 0 or self.soc <= 0:
+            return
+        v_oc = self.open_circuit_voltage
+        drawn = energy_wh * v_oc / max(self.loaded_voltage(power_w), 1e-6)
+        stored = _lookup(self._energy, self.soc) - drawn
+        self.soc = _lookup(self._soc_by_energy, stored / self.capacity_wh) if stored > 0 else 0.0
+
+    def set_percentage(self, percentage: float):
+        self.soc = min(max(percentage / 100.0, 0.0), 1.0)
@@ -0,0 +1,143 @@
+"""
+Per-drone simulation context
+
+A DroneContext owns all mutable state for one drone / agent session
+(physics, visualizer, path planner, GPS converter and mission state).
+The active context is tracked in a ContextVar, so every thread or asyncio
+task can fly its own drone through the unchanged tool functions:
+
+    ctx = DroneContext()
+    with use_context(ctx):
+        takeoff(20)
+
+Set FLIGHT_LOG to a file path to record the default context's flight
+history (utils.flight_recorder); the API server takes FLIGHT_LOG_DIR for one
+log per session.
+"""
+import contextvars
+import copy
+import os
+import threading
+from contextlib import contextmanager
+
+from utils.physics import DronePhysics
+
+FLIGHT_LOG = os.getenv("FLIGHT_LOG") or None
+
+
+class DroneContext:
+    """All state belonging to one drone"""
+
+    def __init__(self, physics=None, visualizer=None, path_planner=None, gps_converter=None,
+                 recorder=None):
+        self.physics = physics if physics is not None else DronePhysics()
+        # Optional utils.flight_recorder.FlightRecorder for this drone
+        self.recorder = recorder
+        if recorder is not None:
+            self.physics.recorder = recorder
+        # Heavier components (matplotlib, networkx, geopy) are created on first use
+        self._visualizer = visualizer
+        self._path_planner = path_planner
+        self._gps_converter = gps_converter
+
+        # Mission state
+        self.payload_loaded = False
+        self.delivery_locations = {}
+
+    @property
+    def visualizer(self):
+        if self._visualizer is None:
+            from utils.drone_visualizer import DroneVisualizer
+            self._visualizer = DroneVisualizer(physics=self.physics)
+        return self._visualizer
+
+    @property
+    def path_planner(self):
+        if self._path_planner is None:
+            from utils.path_planner import PathPlanner
+            self._path_planner = PathPlanner()
+        return self._path_planner
+
+    @property
+    def gps_converter(self):
+        if self._gps_converter is None:
+            from utils.gps_utils import GPSConverter
+            self._gps_converter = GPSConverter()
+        return self._gps_converter
+
+    def clone(self) -> "DroneContext":
+        """Independent copy of this drone's state for dry runs (headless, no flight recorder)"""
+        recorder, self.physics.recorder = self.physics.recorder, None
+        try:
+            physics = copy.deepcopy(self.physics)
+        finally:
+            self.physics.recorder = recorder
+
+        from utils.drone_visualizer import DroneVisualizer
+        visualizer = DroneVisualizer(physics=physics)
+        visualizer.positions = [list(self.visualizer.get_current_position())]
+
+        ctx = DroneContext(physics=physics, visualizer=visualizer,
+                           path_planner=copy.deepcopy(self._path_planner),
+                           gps_converter=self._gps_converter)
+        ctx.payload_loaded = self.payload_loaded
+        ctx.delivery_locations = dict(self.delivery_locations)
+        return ctx
+
+    def close(self):
+        """Write out and close the flight recorder, if any"""
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def reset_physics(self):
+        """Replace the physics state with a fresh drone"""
+        self.physics = DronePhysics()
+        self.physics.recorder = self.recorder
+        self.payload_loaded = False  # the fresh drone carries no payload
+        if self._visualizer is not None:
+            self._visualizer.physics = self.physics
+
+
+_current_context = contextvars.ContextVar("drone_context", default=None)
+_default_context = None
+_default_lock = threading.Lock()
+
+
+def get_default_context() -> DroneContext:
+    """Get or create the process-wide context used when none is active"""
+    global _default_context
+    if _default_context is None:
+        with _default_lock:
+            if _default_context is None:
+                recorder = None
+                if FLIGHT_LOG:
+                    from utils.flight_recorder import FlightRecorder
+                    recorder = FlightRecorder(FLIGHT_LOG)
+                _default_context = DroneContext(recorder=recorder)
+    return _default_context
+
+
+def get_context() -> DroneContext:
+    """Get the context active in the current thread / asyncio task"""
+    ctx = _current_context.get()
+    return ctx if ctx is not None else get_default_context()
+
+
+def set_context(ctx: DroneContext):
+    """Activate ctx for the current thread / task. Returns a token for reset_context"""
+    return _current_context.set(ctx)
+
+
+def reset_context(token):
+    """Restore the context that was active before set_context"""
+    _current_context.reset(token)
+
+
+@contextmanager
+def use_context(ctx: DroneContext):
+    """Run a block of tool calls against ctx"""
+    token = set_context(ctx)
+    try:
+        yield ctx
+    finally:
+        reset_context(token)
@@ -10,8 +10,10 @@ import numpy as np
 class DroneVisualizer:
     """Advanced 3D drone simulator with realistic visualization"""
     
-    def __init__(self):
+    def __init__(self, physics=None):
         self.positions = [[0, 0, 0]]  # Flight path
+        # Physics of the drone being drawn (None = active context's physics)
+        self.physics = physics
         self.fig = None
         self.ax_3d = None
         self.ax_side = None
@@ -36,8 +38,8 @@ class DroneVisualizer:
         end = _np.array([x, y, z], dtype=float)
         dist = _np.linalg.norm(end - start)
 
-        if dist < 1e-3:
-            # negligible movement
+        if dist < 1e-3 or self.fig is None:
+            # negligible movement, or headless (no window to animate)
             self.positions.append([x, y, z])
             self.update_plot()
             return
@@ -57,6 +59,20 @@ class DroneVisualizer:
                 # In case interactive mode isn't available, just continue
                 pass
 
+    def replay_flight_log(self, records, step: int = 1):
+        """Play back recorded positions (see utils.flight_recorder.load_flight_log)"""
+        frame_delay = max(0.001, self._base_frame_delay / max(1e-6, self.anim_speed_factor))
+        for x, y, z in records["position"][::step].tolist():
+            self.positions.append([x, y, z])
+            if self.fig is None:
+                continue
+            self.update_plot()
+            try:
+                plt.pause(frame_delay)
+            except Exception:
+                pass
+        self.update_plot()
+
     def set_animation_speed(self, speed_factor: float):
         """Set animation speed factor. Values >1 speed up, <1 slow down."""
         try:
@@ -70,6 +86,13 @@ class DroneVisualizer:
     def get_animation_speed(self) -> float:
         return float(self.anim_speed_factor)
         
+    def _get_physics(self):
+        """Physics of the drawn drone"""
+        if self.physics is not None:
+            return self.physics
+        from utils.physics import get_physics
+        return get_physics()
+
     def get_current_position(self):
         """Get the current drone position"""
         return self.positions[-1]
@@ -164,9 +187,8 @@ class DroneVisualizer:
             ax.plot([current[0], current[0]], [current[1], current[1]], [0, current[2]], 
                    'k--', alpha=0.3, linewidth=1)
         
-        from utils.physics import get_physics
-        physics = get_physics()
-        self._draw_velocity_vector(ax, current, physics.velocity, scale=3.0)
+        telemetry = self._get_physics().telemetry
+        self._draw_velocity_vector(ax, current, telemetry.velocity, scale=3.0)
         
         max_range = max(np.ptp(positions[:, 0]), np.ptp(positions[:, 1]), 
                        np.ptp(positions[:, 2]), 50)
@@ -195,13 +217,12 @@ class DroneVisualizer:
         ax.scatter(current[0], current[1], c='green', marker='^', s=300, 
                   label='Drone', zorder=5, edgecolors='darkgreen', linewidth=2)
         
-        from utils.physics import get_physics
-        physics = get_physics()
-        speed = np.sqrt(physics.velocity[0]**2 + physics.velocity[1]**2)
+        velocity = self._get_physics().telemetry.velocity
+        speed = np.sqrt(velocity[0]**2 + velocity[1]**2)
         if speed > 0.1:
             vel_scale = 10
             ax.arrow(current[0], current[1], 
-                    physics.velocity[0] * vel_scale, physics.velocity[1] * vel_scale,
+                    velocity[0] * vel_scale, velocity[1] * vel_scale,
                     head_width=2, head_length=1.5, fc='green', ec='green', alpha=0.7)
         
         max_range = max(np.ptp(positions[:, 0]), np.ptp(positions[:, 1]), 50)
@@ -245,10 +266,7 @@ class DroneVisualizer:
     
     def _draw_telemetry(self, current: list, positions: np.ndarray):
         """Draw telemetry panel"""
-        from utils.physics import get_physics
-        
-        physics = get_physics()
-        telemetry = physics.get_telemetry()
+        telemetry = self._get_physics().telemetry
         
         ax = self.ax_telemetry
         ax.axis('off')
@@ -261,24 +279,24 @@ class DroneVisualizer:
 ║           🚁 DRONE TELEMETRY DISPLAY                     ║
 ╠══════════════════════════════════════════════════════════╣
 ║ POSITION & VELOCITY                                      ║
-║   X: {current[0]:8.2f} m   |  Vx: {telemetry['velocity'][0]:7.2f} m/s
-║   Y: {current[1]:8.2f} m   |  Vy: {telemetry['velocity'][1]:7.2f} m/s
-║   Z: {current[2]:8.2f} m   |  Vz: {telemetry['velocity'][2]:7.2f} m/s
-║   Speed: {telemetry['current_speed']:6.2f} m/s
+║   X: {current[0]:8.2f} m   |  Vx: {telemetry.velocity[0]:7.2f} m/s
+║   Y: {current[1]:8.2f} m   |  Vy: {telemetry.velocity[1]:7.2f} m/s
+║   Z: {current[2]:8.2f} m   |  Vz: {telemetry.velocity[2]:7.2f} m/s
+║   Speed: {telemetry.current_speed:6.2f} m/s
 ╠══════════════════════════════════════════════════════════╣
 ║ BATTERY & POWER                                          ║
-║   Battery: {telemetry['battery_percentage']:5.1f}% | {telemetry['battery_remaining_mah']:6.0f} mAh
-║   Flight Time Remaining: {telemetry['flight_time_remaining']:4.1f} minutes
-║   Energy Consumed: {telemetry['energy_consumed']:6.2f} Wh
+║   Battery: {telemetry.battery_percentage:5.1f}% | {telemetry.battery_remaining_mah:6.0f} mAh
+║   Flight Time Remaining: {telemetry.flight_time_remaining:4.1f} minutes
+║   Energy Consumed: {telemetry.energy_consumed:6.2f} Wh
 ╠══════════════════════════════════════════════════════════╣
 ║ FLIGHT STATISTICS                                        ║
-║   Max Speed: {telemetry['max_speed_reached']:6.2f} m/s
-║   Max Altitude: {telemetry['max_altitude']:7.2f} m
+║   Max Speed: {telemetry.max_speed_reached:6.2f} m/s
+║   Max Altitude: {telemetry.max_altitude:7.2f} m
 ║   Total Distance: {total_distance:7.2f} m
 ║   Waypoints Passed: {waypoints:3d}
-║   Total Flight Time: {telemetry['total_flight_time']:6.1f} s
+║   Total Flight Time: {telemetry.total_flight_time:6.1f} s
 ╠══════════════════════════════════════════════════════════╣
-║ STATUS: {'🟢 FLYING' if telemetry['is_flying'] else '🔴 LANDED'}
+║ STATUS: {'🟢 FLYING' if telemetry.is_flying else '🔴 LANDED'}
 ╚══════════════════════════════════════════════════════════╝
         """
         
@@ -292,11 +310,7 @@ class DroneVisualizer:
             plt.close(self.fig)
 
 
-_visualizer = None
-
 def get_visualizer():
-    """Get or create the global visualizer instance"""
-    global _visualizer
-    if _visualizer is None:
-        _visualizer = DroneVisualizer()
-    return _visualizer
+    """Get the visualizer of the active drone context"""
+    from utils.context import get_context
+    return get_context().visualizer
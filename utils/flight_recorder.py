@@ -0,0 +1,161 @@
+"""
+Flight data recorder: append-only binary telemetry log with memory-mapped replay
+
+File layout: a 16-byte header (magic, record size) followed by packed
+RECORD_DTYPE rows. Records are collected in a preallocated NumPy buffer and
+written in blocks, so recording a state change costs one row assignment.
+The buffer is flushed when full, at least every FLIGHT_LOG_FLUSH_INTERVAL
+seconds, and at interpreter exit, so a crash loses at most a few seconds.
+
+Usage:
+    recorder = FlightRecorder("flight.fdr")
+    ctx = DroneContext(recorder=recorder)   # or physics.recorder = recorder
+    ...
+    recorder.close()
+
+    records = load_flight_log("flight.fdr")  # np.memmap, zero-copy
+    records["position"][:, 2].max()
+"""
+import atexit
+import os
+import struct
+import time
+import weakref
+
+import numpy as np
+
+MAGIC = b"AEROFDR1"
+HEADER = struct.Struct("<8sII")  # magic, record size, reserved
+HEADER_SIZE = HEADER.size
+
+# Longest buffered records wait before reaching the disk (seconds)
+FLIGHT_LOG_FLUSH_INTERVAL = float(os.getenv("FLIGHT_LOG_FLUSH_INTERVAL", "1.0"))
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),  # seconds since epoch
+    ("seq", "<u4"),  # TelemetrySnapshot.seq
+    ("position", "<f4", (3,)),  # m
+    ("velocity", "<f4", (3,)),  # m/s
+    ("battery_percentage", "<f4"),
+    ("energy_consumed", "<f4"),  # Wh
+    ("is_flying", "u1"),
+])
+
+
+def _check_header(raw: bytes, path: str):
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"{path}: truncated flight log header")
+    magic, record_size, _ = HEADER.unpack(raw[:HEADER_SIZE])
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: not a flight log in the current record format")
+
+
+class FlightRecorder:
+    """Append telemetry snapshots to a binary flight log"""
+
+    def __init__(self, path: str, buffer_records: int = 256,
+                 flush_interval: float = FLIGHT_LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer = np.zeros(buffer_records, dtype=RECORD_DTYPE)
+        self._count = 0
+        self.records_written = 0
+
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size > 0:
+            self._file = open(path, "r+b")
+            try:
+                _check_header(self._file.read(HEADER_SIZE), path)
+            except ValueError:
+                self._file.close()
+                raise
+            # Drop a partial record left by an interrupted run, so appends stay aligned
+            records = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+            self._file.truncate(HEADER_SIZE + records * RECORD_DTYPE.itemsize)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, 0))
+            self._file.flush()
+        self._last_flush = time.monotonic()
+        _open_recorders.add(self)
+
+    def record(self, snapshot, timestamp: float = None):
+        """Buffer one TelemetrySnapshot; written when the buffer fills or flush_interval passes"""
+        self._buffer[self._count] = (
+            time.time() if timestamp is None else timestamp,
+            snapshot.seq,
+            snapshot.position,
+            snapshot.velocity,
+            snapshot.battery_percentage,
+            snapshot.energy_consumed,
+            snapshot.is_flying,
+        )
+        self._count += 1
+        if (self._count == len(self._buffer)
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to disk"""
+        if self._count:
+            self._file.write(self._buffer[:self._count].tobytes())
+            self.records_written += self._count
+            self._count = 0
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Recorders still open at exit get their buffered records written
+_open_recorders = weakref.WeakSet()
+
+
+@atexit.register
+def _close_recorders():
+    for recorder in list(_open_recorders):
+        recorder.close()
+
+
+def load_flight_log(path: str) -> np.ndarray:
+    """Memory-map a flight log for zero-copy analysis (read-only)"""
+    with open(path, "rb") as f:
+        _check_header(f.read(HEADER_SIZE), path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def summarize_flight_log(records: np.ndarray) -> dict:
+    """Basic statistics for a loaded flight log"""
+    if len(records) == 0:
+        return {"records": 0}
+    positions = records["position"].astype(np.float64)
+    return {
+        "records": len(records),
+        "duration_s": float(records["timestamp"][-1] - records["timestamp"][0]),
+        "distance_m": float(np.linalg.norm(np.diff(positions, axis=0), axis=1).sum()),
+        "max_altitude_m": float(positions[:, 2].max()),
+        "energy_wh": float(records["energy_consumed"][-1]),
+        "final_battery": float(records["battery_percentage"][-1]),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    for log_path in sys.argv[1:]:
+        print(log_path)
+        for key, value in summarize_flight_log(load_flight_log(log_path)).items():
+            print(f"  {key}: {value}")
@@ -5,47 +5,88 @@ from geopy.distance import geodesic
 from geopy.point import Point
 import math
 
+import numpy as np
+
 # Base coordinates (you can change this to your actual base location)
 BASE_GPS = (37.7749, -122.4194)  # San Francisco (example)
 METERS_PER_DEGREE_LAT = 111320  # Approximate
 
+# WGS84 ellipsoid
+WGS84_A = 6378137.0  # semi-major axis (m)
+WGS84_E2 = 6.69437999014e-3  # first eccentricity squared
+
 
 class GPSConverter:
-    """Convert between GPS coordinates and XYZ meters"""
+    """Convert between GPS coordinates and XYZ meters
+
+    X is north, Y east (meters from the base) and Z the altitude. This is an
+    equirectangular approximation, not a true ENU tangent plane:
+    - latitude is scaled by the WGS84 meridian radius at the base;
+    - longitude by the prime-vertical radius times the cosine of the mid
+      latitude between the base and the point.
+    The error in distance from the base grows with its square: about 2 cm at
+    5 km, 0.2 m at 15 km and 0.35 m at 20 km, at any latitude. Geodetic -> ECEF
+    -> ENU is not used because its up axis falls below the local horizon with
+    distance (about 18 m at 15 km), while Z here must stay the flight altitude.
+    Base constants are computed once, and the inverse is exact.
+    """
     
     def __init__(self, base_lat=37.7749, base_lon=-122.4194):
         self.base_lat = base_lat
         self.base_lon = base_lon
         self.base_point = Point(base_lat, base_lon)
+
+        sin_lat = math.sin(math.radians(base_lat))
+        w = math.sqrt(1 - WGS84_E2 * sin_lat * sin_lat)
+        # Meters per degree of latitude, and of longitude on the equator of the base's prime vertical
+        self.meters_per_deg_lat = math.radians(WGS84_A * (1 - WGS84_E2) / w ** 3)
+        self.meters_per_deg_lon_eq = math.radians(WGS84_A / w)
     
     def gps_to_xyz(self, lat: float, lon: float, altitude: float = 0) -> tuple:
         """Convert GPS coordinates to XYZ meters from base"""
-        target_point = Point(lat, lon)
-        
-        # Calculate X (North-South distance in meters)
-        x = (lat - self.base_lat) * METERS_PER_DEGREE_LAT
-        
-        # Calculate Y (East-West distance in meters)
-        # Longitude degrees vary with latitude
-        meters_per_degree_lon = METERS_PER_DEGREE_LAT * math.cos(math.radians(lat))
-        y = (lon - self.base_lon) * meters_per_degree_lon
-        
-        z = altitude
-        
-        return (x, y, z)
+        x = (lat - self.base_lat) * self.meters_per_deg_lat  # North
+        mid_lat = math.radians((lat + self.base_lat) / 2)
+        y = (lon - self.base_lon) * self.meters_per_deg_lon_eq * math.cos(mid_lat)  # East
+        return (x, y, altitude)
     
     def xyz_to_gps(self, x: float, y: float, z: float) -> tuple:
         """Convert XYZ meters to GPS coordinates"""
-        # Convert X to latitude
-        lat = self.base_lat + (x / METERS_PER_DEGREE_LAT)
-        
-        # Convert Y to longitude
-        meters_per_degree_lon = METERS_PER_DEGREE_LAT * math.cos(math.radians(lat))
-        lon = self.base_lon + (y / meters_per_degree_lon)
-        
-        altitude = z
-        
-        return (lat, lon, altitude)
+        lat = self.base_lat + x / self.meters_per_deg_lat
+        mid_lat = math.radians((lat + self.base_lat) / 2)
+        lon = self.base_lon + y / (self.meters_per_deg_lon_eq * math.cos(mid_lat))
+        return (lat, lon, z)
+
+    def gps_to_xyz_many(self, lat, lon=None, altitude=0.0) -> np.ndarray:
+        """Convert many GPS coordinates at once; returns an (N, 3) array of XYZ meters.
+
+        Pass arrays of lat / lon (/ altitude), or one (N, 2) or (N, 3) array.
+        """
+        if lon is None:
+            points = np.asarray(lat, dtype=float)
+            lat, lon = points[..., 0], points[..., 1]
+            altitude = points[..., 2] if points.shape[-1] > 2 else altitude
+        lat, lon, altitude = np.broadcast_arrays(np.asarray(lat, dtype=float),
+                                                 np.asarray(lon, dtype=float),
+                                                 np.asarray(altitude, dtype=float))
+        xyz = np.empty(lat.shape + (3,))
+        np.multiply(lat - self.base_lat, self.meters_per_deg_lat, out=xyz[..., 0])
+        mid_lat = np.radians((lat + self.base_lat) / 2)
+        np.multiply((lon - self.base_lon) * self.meters_per_deg_lon_eq, np.cos(mid_lat), out=xyz[..., 1])
+        xyz[..., 2] = altitude
+        return xyz
+
+    def xyz_to_gps_many(self, xyz) -> np.ndarray:
+        """Convert an (N, 3) array of XYZ meters to an (N, 3) array of lat, lon, altitude"""
+        xyz = np.asarray(xyz, dtype=float)
+        gps = np.empty(xyz.shape)
+        lat = gps[..., 0]
+        np.divide(xyz[..., 0], self.meters_per_deg_lat, out=lat)
+        lat += self.base_lat
+        mid_lat = np.radians((lat + self.base_lat) / 2)
+        np.divide(xyz[..., 1], self.meters_per_deg_lon_eq * np.cos(mid_lat), out=gps[..., 1])
+        gps[..., 1] += self.base_lon
+        gps[..., 2] = xyz[..., 2]
+        return gps
     
     def distance_between_points(self, point1: tuple, point2: tuple) -> float:
         """Calculate distance in meters between two GPS points"""
@@ -61,15 +102,10 @@ class GPSConverter:
         return (destination.latitude, destination.longitude)
 
 
-# Global GPS converter instance
-_gps_converter = None
-
 def get_gps_converter():
-    """Get or create the global GPS converter instance"""
-    global _gps_converter
-    if _gps_converter is None:
-        _gps_converter = GPSConverter()
-    return _gps_converter
+    """Get the GPS converter of the active drone context"""
+    from utils.context import get_context
+    return get_context().gps_converter
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
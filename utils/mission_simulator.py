@@ -0,0 +1,248 @@
+"""
+Deterministic Monte-Carlo delivery mission simulator (headless, no GUI)
+
+Each mission variation gets its own DronePhysics instance and a random
+generator seeded from (seed, mission index), so results do not depend on
+how missions are split across worker processes.
+
+Usage:
+    python -m utils.mission_simulator --missions 5000 --wind-scale 6 --out results.csv
+"""
+import argparse
+import csv
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.physics import DronePhysics
+
+# Failure codes stored in SimulationResults.failure
+FAILURE_NONE = 0
+FAILURE_TAKEOFF_REFUSED = 1  # battery below 5% before takeoff
+FAILURE_OUTBOUND_BATTERY = 2  # battery critical before reaching the drop point
+FAILURE_RETURN_BATTERY = 3  # battery critical before reaching home
+FAILURE_BATTERY_DEPLETED = 4  # battery ran flat before touchdown
+
+FAILURE_NAMES = (
+    "none",
+    "takeoff_refused",
+    "outbound_battery",
+    "return_battery",
+    "battery_depleted",
+)
+
+# Column order shared by simulate_mission rows, arrays and CSV output
+RESULT_COLUMNS = (
+    ("wind_speed", float),
+    ("wind_direction", float),
+    ("distance", float),
+    ("initial_battery", float),
+    ("payload_kg", float),
+    ("success", bool),
+    ("failure", np.int8),
+    ("energy_wh", float),
+    ("time_s", float),
+    ("final_battery", float),
+)
+
+# Same threshold the navigation tools use to refuse takeoff / movement
+CRITICAL_BATTERY_PERCENT = 5.0
+
+
+@dataclass(frozen=True)
+class WindDistribution:
+    """Weibull wind speed (m/s) with a fixed or uniformly random bearing"""
+    scale: float = 5.0  # Weibull scale (m/s), 0 = calm
+    shape: float = 2.0  # Weibull shape (2.0 = Rayleigh)
+    direction: Optional[float] = None  # degrees, None = uniform [0, 360)
+
+    def sample(self, rng: np.random.Generator) -> Tuple[float, float]:
+        speed = self.scale * rng.weibull(self.shape) if self.scale > 0 else 0.0
+        direction = rng.uniform(0.0, 360.0) if self.direction is None else self.direction
+        return float(speed), float(direction)
+
+
+@dataclass(frozen=True)
+class MissionProfile:
+    """Out-and-back delivery: takeoff, fly to the drop point, return home, land"""
+    cruise_altitude: float = 30.0  # m
+    min_distance: float = 1000.0  # m, radius of the delivery annulus
+    max_distance: float = 20000.0  # m
+    min_battery: float = 40.0  # % at launch
+    max_battery: float = 100.0  # % at launch
+    min_payload: float = 0.0  # kg, dropped at the delivery point
+    max_payload: float = 1.0  # kg
+
+
+@dataclass
+class SimulationResults:
+    """Per-mission outcomes as parallel NumPy arrays"""
+    wind_speed: np.ndarray
+    wind_direction: np.ndarray
+    distance: np.ndarray  # one-way horizontal distance (m)
+    initial_battery: np.ndarray  # %
+    payload_kg: np.ndarray
+    success: np.ndarray  # bool
+    failure: np.ndarray  # FAILURE_* code
+    energy_wh: np.ndarray
+    time_s: np.ndarray  # simulated flight time
+    final_battery: np.ndarray  # %
+
+    def __len__(self) -> int:
+        return len(self.success)
+
+    @property
+    def success_rate(self) -> float:
+        return float(self.success.mean()) if len(self) else 0.0
+
+    def summary(self) -> Dict[str, object]:
+        """Aggregate statistics over all missions"""
+        ok = self.success
+        failures = np.bincount(self.failure, minlength=len(FAILURE_NAMES))
+        return {
+            "missions": len(self),
+            "success_rate": self.success_rate,
+            "failures": {name: int(failures[code]) for code, name in enumerate(FAILURE_NAMES) if code},
+            "energy_wh_mean": float(self.energy_wh.mean()) if len(self) else 0.0,
+            "energy_wh_p95": float(np.percentile(self.energy_wh, 95)) if len(self) else 0.0,
+            "time_s_mean": float(self.time_s[ok].mean()) if ok.any() else 0.0,
+            "time_s_p95": float(np.percentile(self.time_s[ok], 95)) if ok.any() else 0.0,
+        }
+
+    def to_csv(self, path: str):
+        """Write one row per mission"""
+        names = [name for name, _ in RESULT_COLUMNS]
+        arrays = [getattr(self, name) for name in names]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(zip(*(a.tolist() for a in arrays)))
+
+    def save_npz(self, path: str):
+        """Write all arrays to a compressed NumPy archive"""
+        np.savez_compressed(path, **{name: getattr(self, name) for name, _ in RESULT_COLUMNS})
+
+    @classmethod
+    def concatenate(cls, parts) -> "SimulationResults":
+        return cls(**{name: np.concatenate([p[name] for p in parts]) for name, _ in RESULT_COLUMNS})
+
+
+def simulate_mission(profile: MissionProfile, wind: WindDistribution,
+                     seed: int, index: int) -> tuple:
+    """
+    Fly one seeded mission variation with the same checks as tools.navigation_tools
+    Returns: (wind_speed, wind_direction, distance, initial_battery, payload_kg,
+              success, failure, energy_wh, time_s, final_battery)
+    """
+    rng = np.random.default_rng([seed, index])
+    wind_speed, wind_direction = wind.sample(rng)
+    distance = float(rng.uniform(profile.min_distance, profile.max_distance))
+    bearing = rng.uniform(0.0, 2 * math.pi)
+    initial_battery = float(rng.uniform(profile.min_battery, profile.max_battery))
+    payload = float(rng.uniform(profile.min_payload, profile.max_payload))
+
+    physics = DronePhysics()
+    physics.recharge_battery(initial_battery)
+    physics.set_wind(wind_speed, wind_direction)
+    physics.set_payload(payload)
+
+    target = (distance * math.cos(bearing), distance * math.sin(bearing))
+    altitude = profile.cruise_altitude
+    legs = (
+        (FAILURE_OUTBOUND_BATTERY, target[0], target[1], payload),
+        (FAILURE_RETURN_BATTERY, -target[0], -target[1], 0.0),
+    )
+
+    failure = FAILURE_NONE
+    elapsed = 0.0
+    if physics.battery_percentage < CRITICAL_BATTERY_PERCENT:
+        failure = FAILURE_TAKEOFF_REFUSED
+    else:
+        elapsed += physics.takeoff(altitude)[0]
+        for code, dx, dy, leg_payload in legs:
+            if physics.battery_percentage < CRITICAL_BATTERY_PERCENT:
+                failure = code
+                break
+            physics.set_payload(leg_payload)
+            elapsed += physics.move(dx, dy, 0.0)[0]
+        if failure == FAILURE_NONE:
+            elapsed += physics.land()[0]
+            if physics.battery_current <= 0:
+                failure = FAILURE_BATTERY_DEPLETED
+
+    return (wind_speed, wind_direction, distance, initial_battery, payload, failure == FAILURE_NONE,
+            failure, physics.energy_consumed, elapsed, physics.battery_percentage)
+
+
+def _run_chunk(profile: MissionProfile, wind: WindDistribution,
+               seed: int, start: int, stop: int) -> Dict[str, np.ndarray]:
+    """Simulate missions [start, stop) and pack them into column arrays"""
+    # Per-takeoff INFO logging would dominate the runtime of a batch
+    logging.getLogger("DronePhysics").setLevel(logging.WARNING)
+
+    rows = [simulate_mission(profile, wind, seed, i) for i in range(start, stop)]
+    columns = list(zip(*rows)) if rows else [()] * len(RESULT_COLUMNS)
+    return {name: np.asarray(col, dtype=dtype) for (name, dtype), col in zip(RESULT_COLUMNS, columns)}
+
+
+def run_monte_carlo(missions: int, profile: MissionProfile = MissionProfile(),
+                    wind: WindDistribution = WindDistribution(), seed: int = 0,
+                    workers: Optional[int] = None, chunk_size: int = 500) -> SimulationResults:
+    """
+    Run `missions` seeded variations across a process pool
+    workers: process count (None = CPU count, 1 = run inline)
+    """
+    bounds = [(start, min(start + chunk_size, missions)) for start in range(0, missions, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(bounds) <= 1:
+        parts = [_run_chunk(profile, wind, seed, start, stop) for start, stop in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_chunk, profile, wind, seed, start, stop) for start, stop in bounds]
+            parts = [f.result() for f in futures]
+
+    if not parts:
+        parts = [_run_chunk(profile, wind, seed, 0, 0)]
+    return SimulationResults.concatenate(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte-Carlo delivery mission simulator")
+    parser.add_argument("--missions", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--wind-scale", type=float, default=5.0, help="Weibull scale (m/s)")
+    parser.add_argument("--wind-shape", type=float, default=2.0, help="Weibull shape")
+    parser.add_argument("--wind-direction", type=float, default=None, help="fixed bearing (deg)")
+    parser.add_argument("--min-distance", type=float, default=1000.0)
+    parser.add_argument("--max-distance", type=float, default=20000.0)
+    parser.add_argument("--altitude", type=float, default=30.0)
+    parser.add_argument("--max-payload", type=float, default=1.0, help="kg")
+    parser.add_argument("--out", default=None, help="write per-mission results (.csv or .npz)")
+    args = parser.parse_args()
+
+    profile = MissionProfile(cruise_altitude=args.altitude,
+                             min_distance=args.min_distance, max_distance=args.max_distance,
+                             max_payload=args.max_payload)
+    wind = WindDistribution(args.wind_scale, args.wind_shape, args.wind_direction)
+    results = run_monte_carlo(args.missions, profile, wind, seed=args.seed, workers=args.workers)
+
+    for key, value in results.summary().items():
+        print(f"{key}: {value}")
+
+    if args.out:
+        if args.out.endswith(".npz"):
+            results.save_npz(args.out)
+        else:
+            results.to_csv(args.out)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,27 @@
 """
 Path planning using NetworkX
 """
+from collections import deque
+
 import networkx as nx
 import numpy as np
 from typing import List, Tuple
 
 
+_offsets = {}
+
+
+def _sphere_offsets(radius_grid: int) -> np.ndarray:
+    """Cell offsets (dx, dy, dz) within radius_grid cells of a center"""
+    offsets = _offsets.get(radius_grid)
+    if offsets is None:
+        r = np.arange(-radius_grid, radius_grid + 1)
+        dx, dy, dz = np.meshgrid(r, r, r, indexing="ij")
+        inside = dx * dx + dy * dy + dz * dz <= radius_grid * radius_grid
+        offsets = _offsets[radius_grid] = np.stack((dx[inside], dy[inside], dz[inside]), axis=1)
+    return offsets
+
+
 class PathPlanner:
     """A* path planning for 3D drone navigation"""
     
@@ -22,17 +38,22 @@ class PathPlanner:
     
     def add_obstacle(self, x: float, y: float, z: float, radius: float = 5):
         """Add a spherical obstacle"""
-        # Discretize obstacle into grid cells
-        x_grid = int(x / self.resolution)
-        y_grid = int(y / self.resolution)
-        z_grid = int(z / self.resolution)
-        radius_grid = int(radius / self.resolution)
-        
-        for dx in range(-radius_grid, radius_grid + 1):
-            for dy in range(-radius_grid, radius_grid + 1):
-                for dz in range(-radius_grid, radius_grid + 1):
-                    if dx*dx + dy*dy + dz*dz <= radius_grid*radius_grid:
-                        self.obstacles.add((x_grid + dx, y_grid + dy, z_grid + dz))
+        self.add_obstacles([(x, y, z, radius)])
+
+    def add_obstacles(self, obstacles) -> int:
+        """Add many spherical obstacles [(x, y, z, radius), ...]; returns the new cell count"""
+        obstacles = np.asarray(obstacles, dtype=float).reshape(-1, 4)
+        if not len(obstacles):
+            return 0
+        # Discretize obstacle centers into grid cells (truncating, as is_obstacle does)
+        centers = np.trunc(obstacles[:, :3] / self.resolution).astype(np.int64)
+        radii = np.trunc(obstacles[:, 3] / self.resolution).astype(np.int64)
+
+        before = len(self.obstacles)
+        for radius_grid in np.unique(radii):
+            cells = centers[radii == radius_grid][:, None, :] + _sphere_offsets(int(radius_grid))
+            self.obstacles.update(map(tuple, cells.reshape(-1, 3).tolist()))
+        return len(self.obstacles) - before
     
     def add_no_fly_zone(self, min_x, max_x, min_y, max_y, min_z, max_z):
         """Add a rectangular no-fly zone"""
@@ -70,10 +91,10 @@ class PathPlanner:
         
         # Add nodes and edges (26-connected grid)
         visited = set()
-        queue = [start_grid]
+        queue = deque([start_grid])
         
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             if current in visited:
                 continue
             visited.add(current)
@@ -159,12 +180,7 @@ class PathPlanner:
         return simplified
 
 
-# Global path planner instance
-_path_planner = None
-
 def get_path_planner():
-    """Get or create the global path planner instance"""
-    global _path_planner
-    if _path_planner is None:
-        _path_planner = PathPlanner()
-    return _path_planner
+    """Get the path planner of the active drone context"""
+    from utils.context import get_context
+    return get_context().path_planner
@@ -3,11 +3,32 @@ Realistic drone physics simulation
 """
 import math
 import time
-from typing import Tuple
+from typing import NamedTuple, Tuple
+from utils.battery import Battery
 from utils.logger import get_logger
 
 logger = get_logger("DronePhysics")
 
+
+class TelemetrySnapshot(NamedTuple):
+    """Immutable telemetry, published once per physics state change"""
+    seq: int  # increments with every published snapshot
+    position: Tuple[float, float, float]
+    velocity: Tuple[float, float, float]
+    current_speed: float
+    is_flying: bool
+    battery_percentage: float
+    battery_remaining_mah: float
+    battery_voltage: float  # open-circuit pack voltage
+    payload_mass: float  # kg
+    flight_time_remaining: float
+    energy_consumed: float
+    total_flight_time: float
+    total_distance: float
+    max_altitude: float
+    max_speed_reached: float
+
+
 class DronePhysics:
     """Realistic physics simulation for autonomous drone"""
     
@@ -17,16 +38,18 @@ class DronePhysics:
     
     # Drone specifications
     MASS = 1.2  # kg (typical for consumer drones like DJI Mini)
+    MAX_PAYLOAD = 1.0  # kg
     ROTOR_DIAMETER = 0.25  # m (250mm rotors)
     DRAG_COEFFICIENT = 0.5  # unitless
     MAX_SPEED = 20.0  # m/s (72 km/h)
     MAX_ACCELERATION = 5.0  # m/s^2
     MAX_CLIMB_RATE = 3.0  # m/s (vertical)
+    MIN_GROUND_SPEED = 0.5  # m/s (progress made when wind nearly cancels airspeed)
     
     # Power characteristics
     BATTERY_CAPACITY = 2250.0  # mAh
-    VOLTAGE = 11.55  # V (3S LiPo)
-    IDLE_POWER = 20.0  # W (hovering)
+    BATTERY_CELLS = 3  # 3S LiPo
+    IDLE_POWER = 20.0  # W (hovering without payload)
     MAX_POWER = 100.0  # W
     
     # Environmental
@@ -39,8 +62,9 @@ class DronePhysics:
         self.acceleration = [0.0, 0.0, 0.0]  # m/s^2
         
         # Battery state
+        self.battery = Battery(self.BATTERY_CAPACITY, self.BATTERY_CELLS)
         self.battery_capacity = self.BATTERY_CAPACITY  # mAh
-        self.battery_current = self.BATTERY_CAPACITY  # mAh remaining
+        self.payload_mass = 0.0  # kg
         
         # Flight state
         self.is_flying = False
@@ -53,6 +77,12 @@ class DronePhysics:
         self.max_altitude = 0.0  # m
         self.total_distance = 0.0  # m
         self.waypoints_passed = 0
+        
+        # Latest published telemetry (replaced as a whole, never mutated)
+        self._snapshot = None
+        # Optional utils.flight_recorder.FlightRecorder fed with every snapshot
+        self.recorder = None
+        self._publish()
     
     def takeoff(self, target_height: float) -> Tuple[float, float]:
         """
@@ -77,9 +107,11 @@ class DronePhysics:
         # Update state
         self.position[2] = target_height
         self.energy_consumed += energy_wh
-        self._consume_battery(energy_wh)
+        self._consume_battery(energy_wh, avg_power)
         self.max_altitude = max(self.max_altitude, target_height)
         
+        self._publish()
+        
         logger.info(f"Takeoff: {climb_time:.1f}s, {energy_wh:.2f}Wh, Battery: {self.battery_percentage:.1f}%")
         
         return climb_time, energy_wh
@@ -101,7 +133,8 @@ class DronePhysics:
             power = self._calculate_climb_power(self.MAX_CLIMB_RATE if dz > 0 else -self.MAX_CLIMB_RATE)
         else:  # Horizontal movement
             horizontal_distance = math.sqrt(dx**2 + dy**2)
-            time_required = horizontal_distance / self.MAX_SPEED if self.MAX_SPEED > 0 else 0
+            ground_speed = self._ground_speed(dx, dy)
+            time_required = horizontal_distance / ground_speed if ground_speed > 0 else 0
             power = self._calculate_cruise_power(self.MAX_SPEED)
         
         # Calculate energy
@@ -124,7 +157,8 @@ class DronePhysics:
         self.max_speed_reached = max(self.max_speed_reached, 
                                     math.sqrt(sum(v**2 for v in self.velocity)))
         
-        self._consume_battery(energy_wh)
+        self._consume_battery(energy_wh, power)
+        self._publish()
         
         return time_required, energy_wh
     
@@ -150,24 +184,34 @@ class DronePhysics:
         self.energy_consumed += energy_wh
         self.total_flight_time = time.time() - self.flight_start_time if self.flight_start_time else 0
         
-        self._consume_battery(energy_wh)
+        self._consume_battery(energy_wh, hover_power)
+        self._publish()
         
         return descent_time, energy_wh
     
+    @property
+    def total_mass(self) -> float:
+        """Airframe plus payload mass in kg"""
+        return self.MASS + self.payload_mass
+    
+    def set_payload(self, mass_kg: float):
+        """Set carried payload mass (0 to drop)"""
+        if mass_kg < 0 or mass_kg > self.MAX_PAYLOAD:
+            raise ValueError(f"Payload must be between 0 and {self.MAX_PAYLOAD} kg")
+        self.payload_mass = mass_kg
+        self._publish()
+    
     def _calculate_hover_power(self) -> float:
-        """Calculate power required to hover"""
-        # P = mg / (2 * rho * A)^0.5
-        rotor_area = math.pi * (self.ROTOR_DIAMETER / 2) ** 2
-        induced_velocity = math.sqrt((self.MASS * self.GRAVITY) / (2 * self.AIR_DENSITY * rotor_area * 2))
-        power_hover = self.MASS * self.GRAVITY * induced_velocity
-        
-        return max(self.IDLE_POWER, power_hover / 1000)  # Convert to W
+        """Calculate power required to hover with the current payload"""
+        # Momentum theory: P = (m*g)^1.5 / (2 * rho * A)^0.5, i.e. P grows with m^1.5.
+        # Scaled so the empty airframe hovers at IDLE_POWER.
+        return self.IDLE_POWER * (self.total_mass / self.MASS) ** 1.5
     
     def _calculate_climb_power(self, climb_rate: float) -> float:
         """Calculate power required for vertical climb"""
         hover_power = self._calculate_hover_power()
         # Add power for climbing: P = m*g*v_climb
-        climb_power = (self.MASS * self.GRAVITY * abs(climb_rate)) / 1000
+        climb_power = self.total_mass * self.GRAVITY * abs(climb_rate)
         return min(self.MAX_POWER, hover_power + climb_power)
     
     def _calculate_cruise_power(self, speed: float) -> float:
@@ -175,28 +219,49 @@ class DronePhysics:
         hover_power = self._calculate_hover_power()
         # Add drag force power: P = 0.5 * rho * Cd * A * v^3
         rotor_area = math.pi * (self.ROTOR_DIAMETER / 2) ** 2
-        drag_power = 0.5 * self.AIR_DENSITY * self.DRAG_COEFFICIENT * rotor_area * (speed ** 3) / 1000
+        drag_power = 0.5 * self.AIR_DENSITY * self.DRAG_COEFFICIENT * rotor_area * (speed ** 3)
         return min(self.MAX_POWER, hover_power + drag_power)
     
-    def _consume_battery(self, energy_wh: float):
-        """Consume battery energy"""
-        # Convert Wh to mAh: mAh = Wh * 1000 / V
-        mah_consumed = (energy_wh * 1000) / self.VOLTAGE
-        self.battery_current = max(0, self.battery_current - mah_consumed)
+    def _ground_speed(self, dx: float, dy: float) -> float:
+        """Ground speed along the (dx, dy) track when flying at MAX_SPEED airspeed"""
+        track = math.sqrt(dx**2 + dy**2)
+        if track == 0 or self.WIND_SPEED == 0:
+            return self.MAX_SPEED
+        
+        # Wind blows towards WIND_DIRECTION (bearing from +X towards +Y)
+        heading = math.radians(self.WIND_DIRECTION)
+        wind_x = self.WIND_SPEED * math.cos(heading)
+        wind_y = self.WIND_SPEED * math.sin(heading)
+        along = (wind_x * dx + wind_y * dy) / track
+        cross = (wind_y * dx - wind_x * dy) / track
+        
+        # Crab into the crosswind, then add the tail/head component
+        if abs(cross) >= self.MAX_SPEED:
+            return self.MIN_GROUND_SPEED
+        return max(self.MIN_GROUND_SPEED, along + math.sqrt(self.MAX_SPEED**2 - cross**2))
+    
+    def _consume_battery(self, energy_wh: float, power_w: float):
+        """Consume battery energy delivered at power_w (discharge curve + voltage sag)"""
+        self.battery.draw(energy_wh, power_w)
+    
+    @property
+    def battery_current(self) -> float:
+        """Remaining charge in mAh"""
+        return self.battery.remaining_mah
     
     @property
     def battery_percentage(self) -> float:
         """Get battery percentage"""
-        return (self.battery_current / self.battery_capacity) * 100
+        return self.battery.percentage
     
     @property
     def flight_time_remaining(self) -> float:
-        """Estimate remaining flight time in minutes"""
-        if self.battery_current <= 0:
+        """Estimate remaining hover time in minutes with the current payload"""
+        if self.battery.soc <= 0:
             return 0.0
         
-        remaining_energy = (self.battery_current * self.VOLTAGE) / 1000  # Wh
         hover_power = self._calculate_hover_power()
+        remaining_energy = self.battery.remaining_energy_wh(hover_power)  # Wh
         
         return (remaining_energy / hover_power) * 60  # minutes
     
@@ -207,30 +272,52 @@ class DronePhysics:
     
     def recharge_battery(self, percentage: float = 100.0):
         """Recharge battery to percentage"""
-        self.battery_current = (percentage / 100.0) * self.battery_capacity
+        self.battery.set_percentage(percentage)
         self.energy_consumed = 0.0
         self.total_flight_time = 0.0
         self.total_distance = 0.0
         self.max_speed_reached = 0.0
         self.max_altitude = 0.0
         self.waypoints_passed = 0
+        self._publish()
+    
+    def _publish(self):
+        """Build the telemetry snapshot for the current state and swap it in"""
+        # Readers only ever see the old or the new tuple: the swap is a
+        # single reference assignment, so no lock is needed on either side.
+        seq = self._snapshot.seq + 1 if self._snapshot is not None else 0
+        self._snapshot = TelemetrySnapshot(
+            seq=seq,
+            position=tuple(self.position),
+            velocity=tuple(self.velocity),
+            current_speed=self.current_speed,
+            is_flying=self.is_flying,
+            battery_percentage=self.battery_percentage,
+            battery_remaining_mah=self.battery_current,
+            battery_voltage=self.battery.open_circuit_voltage,
+            payload_mass=self.payload_mass,
+            flight_time_remaining=self.flight_time_remaining,
+            energy_consumed=self.energy_consumed,
+            total_flight_time=self.total_flight_time,
+            total_distance=self.total_distance,
+            max_altitude=self.max_altitude,
+            max_speed_reached=self.max_speed_reached,
+        )
+        if self.recorder is not None:
+            self.recorder.record(self._snapshot)
+    
+    @property
+    def telemetry(self) -> TelemetrySnapshot:
+        """Latest published telemetry snapshot (lock-free, no allocation)"""
+        return self._snapshot
     
     def get_telemetry(self) -> dict:
-        """Get complete telemetry data"""
-        return {
-            "position": self.position.copy(),
-            "velocity": self.velocity.copy(),
-            "current_speed": self.current_speed,
-            "is_flying": self.is_flying,
-            "battery_percentage": self.battery_percentage,
-            "battery_remaining_mah": self.battery_current,
-            "flight_time_remaining": self.flight_time_remaining,
-            "energy_consumed": self.energy_consumed,
-            "total_flight_time": self.total_flight_time,
-            "total_distance": self.total_distance,
-            "max_altitude": self.max_altitude,
-            "max_speed_reached": self.max_speed_reached,
-        }
+        """Get complete telemetry data as a dict (copy of the latest snapshot)"""
+        telemetry = self._snapshot._asdict()
+        del telemetry["seq"]
+        telemetry["position"] = list(telemetry["position"])
+        telemetry["velocity"] = list(telemetry["velocity"])
+        return telemetry
     
     def set_wind(self, wind_speed: float, wind_direction: float = 0.0):
         """Set wind conditions"""
@@ -239,18 +326,13 @@ class DronePhysics:
         logger.info(f"Wind set to {wind_speed} m/s at {wind_direction}°")
 
 
-# Global physics instance
-_physics = None
-
 def get_physics():
-    """Get or create the global physics instance"""
-    global _physics
-    if _physics is None:
-        _physics = DronePhysics()
-    return _physics
+    """Get the physics instance of the active drone context"""
+    from utils.context import get_context
+    return get_context().physics
 
 
 def reset_physics():
-    """Reset physics to initial state"""
-    global _physics
-    _physics = DronePhysics()
+    """Reset physics of the active drone context to initial state"""
+    from utils.context import get_context
+    get_context().reset_physics()
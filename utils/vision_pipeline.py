@@ -0,0 +1,340 @@
+"""
+Continuous obstacle detection on a persistent camera (or recorded) feed
+
+A background thread keeps the source open, reads frames at VISION_FPS and
+runs the detector on each one. Tools read the latest result instantly
+instead of opening the camera per call:
+
+    pipeline = get_vision_pipeline()      # starts on first use
+    pipeline.latest_result()              # {"obstacle_detected": ..., "frame_age_ms": ...}
+    frame, index, timestamp = pipeline.latest_frame()
+
+VISION_SOURCE is a camera index ("0"), a video file or a directory of
+images; files and directories loop, paced at VISION_FPS. Published frames
+are handed over by reference and marked read-only, never copied.
+"""
+import atexit
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger("Vision")
+
+VISION_SOURCE = os.getenv("VISION_SOURCE", "0")
+VISION_FPS = float(os.getenv("VISION_FPS", "10"))
+# Longest a tool call waits for the first result after the pipeline starts
+VISION_STARTUP_TIMEOUT = float(os.getenv("VISION_STARTUP_TIMEOUT", "3.0"))
+
+CANNY_LOW, CANNY_HIGH = 100, 200
+EDGE_PIXEL_THRESHOLD = 5000
+
+# Camera model for obstacle localization: forward-facing (+X), horizontal field of view
+CAMERA_HFOV = float(os.getenv("VISION_HFOV", "60"))  # degrees
+# Assumed obstacle size (m): range is estimated from its apparent size
+OBSTACLE_SIZE = float(os.getenv("VISION_OBSTACLE_SIZE", "2.0"))
+# Rows analyzed for obstacles (fractions of the height): skips sky and ground
+ROI_TOP, ROI_BOTTOM = 0.15, 0.85
+PROCESS_WIDTH = 320  # the ROI is pyramid-downscaled to at most this width first
+# Count edges on the downscaled ROI instead of the full frame: 3-5x faster, but on textured
+# footage the count is well below the full-resolution one (check with benchmarks/vision.py)
+VISION_FAST_PATH = os.getenv("VISION_FAST_PATH", "0") == "1"
+MIN_OBSTACLE_AREA = 0.002  # of the ROI area, smaller blobs are ignored
+MAX_OBSTACLES = 10
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+
+
+def count_edges(frame: np.ndarray) -> int:
+    """Canny edge pixels of the full-resolution frame (the reference measurement)"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.countNonZero(cv2.Canny(gray, CANNY_LOW, CANNY_HIGH))
+
+
+def roi_edges(frame: np.ndarray, max_width: int = PROCESS_WIDTH):
+    """Canny edges of the ROI band, pyramid-downscaled to at most max_width.
+
+    Returns (edges, scale, top): one edge pixel stands for `scale` full-resolution
+    pixels and row 0 is row `top` of the frame.
+    """
+    height = frame.shape[0]
+    top, bottom = int(height * ROI_TOP), int(height * ROI_BOTTOM)
+    roi = frame[top:bottom]  # view, no copy
+    scale = 1
+    while roi.shape[1] > max_width:
+        roi = cv2.pyrDown(roi)
+        scale *= 2
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    return cv2.Canny(gray, CANNY_LOW, CANNY_HIGH), scale, top
+
+
+def analyze_frame(frame: np.ndarray, fast: Optional[bool] = None) -> dict:
+    """Edge density obstacle check and obstacle localization on one BGR frame"""
+    if VISION_FAST_PATH if fast is None else fast:
+        edges, scale, top = roi_edges(frame)
+        # Edges are lines: their pixel count shrinks with the linear scale
+        edge_pixels = cv2.countNonZero(edges) * scale
+    else:
+        edge_pixels = count_edges(frame)
+        edges, scale, top = roi_edges(frame)
+    return {
+        "obstacle_detected": edge_pixels > EDGE_PIXEL_THRESHOLD,
+        "edge_pixel_count": edge_pixels,
+        "obstacles": locate_obstacles(frame, (edges, scale, top)),
+    }
+
+
+def locate_obstacles(frame: np.ndarray, edges=None) -> List[dict]:
+    """Bearing, elevation and range of the largest edge blobs in a BGR frame.
+
+    Bearing is positive to the right (+Y), elevation positive up. Range
+    assumes each blob is OBSTACLE_SIZE meters across. `edges` reuses a
+    roi_edges() result for the same frame.
+    """
+    height, width = frame.shape[:2]
+    edges, scale, top = edges if edges is not None else roi_edges(frame)
+    # Close gaps so an object's outline becomes one blob
+    blobs = cv2.dilate(edges, None, iterations=2)
+    contours, _ = cv2.findContours(blobs, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = MIN_OBSTACLE_AREA * blobs.shape[0] * blobs.shape[1]
+    boxes = sorted((cv2.boundingRect(c) for c in contours), key=lambda b: b[2] * b[3], reverse=True)
+    focal = (width / 2) / np.tan(np.radians(CAMERA_HFOV / 2))  # pixels, full resolution
+    obstacles = []
+    for x, y, w, h in boxes[:MAX_OBSTACLES]:
+        if w * h < min_area:
+            break
+        # Back to full-resolution pixel coordinates
+        cx = (x + w / 2) * scale - width / 2
+        cy = top + (y + h / 2) * scale - height / 2
+        size = max(w, h) * scale
+        obstacles.append({
+            "bearing_deg": round(float(np.degrees(np.arctan2(cx, focal))), 1),
+            "elevation_deg": round(float(np.degrees(np.arctan2(-cy, focal))), 1),
+            "range_m": round(float(OBSTACLE_SIZE * focal / size), 1),
+            "bbox": [int(x * scale), int(top + y * scale), int(w * scale), int(h * scale)],
+        })
+    return obstacles
+
+
+def obstacles_to_world(obstacles: List[dict], position, heading_deg: float = 0.0,
+                       radius: float = OBSTACLE_SIZE / 2) -> List[tuple]:
+    """[(x, y, z, radius)] for PathPlanner.add_obstacles from a camera at `position`.
+
+    heading_deg is the camera direction, measured from +X towards +Y.
+    """
+    px, py, pz = position
+    world = []
+    for obstacle in obstacles:
+        azimuth = np.radians(heading_deg + obstacle["bearing_deg"])
+        elevation = np.radians(obstacle["elevation_deg"])
+        ground = obstacle["range_m"] * np.cos(elevation)
+        world.append((float(px + ground * np.cos(azimuth)), float(py + ground * np.sin(azimuth)),
+                      float(pz + obstacle["range_m"] * np.sin(elevation)), radius))
+    return world
+
+
+class CaptureSource:
+    """Camera or video file behind a cv2.VideoCapture kept open between frames"""
+
+    def __init__(self, source):
+        self.source = source
+        self.live = isinstance(source, int)
+        self.cap = cv2.VideoCapture(source)
+        if self.live:
+            # Keep only the newest frame in the driver queue, so reads aren't stale
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self) -> Optional[np.ndarray]:
+        ok, frame = self.cap.read()
+        if not ok and not self.live:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # loop recorded footage
+            ok, frame = self.cap.read()
+        return frame if ok else None
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirSource:
+    """Sorted images from a directory, looping"""
+
+    live = False
+
+    def __init__(self, directory: str):
+        self.source = directory
+        self.paths: List[str] = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+        self.position = 0
+
+    def is_opened(self) -> bool:
+        return bool(self.paths)
+
+    def read(self) -> Optional[np.ndarray]:
+        if not self.paths:
+            return None
+        frame = cv2.imread(self.paths[self.position])
+        self.position = (self.position + 1) % len(self.paths)
+        return frame
+
+    def release(self):
+        pass
+
+
+def open_source(source):
+    """Camera index, video file or image directory"""
+    if isinstance(source, str) and source.strip().isdigit():
+        source = int(source)
+    if isinstance(source, str) and os.path.isdir(source):
+        return ImageDirSource(source)
+    return CaptureSource(source)
+
+
+class VisionPipeline:
+    """Background capture + detection with a latest-frame / latest-result buffer"""
+
+    def __init__(self, source=VISION_SOURCE, fps: float = VISION_FPS,
+                 detector: Callable[[np.ndarray], dict] = analyze_frame,
+                 position: Optional[Callable[[], tuple]] = None):
+        self.source = source
+        self.fps = fps
+        self.detector = detector
+        # Drone position (x, y, z) sampled with each frame, so detections are placed where they were seen
+        self.position = position
+        self.reader = None
+        self.error = None  # why the source produced nothing, if it didn't
+
+        # Replaced (never mutated) by the capture thread, so readers need no lock
+        self._frame = (None, -1, 0.0)  # frame, index, capture time
+        self._result = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.frames = 0
+        self.failed_reads = 0
+        self.process_seconds = 0.0
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            # (Re)open the source: first use, or a camera that was unavailable last time
+            self.error = None
+            self._ready.clear()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="vision-pipeline", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        self.reader = open_source(self.source)
+        if not self.reader.is_opened():
+            self.error = "Camera unavailable" if self.reader.live else f"Cannot open {self.source}"
+            logger.warning(f"Vision source {self.source!r}: {self.error}")
+            self._ready.set()
+            return
+        period = 1.0 / self.fps if self.fps > 0 else 0.0
+        next_frame = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                frame = self.reader.read()
+                captured = time.time()
+                position = self.position() if self.position is not None else None
+                if frame is None:
+                    self.failed_reads += 1
+                    if self.failed_reads >= 30 and self._result is None:
+                        self.error = "Frame capture failed"
+                        self._ready.set()
+                    self._stop.wait(0.05)
+                    continue
+
+                frame.flags.writeable = False  # shared by reference from here on
+                index = self.frames
+                self._frame = (frame, index, captured)
+                start = time.perf_counter()
+                result = self.detector(frame)
+                self.process_seconds += time.perf_counter() - start
+                result["frame_index"] = index
+                result["captured_at"] = captured
+                if position is not None:
+                    result["position"] = [float(v) for v in position]
+                self._result = result
+                self.frames += 1
+                self._ready.set()
+
+                next_frame += period
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_frame = time.monotonic()  # fell behind: don't try to catch up
+        finally:
+            self.reader.release()
+
+    def latest_frame(self):
+        """(frame, index, capture time) of the newest frame; the frame is read-only"""
+        return self._frame
+
+    def latest_result(self, timeout: float = VISION_STARTUP_TIMEOUT) -> Optional[dict]:
+        """Newest detection result, waiting up to `timeout` for the first one"""
+        self.start()
+        if self._result is None:
+            self._ready.wait(timeout)
+        result = self._result
+        if result is None:
+            return None
+        result = dict(result)
+        result["frame_age_ms"] = round((time.time() - result.pop("captured_at")) * 1000, 1)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "source": str(self.source),
+            "running": self.running,
+            "frames": self.frames,
+            "failed_reads": self.failed_reads,
+            "avg_process_ms": self.process_seconds / self.frames * 1000 if self.frames else None,
+            "error": self.error,
+        }
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def _camera_position() -> tuple:
+    # The camera is on the process's default drone; snapshots are safe to read from any thread
+    from utils.context import get_default_context
+    return get_default_context().physics.telemetry.position
+
+
+def get_vision_pipeline() -> VisionPipeline:
+    """Get the process-wide pipeline on VISION_SOURCE (one camera handle for all callers)"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                _pipeline = VisionPipeline(position=_camera_position)
+                atexit.register(_pipeline.stop)
+    return _pipeline